@@ -3,53 +3,43 @@ import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 import scipy.stats as stats
-import time
-from sklearn.neighbors import NearestNeighbors
+import os
+import sys
+
+# Make the shared helpers in results/common importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.budget import describe_budget
+from common.cache import default_cache, rips_persistence
+from common.curvature import DEFAULT_CHUNK_SIZE, curvature_persistence, refined_curvature
+from common.landmarks import describe_landmarks
+from common.profiling import RunProfile, stage
+from common.resampling import bootstrap_difference_ci, permutation_test
+from common.shared import SharedCloudRegistry, run_shared
 
 plt.rcParams['text.usetex'] = False
 
+# Set to an integer to build the Rips complexes on that many maxmin landmarks instead of every point
+num_landmarks = None
+
+# Set above 1 to compute the persistence diagrams in that many worker processes sharing the point clouds
+max_workers = 1
+
 # A function to calculate curvature combining local point density and local angles
-def refined_curvature_measure(points, n_neighbors=10):
-    # Calculate local point density using nearest neighbors
-    nbrs = NearestNeighbors(n_neighbors=n_neighbors, algorithm='ball_tree').fit(points)
-    distances, indices = nbrs.kneighbors(points)
-    avg_density_distance = np.mean(distances[:, 1:], axis=1)  # Average of nearest neighbors (excluding self)
-
-    # Calculate local curvature using angles between neighbors
-    angles = []
-    for idx, point_indices in enumerate(indices):
-        current_point = points[idx]
-        neighbor_points = points[point_indices[1:]]  # Skip the point itself
-        vectors = neighbor_points - current_point
-        num_neighbors = vectors.shape[0]
-
-        # Calculate pairwise angles between neighbor vectors
-        angle_sum = 0
-        count = 0
-        for i in range(num_neighbors):
-            for j in range(i + 1, num_neighbors):
-                vec1 = vectors[i]
-                vec2 = vectors[j]
-                dot_product = np.dot(vec1, vec2)
-                norm_product = np.linalg.norm(vec1) * np.linalg.norm(vec2)
-                if norm_product > 0:
-                    angle_sum += np.arccos(dot_product / norm_product)
-                    count += 1
-        avg_angle = angle_sum / count if count > 0 else 0
-        angles.append(avg_angle)
-
-    avg_angles = np.array(angles)
-
-    # Combine density and angle information
-    # The lower the distance and the larger the angles, the higher the curvature proxy
-    curvature_combined = (1 / avg_density_distance) * avg_angles
-    return curvature_combined
+def refined_curvature_measure(points, n_neighbors=10, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None):
+    # The lower the mean neighbour distance and the larger the mean angle between
+    # neighbour vectors, the higher the curvature proxy; computed by the batched
+    # kernel in common.curvature (chunked, optionally on a thread pool)
+    return refined_curvature(points, n_neighbors=n_neighbors, chunk_size=chunk_size, max_workers=max_workers)
+
+# Stage timings, memory and simplex counts go to $PH_PROFILE_LOG as one record when it is set
+run_profile = RunProfile('curvature_weighted_homology_suite', num_points=150, dimension=5).start()
 
 # Define a more complex random point cloud in 5 dimensions
 np.random.seed(42)  # Ensure reproducibility
 
 # Create 150 points in 5 dimensions to simulate a higher-dimensional structure with some complexity
-points = np.random.uniform(-1, 1, size=(150, 5))  # Random points within a unit hypercube in 5D
+with stage('generate'):
+    points = np.random.uniform(-1, 1, size=(150, 5))  # Random points within a unit hypercube in 5D
 
 # Calculate refined curvature for each point
 refined_curvatures = refined_curvature_measure(points)
@@ -68,17 +58,33 @@ plt.legend()
 plt.title("Refined Curvature-Weighted Filtration (150 points, 5D, 2D Projection)")
 plt.show()
 
-# --- Higher-Dimensional Complex Analysis ---
+# --- Persistence Computations ---
+
+# The Rips complexes on the filtered and on all points and the curvature filtration (see the sweep below) are
+# independent, so they run as one batch; worker processes attach to the shared clouds by name instead of
+# receiving pickled copies, and the clouds are released when the batch is done
+# (max edge length adjusted for higher dimensionality, max dimension 5 for deeper analysis;
+# reused from the cache when $PH_CACHE_DIR is set and shrunk to fit $PH_MEMORY_BUDGET when that is set)
+rips_options = {'max_edge_length': 2.0, 'max_dimension': 5, 'cache': default_cache(), 'num_landmarks': num_landmarks}
+with SharedCloudRegistry() as registry:
+    points_handle = registry.register('points', points)
+    persistence_tasks = {
+        'refined_curvature_weighted': (rips_persistence, registry.register('filtered_points', filtered_points), (), rips_options),
+        'standard': (rips_persistence, points_handle, (), rips_options),
+        'curvature_sweep': (curvature_persistence, points_handle, (refined_curvatures,), {'max_edge_length': 2.0, 'max_dimension': 5}),
+    }
+    persistence_results, persistence_seconds = run_shared(persistence_tasks, max_workers=max_workers)
 
-# Build a Rips complex on the filtered points
-rips_complex = gd.RipsComplex(points=filtered_points, max_edge_length=2.0)  # Adjust max edge length for higher dimensionality
-simplex_tree = rips_complex.create_simplex_tree(max_dimension=5)  # Increase max dimension to 5 for deeper analysis
+# --- Higher-Dimensional Complex Analysis ---
 
-# Compute persistent homology for the refined curvature-weighted filtration
-start_time = time.time()
-diag_refined_curvature_weighted = simplex_tree.persistence()
-end_time = time.time()
-print(f"Time to compute persistence (Refined Curvature-Weighted Filtration): {end_time - start_time:.2f} seconds")
+# Persistent homology of the Rips complex on the filtered points
+diagram_refined_curvature_weighted, landmark_report = persistence_results['refined_curvature_weighted']
+diag_refined_curvature_weighted = diagram_refined_curvature_weighted.to_persistence_pairs()
+if num_landmarks is not None:
+    print(describe_landmarks(landmark_report))
+if landmark_report['construction'].get('budget'):
+    print(describe_budget(landmark_report['construction']['budget']))
+print(f"Time to compute persistence (Refined Curvature-Weighted Filtration): {persistence_seconds['refined_curvature_weighted']:.2f} seconds")
 
 # Plot persistence diagram for the refined curvature-weighted filtration
 gd.plot_persistence_diagram(diag_refined_curvature_weighted)
@@ -87,21 +93,41 @@ plt.show()
 
 # --- Parallel Test: Using Standard Filtration ---
 
-# Build a Rips complex on the original points without curvature-based filtration
-rips_complex_standard = gd.RipsComplex(points=points, max_edge_length=2.0)
-simplex_tree_standard = rips_complex_standard.create_simplex_tree(max_dimension=5)
-
-# Compute persistent homology for the standard filtration
-start_time = time.time()
-diag_standard = simplex_tree_standard.persistence()
-end_time = time.time()
-print(f"Time to compute persistence (Standard Filtration): {end_time - start_time:.2f} seconds")
+# Persistent homology of the Rips complex on the original points without curvature-based filtration
+diagram_standard, landmark_report_standard = persistence_results['standard']
+diag_standard = diagram_standard.to_persistence_pairs()
+if num_landmarks is not None:
+    print(describe_landmarks(landmark_report_standard))
+if landmark_report_standard['construction'].get('budget'):
+    print(describe_budget(landmark_report_standard['construction']['budget']))
+print(f"Time to compute persistence (Standard Filtration): {persistence_seconds['standard']:.2f} seconds")
 
 # Plot persistence diagram for standard filtration
 gd.plot_persistence_diagram(diag_standard)
 plt.title("Persistence Diagram (Standard Filtration)")
 plt.show()
 
+# --- Curvature Threshold Sweep ---
+
+# Filter the Rips complex on all points by curvature (lower-star: a simplex enters at the largest
+# curvature of its vertices), so the complex at threshold t is the Rips complex on the points with
+# curvature <= t and one persistence computation covers every threshold
+diagram_curvature_sweep = persistence_results['curvature_sweep']
+print(f"Time to compute persistence (Curvature Filtration, all thresholds): {persistence_seconds['curvature_sweep']:.2f} seconds")
+
+# Betti numbers at each curvature percentile are queries on that single diagram
+sweep_percentiles = [10, 25, 50, 75, 90, 100]
+for percentile in sweep_percentiles:
+    threshold = np.percentile(refined_curvatures, percentile)
+    num_points_kept = np.count_nonzero(refined_curvatures <= threshold)
+    print(f"Curvature percentile {percentile} (threshold {threshold:.4f}, {num_points_kept} points): "
+          f"Betti numbers {diagram_curvature_sweep.betti_numbers(threshold)}")
+
+# Plot persistence diagram for the curvature filtration
+gd.plot_persistence_diagram(diagram_curvature_sweep.to_persistence_pairs())
+plt.title("Persistence Diagram (Curvature Filtration)")
+plt.show()
+
 # --- Comparison Test ---
 
 # Compare persistence intervals between refined curvature-weighted and standard filtration
@@ -132,39 +158,46 @@ print(f"Number of intervals with the same persistence in both filtrations: {same
 # --- Statistical Suite for Full Comparison ---
 
 # Convert persistence diagrams to dataframes for analysis
-def diag_to_dataframe(diag, label):
-    data = []
-    for dim, (birth, death) in diag:
-        if not np.isinf(birth) and not np.isinf(death):  # Filter out infinite persistence values
-            data.append({'Dimension': dim, 'Birth': birth, 'Death': death, 'Persistence': death - birth, 'Label': label})
-    return pd.DataFrame(data)
-
-df_refined_curvature_weighted = diag_to_dataframe(diag_refined_curvature_weighted, label='Refined Curvature-Weighted')
-df_standard = diag_to_dataframe(diag_standard, label='Standard')
-
-# Combine dataframes for comparison
-df_combined = pd.concat([df_refined_curvature_weighted, df_standard], ignore_index=True)
-
-# Summary statistics for persistence intervals by filtration type
-summary_stats = df_combined.groupby(['Label', 'Dimension'])['Persistence'].describe()
-print("Summary Statistics for Persistence Intervals:\n", summary_stats)
-
-# Statistical tests to compare persistence intervals
-for dim in df_combined['Dimension'].unique():
-    df_dim = df_combined[df_combined['Dimension'] == dim]
-    persistence_curvature = df_dim[df_dim['Label'] == 'Refined Curvature-Weighted']['Persistence']
-    persistence_standard = df_dim[df_dim['Label'] == 'Standard']['Persistence']
-
-    # Perform t-test to check for significant difference in persistence between the two filtrations
-    if len(persistence_curvature) > 1 and len(persistence_standard) > 1:
-        t_stat, p_value = stats.ttest_ind(persistence_curvature, persistence_standard, equal_var=False)
-        print(f"Dimension {dim} - T-test results: t-statistic = {t_stat}, p-value = {p_value}")
-
-        # Effect size (Cohen's d) to quantify the difference
-        mean_diff = np.abs(np.mean(persistence_curvature) - np.mean(persistence_standard))
-        pooled_std = np.sqrt((np.std(persistence_curvature, ddof=1) ** 2 + np.std(persistence_standard, ddof=1) ** 2) / 2)
-        cohens_d = mean_diff / pooled_std
-        print(f"Dimension {dim} - Cohen's d = {cohens_d}")
+def diag_to_dataframe(diagram, label):
+    data = diagram.to_dataframe(finite=True).rename(columns={'Lifespan': 'Persistence'})  # Filter out infinite persistence values
+    data['Label'] = label
+    return data
+
+with stage('statistics'):
+    df_refined_curvature_weighted = diag_to_dataframe(diagram_refined_curvature_weighted, label='Refined Curvature-Weighted')
+    df_standard = diag_to_dataframe(diagram_standard, label='Standard')
+
+    # Combine dataframes for comparison
+    df_combined = pd.concat([df_refined_curvature_weighted, df_standard], ignore_index=True)
+
+    # Summary statistics for persistence intervals by filtration type
+    summary_stats = df_combined.groupby(['Label', 'Dimension'])['Persistence'].describe()
+    print("Summary Statistics for Persistence Intervals:\n", summary_stats)
+
+    # Statistical tests to compare persistence intervals
+    for dim in df_combined['Dimension'].unique():
+        df_dim = df_combined[df_combined['Dimension'] == dim]
+        persistence_curvature = df_dim[df_dim['Label'] == 'Refined Curvature-Weighted']['Persistence']
+        persistence_standard = df_dim[df_dim['Label'] == 'Standard']['Persistence']
+
+        # Perform t-test to check for significant difference in persistence between the two filtrations
+        if len(persistence_curvature) > 1 and len(persistence_standard) > 1:
+            t_stat, p_value = stats.ttest_ind(persistence_curvature, persistence_standard, equal_var=False)
+            print(f"Dimension {dim} - T-test results: t-statistic = {t_stat}, p-value = {p_value}")
+
+            # Effect size (Cohen's d) to quantify the difference
+            mean_diff = np.abs(np.mean(persistence_curvature) - np.mean(persistence_standard))
+            pooled_std = np.sqrt((np.std(persistence_curvature, ddof=1) ** 2 + np.std(persistence_standard, ddof=1) ** 2) / 2)
+            cohens_d = mean_diff / pooled_std
+            print(f"Dimension {dim} - Cohen's d = {cohens_d}")
+
+            # Resampling-based inference: permutation null for Welch's t and a bootstrap interval for the signed effect size
+            permutation = permutation_test(persistence_curvature, persistence_standard, statistic='welch_t', seed=42)
+            interval = bootstrap_difference_ci(persistence_curvature, persistence_standard, statistic='cohens_d', seed=42)
+            print(f"Dimension {dim} - Permutation p-value ({permutation['num_permutations']} permutations) = {permutation['p_value']}")
+            print(f"Dimension {dim} - Cohen's d (curvature - standard) 95% bootstrap CI = [{interval['low']:.4f}, {interval['high']:.4f}]")
 
 print("\nDeep Comparison of Filtrations:")
 print(df_combined)
+
+run_profile.finish()
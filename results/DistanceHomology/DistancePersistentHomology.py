@@ -1,172 +1,213 @@
-import gudhi
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
-import gudhi.wasserstein as wasserstein
-import gudhi.bottleneck as bottleneck
+from scipy.spatial.distance import squareform
+import argparse
+import json
+import os
+import sys
+
+# Make the shared helpers in results/common importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.batch import run_batch
+from common.budget import MEMORY_BUDGET_ENV, describe_budget
+from common.cache import CACHE_DIR_ENV, default_cache, rips_persistence
+from common.distances import distance_matrix
+from common.generators import sierpinski_gasket, whitney_umbrella
+from common.screening import DiagramIndex
+from common.landmarks import describe_landmarks
+from common.profiling import PROFILE_LOG_ENV, RunProfile, stage
 
 # --- Test 1: Sierpinski Gasket ---
-def sierpinski_gasket_test(depth):
+def sierpinski_gasket_test(depth, num_landmarks=None):
     print("Running Sierpinski Gasket Test...")
 
-    def sierpinski_gasket(depth):
-        points = np.array([[0, 0], [1, 0], [0.5, np.sqrt(3)/2]])  # Initial triangle
-        for _ in range(depth):
-            new_points = []
-            for i in range(len(points)):
-                for j in range(i + 1, len(points)):
-                    new_points.append((points[i] + points[j]) / 2)
-            points = np.vstack([points, new_points])
-            points = np.unique(points, axis=0)
-        return points
-
     points = sierpinski_gasket(depth)
-    rips_complex = gudhi.RipsComplex(points=points, max_edge_length=0.2)
-    simplex_tree = rips_complex.create_simplex_tree(max_dimension=4)
-    diag = simplex_tree.persistence()
-
-    # Extract the persistence diagram for comparison
-    diag_np = np.array([pair[1] for pair in diag])
-
-    # Gather persistence data
-    persistence_data = []
-    for birth_death in diag:
-        dim, (birth, death) = birth_death
-        if death == float('inf'):
-            death = np.nan  # Replace infinite death with NaN for easier statistics
-        lifespan = death - birth if not np.isnan(death) else np.nan
-        persistence_data.append([dim, birth, death, lifespan])
-
-    df = pd.DataFrame(persistence_data, columns=['Dimension', 'Birth', 'Death', 'Lifespan'])
-
-    summary_stats = df.groupby('Dimension').agg(
-        count=('Lifespan', 'size'),
-        avg_birth=('Birth', 'mean'),
-        avg_death=('Death', 'mean'),
-        avg_lifespan=('Lifespan', 'mean'),
-        std_lifespan=('Lifespan', 'std'),
-        max_lifespan=('Lifespan', 'max'),
-        min_lifespan=('Lifespan', 'min')
-    )
+    diagram, landmark_report = rips_persistence(points, max_edge_length=0.2, max_dimension=4, cache=default_cache(), num_landmarks=num_landmarks)
+    if num_landmarks is not None:
+        print(describe_landmarks(landmark_report))
+    if landmark_report['construction'].get('budget'):
+        print(describe_budget(landmark_report['construction']['budget']))
+
+    with stage('statistics'):
+        df = diagram.to_dataframe()
+        summary_stats = diagram.summary()
 
     print("Sierpinski Gasket Persistence Summary:")
     print(summary_stats)
-    return diag_np, df
+    return diagram, df
 
 # --- Test 2: Triangulated Cube ---
-def triangulated_cube_test():
+def triangulated_cube_test(num_landmarks=None):
     print("Running Triangulated Cube Test...")
 
     vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1],
                          [1, 1, 0], [1, 0, 1], [0, 1, 1], [1, 1, 1]])
 
-    rips_complex = gudhi.RipsComplex(points=vertices, max_edge_length=2.0)
-    simplex_tree = rips_complex.create_simplex_tree(max_dimension=4)
-    diag = simplex_tree.persistence()
-
-    diag_np = np.array([pair[1] for pair in diag])
+    diagram, landmark_report = rips_persistence(vertices, max_edge_length=2.0, max_dimension=4, cache=default_cache(), num_landmarks=num_landmarks)
+    if num_landmarks is not None:
+        print(describe_landmarks(landmark_report))
+    if landmark_report['construction'].get('budget'):
+        print(describe_budget(landmark_report['construction']['budget']))
 
-    persistence_data = []
-    for birth_death in diag:
-        dim, (birth, death) = birth_death
-        if death == float('inf'):
-            death = np.nan
-        lifespan = death - birth if not np.isnan(death) else np.nan
-        persistence_data.append([dim, birth, death, lifespan])
-
-    df = pd.DataFrame(persistence_data, columns=['Dimension', 'Birth', 'Death', 'Lifespan'])
-
-    summary_stats = df.groupby('Dimension').agg(
-        count=('Lifespan', 'size'),
-        avg_birth=('Birth', 'mean'),
-        avg_death=('Death', 'mean'),
-        avg_lifespan=('Lifespan', 'mean'),
-        std_lifespan=('Lifespan', 'std'),
-        max_lifespan=('Lifespan', 'max'),
-        min_lifespan=('Lifespan', 'min')
-    )
+    with stage('statistics'):
+        df = diagram.to_dataframe()
+        summary_stats = diagram.summary()
 
     print("Triangulated Cube Persistence Summary:")
     print(summary_stats)
-    return diag_np, df
+    return diagram, df
 
 # --- Test 3: Whitney Umbrella Approximation ---
-def whitney_umbrella_test(num_points):
+def whitney_umbrella_test(num_points, seed=None, num_landmarks=None):
     print("Running Whitney Umbrella Approximation Test...")
 
-    def whitney_umbrella(num_points):
-        points = []
-        for _ in range(num_points):
-            x = np.random.uniform(-1, 1)
-            y = x * np.random.uniform(-1, 1)
-            z = y ** 2
-            points.append([x, y, z])
-        return np.array(points)
-
-    points = whitney_umbrella(num_points)
-    rips_complex = gudhi.RipsComplex(points=points, max_edge_length=0.5)
-    simplex_tree = rips_complex.create_simplex_tree(max_dimension=4)
-    diag = simplex_tree.persistence()
-
-    diag_np = np.array([pair[1] for pair in diag])
-
-    persistence_data = []
-    for birth_death in diag:
-        dim, (birth, death) = birth_death
-        if death == float('inf'):
-            death = np.nan
-        lifespan = death - birth if not np.isnan(death) else np.nan
-        persistence_data.append([dim, birth, death, lifespan])
-
-    df = pd.DataFrame(persistence_data, columns=['Dimension', 'Birth', 'Death', 'Lifespan'])
-
-    summary_stats = df.groupby('Dimension').agg(
-        count=('Lifespan', 'size'),
-        avg_birth=('Birth', 'mean'),
-        avg_death=('Death', 'mean'),
-        avg_lifespan=('Lifespan', 'mean'),
-        std_lifespan=('Lifespan', 'std'),
-        max_lifespan=('Lifespan', 'max'),
-        min_lifespan=('Lifespan', 'min')
-    )
+    points = whitney_umbrella(num_points, seed=seed)
+    diagram, landmark_report = rips_persistence(points, max_edge_length=0.5, max_dimension=4, cache=default_cache(), num_landmarks=num_landmarks)
+    if num_landmarks is not None:
+        print(describe_landmarks(landmark_report))
+    if landmark_report['construction'].get('budget'):
+        print(describe_budget(landmark_report['construction']['budget']))
+
+    with stage('statistics'):
+        df = diagram.to_dataframe()
+        summary_stats = diagram.summary()
 
     print("Whitney Umbrella Approximation Persistence Summary:")
     print(summary_stats)
-    return diag_np, df
+    return diagram, df
 
 # --- Distance Calculation ---
-def compute_distances(diag1, diag2):
+def compute_distances(diag1, diag2, dims=None):
+    """
+    Bottleneck and Wasserstein distances between two diagrams, compared one homology dimension at a time.
+
+    A two-diagram case of `compute_distance_matrices`: per-dimension distances are
+    combined by their maximum (bottleneck) and their sum (Wasserstein).
+    """
     print("Calculating Bottleneck and Wasserstein distances between diagrams...")
 
-    bottleneck_dist = bottleneck.bottleneck_distance(diag1, diag2)
+    if dims is None:
+        dims = tuple(range(max(diag1.max_dimension, diag2.max_dimension) + 1))
+    bottleneck_dist = float(distance_matrix([diag1, diag2], metric='bottleneck', dims=dims, max_workers=1)[0])
     print(f"Bottleneck Distance: {bottleneck_dist}")
 
-    wasserstein_dist = wasserstein.wasserstein_distance(diag1, diag2)
+    wasserstein_dist = float(distance_matrix([diag1, diag2], metric='wasserstein', dims=dims, max_workers=1)[0])
     print(f"Wasserstein Distance: {wasserstein_dist}")
 
     return bottleneck_dist, wasserstein_dist
 
+# --- All-Pairs Distance Matrices ---
+def compute_distance_matrices(diagrams, names, dims=None, max_workers=None):
+    """
+    All-pairs bottleneck and Wasserstein distances, computed separately in every homology dimension.
+
+    Points of different dimensions are never matched. Each metric gets one
+    matrix per dimension and a combined matrix: the maximum over dimensions for
+    the bottleneck distance and the sum for the (order 1) Wasserstein distance.
+    """
+    print("Calculating all-pairs Bottleneck and Wasserstein distance matrices per dimension (infinite points discarded)...")
+
+    if dims is None:
+        dims = tuple(range(max(diagram.max_dimension for diagram in diagrams) + 1))
+    matrices = {}
+    for metric in ('bottleneck', 'wasserstein'):
+        per_dim = distance_matrix(diagrams, metric=metric, dims=dims, combine=False, max_workers=max_workers)
+        stacked = np.stack([per_dim[dim] for dim in dims])
+        combined = stacked.max(axis=0) if metric == 'bottleneck' else stacked.sum(axis=0)
+        matrices[metric] = {**{f"H{dim}": squareform(per_dim[dim]) for dim in dims}, 'combined': squareform(combined)}
+        for label, matrix in matrices[metric].items():
+            print(f"\n{metric.capitalize()} Distance Matrix, {label} ({', '.join(names)}):")
+            print(matrix)
+
+    return matrices
+
+# --- Nearest-Diagram Queries ---
+def compute_nearest_diagrams(diagrams, names, k=1, metric='wasserstein', dims=None, index=None):
+    """
+    Query every diagram for its k nearest neighbours in the collection.
+
+    The index keeps one slot per homology dimension, so points are only matched
+    within their dimension, and the distances are combined like the matrices of
+    `compute_distance_matrices`. Candidates are screened with sliced-Wasserstein
+    lower bounds and only the survivors get exact gudhi distances, so the
+    neighbours are exact.
+    """
+    print(f"Querying {k} nearest diagram(s) by {metric} distance with sliced screening...")
+
+    if index is None:
+        if dims is None:
+            dims = tuple(range(max(diagram.max_dimension for diagram in diagrams) + 1))
+        index = DiagramIndex(diagrams, dims=dims)
+    nearest = {}
+    for i, name in enumerate(names):
+        with stage('distances'):
+            indices, distances, stats = index.query(diagrams[i], k=k, metric=metric, exclude=[i])
+        nearest[name] = [(names[j], float(d)) for j, d in zip(indices, distances)]
+        print(f"{name}: {nearest[name]} ({stats['exact_evaluations']} exact, {stats['pruned']} pruned)")
+
+    return nearest
+
 # --- Unified Test Suite ---
-def run_unified_test_suite_with_distances():
+def run_unified_test_suite_with_distances(num_landmarks=None):
     print("Running Unified Persistent Homology Test Suite with Distance Calculations...\n")
 
-    diag1, df1 = sierpinski_gasket_test(depth=6)
-    diag2, df2 = triangulated_cube_test()
-    diag3, df3 = whitney_umbrella_test(num_points=500)
-
-    print("\nSierpinski Gasket Persistence Data:\n", df1)
-    print("\nTriangulated Cube Persistence Data:\n", df2)
-    print("\nWhitney Umbrella Persistence Data:\n", df3)
-
-    print("\nComparing Sierpinski Gasket and Triangulated Cube:")
-    compute_distances(diag1, diag2)
-
-    print("\nComparing Triangulated Cube and Whitney Umbrella:")
-    compute_distances(diag2, diag3)
-
-    print("\nComparing Sierpinski Gasket and Whitney Umbrella:")
-    compute_distances(diag1, diag3)
+    # Stage timings, memory and simplex counts go to $PH_PROFILE_LOG as one record when it is set
+    with RunProfile('distance_homology_suite', num_landmarks=num_landmarks):
+        diag1, df1 = sierpinski_gasket_test(depth=6, num_landmarks=num_landmarks)
+        diag2, df2 = triangulated_cube_test(num_landmarks=num_landmarks)
+        diag3, df3 = whitney_umbrella_test(num_points=500, num_landmarks=num_landmarks)
+
+        print("\nSierpinski Gasket Persistence Data:\n", df1)
+        print("\nTriangulated Cube Persistence Data:\n", df2)
+        print("\nWhitney Umbrella Persistence Data:\n", df3)
+
+        print()
+        names = ['Sierpinski Gasket', 'Triangulated Cube', 'Whitney Umbrella']
+        compute_distance_matrices([diag1, diag2, diag3], names)
+        print()
+        compute_nearest_diagrams([diag1, diag2, diag3], names)
+
+# --- Headless Batch Suite ---
+def run_unified_test_suite_with_distances_batch(output_dir, max_workers=None, num_landmarks=None):
+    print(f"Running Unified Persistent Homology Test Suite with Distance Calculations in batch mode (output: {output_dir})...\n")
+
+    tasks = {
+        'sierpinski_gasket': (sierpinski_gasket_test, {'depth': 6, 'num_landmarks': num_landmarks}),
+        'triangulated_cube': (triangulated_cube_test, {'num_landmarks': num_landmarks}),
+        'whitney_umbrella': (whitney_umbrella_test, {'num_points': 500, 'num_landmarks': num_landmarks}),
+    }
+    results, report = run_batch(tasks, output_dir, max_workers=max_workers)
+
+    # Distances are cheap next to the persistence computations, so they run in the parent
+    names = [name for name in tasks if results[name] is not None]
+    with RunProfile('distance_homology_suite_distances', num_landmarks=num_landmarks):
+        matrices = compute_distance_matrices([results[name][0] for name in names], names, max_workers=max_workers)
+        nearest = compute_nearest_diagrams([results[name][0] for name in names], names)
+    distances = {'names': names, 'nearest': nearest,
+                 **{metric: {label: matrix.tolist() for label, matrix in by_dim.items()} for metric, by_dim in matrices.items()}}
+
+    with open(os.path.join(output_dir, 'distances.json'), 'w') as f:
+        json.dump(distances, f, indent=2)
+    return results, report, distances
 
 # Run the test suite
 if __name__ == "__main__":
-    run_unified_test_suite_with_distances()
+    parser = argparse.ArgumentParser(description="Unified persistent homology test suite with diagram distances.")
+    parser.add_argument('--batch', metavar='OUTPUT_DIR', help="Run headlessly in a process pool and write results to OUTPUT_DIR.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes in batch mode.")
+    parser.add_argument('--cache', metavar='CACHE_DIR', default=None, help="Reuse persistence diagrams stored in CACHE_DIR.")
+    parser.add_argument('--memory-budget', metavar='SIZE', default=None, help="Estimate each complex first and shrink it to fit SIZE (e.g. 4G).")
+    parser.add_argument('--profile', metavar='LOG', default=None, help="Append a JSON-lines timing/memory record for each run to LOG.")
+    parser.add_argument('--landmarks', type=int, default=None, help="Build each complex on this many maxmin landmarks instead of every point.")
+    args = parser.parse_args()
+    if args.cache:
+        os.environ[CACHE_DIR_ENV] = args.cache  # Inherited by batch worker processes
+    if args.memory_budget:
+        os.environ[MEMORY_BUDGET_ENV] = args.memory_budget
+    if args.profile:
+        os.environ[PROFILE_LOG_ENV] = args.profile  # Each batch worker appends its own record
+
+    if args.batch:
+        run_unified_test_suite_with_distances_batch(args.batch, max_workers=args.workers, num_landmarks=args.landmarks)
+    else:
+        run_unified_test_suite_with_distances(num_landmarks=args.landmarks)
@@ -1,51 +1,35 @@
 import numpy as np
-from ripser import ripser
-from scipy.stats import ttest_ind, ks_2samp, wilcoxon
+from scipy.stats import ttest_ind, wilcoxon
 from sklearn.preprocessing import MinMaxScaler
 from collections import defaultdict
+from functools import partial
+import argparse
+import os
+import sys
+
+# Make the shared helpers in results/common importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.generators import spawn_seeds, synthetic_cloud
+from common.budget import MEMORY_BUDGET_ENV
+from common.budgeted import TIME_BUDGET_ENV, describe_budgeted
+from common.cache import default_cache, ripser_persistence
+from common.landmarks import describe_landmarks
+from common.profiling import RunProfile, stage, timed
+from common.ragged import summarize_diagrams
+from common.resampling import bootstrap_ci, paired_permutation_test, permutation_test
+from common.sweep import expand_grid, run_sweep
 
 # Generate point cloud based on framework and complexity
-def generate_point_cloud(framework, num_points, dimension, complexity):
-    if framework == 'singular':
-        # Singular point cloud with perturbations for higher-dimensional singularities
-        cloud = np.random.rand(num_points, dimension)
-        perturbations = np.random.normal(scale=0.05 * complexity, size=cloud.shape)
-        return cloud + perturbations
-    elif framework == 'non-smooth':
-        # Non-smooth with polyhedral-like irregularities
-        cloud = np.random.rand(num_points, dimension)
-        cloud[:num_points//2] *= complexity * 0.1  # Irregular scaling
-        return cloud
-    elif framework == 'fractal':
-        # Fractal-like structure, recursive generation with higher-dimensional edge cases
-        points = np.random.rand(3, dimension)  # Initial simplex
-        for _ in range(complexity):
-            new_points = []
-            for i in range(len(points)):
-                for j in range(i + 1, len(points)):
-                    new_points.append((points[i] + points[j]) / 2)
-            points = np.vstack([points, new_points])
-            points = np.unique(points, axis=0)
-        return points[:num_points]  # Truncate to num_points
-    elif framework == 'hybrid':
-        # Hybrid combining singularities with non-smooth and fractal structures
-        cloud_singular = generate_point_cloud('singular', num_points//2, dimension, complexity)
-        cloud_fractal = generate_point_cloud('fractal', num_points//2, dimension, complexity)
-        return np.vstack((cloud_singular, cloud_fractal))  # Combine singular and fractal clouds
-    elif framework == 'curvature':
-        # Hybrid framework adding curvature effects to the filtration
-        cloud = np.random.rand(num_points, dimension)
-        curvature_weight = np.sin(np.linspace(0, np.pi, num_points))  # Simple curvature effect
-        return cloud * curvature_weight[:, np.newaxis]  # Scale point cloud by curvature
-    elif framework == 'control':
-        # Control random point cloud
-        return np.random.rand(num_points, dimension)
-    else:
-        raise ValueError(f"Unknown framework: {framework}")
+def generate_point_cloud(framework, num_points, dimension, complexity, seed=None):
+    # Frameworks: 'singular', 'non-smooth', 'fractal', 'hybrid', 'curvature' and 'control'
+    # (see common.generators.iter_synthetic_cloud); seeded and drawn in vectorized blocks
+    return synthetic_cloud(framework, num_points, dimension, complexity, seed=seed)
 
 # Function to run null hypothesis tests
-def run_null_hypothesis_tests(singular_stats, control_stats):
+@timed('statistics')
+def run_null_hypothesis_tests(singular_stats, control_stats, seed=None):
     null_tests = {}
+    stat_seeds = iter(spawn_seeds(seed, 2 * len(singular_stats)))
     for stat in singular_stats.keys():
         # Perform t-test
         t_stat, t_p_value = ttest_ind(singular_stats[stat], control_stats[stat], nan_policy='omit')
@@ -60,64 +44,95 @@ def run_null_hypothesis_tests(singular_stats, control_stats):
             # Perform Wilcoxon signed-rank test
             w_stat, w_p_value = wilcoxon(singular_stats[stat], control_stats[stat])
 
-        null_tests[stat] = {'t_stat': t_stat, 't_p_value': t_p_value, 'wilcoxon_stat': w_stat, 'wilcoxon_p_value': w_p_value}
+        # Resampling counterparts: relabel the two groups, and flip the signs of the paired differences
+        singular_values, control_values = np.array(singular_stats[stat], dtype=float), np.array(control_stats[stat], dtype=float)
+        valid = np.isfinite(singular_values) & np.isfinite(control_values)
+        permutation = permutation_test(singular_values[valid], control_values[valid], seed=next(stat_seeds))
+        paired = paired_permutation_test(singular_values[valid], control_values[valid], seed=next(stat_seeds))
+
+        null_tests[stat] = {'t_stat': t_stat, 't_p_value': t_p_value, 'wilcoxon_stat': w_stat, 'wilcoxon_p_value': w_p_value,
+                            'permutation_p_value': permutation['p_value'], 'paired_permutation_p_value': paired['p_value']}
     return null_tests
 
 # Function to compute persistence statistics
-def compute_persistence_statistics(diagrams):
-    def calculate_statistics(persistence_intervals):
-        finite_intervals = persistence_intervals[np.isfinite(persistence_intervals[:, 1])]
-        if len(finite_intervals) > 0:
-            persistence_lifespans = finite_intervals[:, 1] - finite_intervals[:, 0]
-            mean_lifespan = np.mean(persistence_lifespans)
-            std_lifespan = np.std(persistence_lifespans)
-            max_lifespan = np.max(persistence_lifespans)
-            min_lifespan = np.min(persistence_lifespans)
-            ks_stat, ks_p = ks_2samp(persistence_lifespans, np.random.normal(mean_lifespan, std_lifespan, len(persistence_lifespans)))
-            return {'count': len(finite_intervals), 'mean_lifespan': mean_lifespan, 'std_lifespan': std_lifespan,
-                    'max_lifespan': max_lifespan, 'min_lifespan': min_lifespan, 'normality_ks_stat': ks_stat, 'normality_ks_p': ks_p}
-        else:
-            return {'count': 0, 'mean_lifespan': np.nan, 'std_lifespan': np.nan, 'max_lifespan': np.nan, 'min_lifespan': np.nan,
-                    'normality_ks_stat': np.nan, 'normality_ks_p': np.nan}
-
-    h0_diagram = diagrams[0]  # H_0 persistence diagram (connected components)
-    h1_diagram = diagrams[1]  # H_1 persistence diagram (loops)
-
-    # Compute statistics for H_0 and H_1
-    h0_stats = calculate_statistics(h0_diagram)
-    h1_stats = calculate_statistics(h1_diagram)
-
-    return {'H_0': h0_stats, 'H_1': h1_stats}
+@timed('statistics')
+def compute_persistence_statistics(diagrams, seed=None):
+    # H_0 (connected components) and H_1 (loops) are summarized together in one vectorized pass; the
+    # normality test compares the lifespans with the normal distribution fitted to them
+    table = summarize_diagrams(diagrams[:2], index=['H_0', 'H_1'])
+    columns = ['count', 'mean_lifespan', 'std_lifespan', 'max_lifespan', 'min_lifespan', 'lifespan_q25', 'lifespan_q50',
+               'lifespan_q75', 'normality_ks_stat', 'normality_ks_p']
+
+    stats = {}
+    for label, diagram, interval_seed in zip(table.index, diagrams, spawn_seeds(seed, 2)):
+        finite_intervals = diagram[np.isfinite(diagram[:, 1])]
+        interval = bootstrap_ci(finite_intervals[:, 1] - finite_intervals[:, 0], 'mean', seed=interval_seed)
+        stats[label] = {column: table.at[label, column] for column in columns}
+        stats[label]['count'] = int(stats[label]['count'])
+        stats[label]['mean_lifespan_ci'] = (interval['low'], interval['high'])
+    return stats
+
+# Frameworks compared in the sweep (see common.generators.iter_synthetic_cloud)
+FRAMEWORKS = ['singular', 'non-smooth', 'fractal', 'hybrid', 'curvature', 'control']
+
+# Run one cell of the experiment grid: generate, normalize, compute persistence and summarize
+def run_experiment_cell(complexity, framework, num_points, dimension, replicate, seed=None, num_landmarks=None):
+    generation_seed, statistics_seed = spawn_seeds(seed, 2)
+    point_cloud = generate_point_cloud(framework, num_points, dimension, complexity, seed=generation_seed)
+    # Normalize the data
+    with stage('normalize'):
+        scaler = MinMaxScaler()
+        normalized_cloud = scaler.fit_transform(point_cloud)
+
+    # Compute persistence diagrams using Ripser (on maxmin landmarks in landmark mode, cached if enabled)
+    # ($PH_TIME_BUDGET / $PH_MEMORY_BUDGET switch to the budgeted mode, which reports where it truncated)
+    diagrams, landmark_report = ripser_persistence(normalized_cloud, cache=default_cache(), num_landmarks=num_landmarks)
+    if 'rounds' in landmark_report:
+        print(describe_budgeted(landmark_report))
+    elif num_landmarks is not None:
+        print(describe_landmarks(landmark_report))
+
+    # Compute statistics for persistence diagrams
+    return compute_persistence_statistics(diagrams, seed=statistics_seed)
 
 # Run the final full experiment
-def run_ultimate_experiment(num_points=2000, dimension=5, singular_points=5):
-    complexities = [1, 2, 3, 4]
-    frameworks = ['singular', 'non-smooth', 'fractal', 'hybrid', 'curvature', 'control']
-
-    # Initialize results storage
-    all_results = defaultdict(list)
-
-    for complexity in complexities:
-        print(f"Running tests for complexity level: {complexity}")
-        for framework in frameworks:
-            point_cloud = generate_point_cloud(framework, num_points, dimension, complexity)
-            # Normalize the data
-            scaler = MinMaxScaler()
-            normalized_cloud = scaler.fit_transform(point_cloud)
-
-            # Compute persistence diagrams using Ripser
-            diagrams = ripser(normalized_cloud)['dgms']
-
-            # Compute statistics for persistence diagrams
-            stats = compute_persistence_statistics(diagrams)
-            all_results[framework].append(stats)
-            print(f"--- Statistical Summary for {framework.capitalize()} Framework (Complexity {complexity}) ---")
-            print(f"H_0 (Connected Components): {stats['H_0']}")
-            print(f"H_1 (Loops): {stats['H_1']}")
-
-    # Run null hypothesis tests between singular and control
-    results_singular = [r for r in all_results['singular']]
-    results_control = [r for r in all_results['control']]
+def run_ultimate_experiment(num_points=2000, dimension=5, singular_points=5, seed=None, num_landmarks=None,
+                            complexities=(1, 2, 3, 4), frameworks=FRAMEWORKS, sizes=None, dimensions=None, replicates=1,
+                            checkpoint_dir=None, max_workers=None):
+    """
+    Sweep a grid of complexities x frameworks x sizes x dimensions x replicates and test singular against control.
+
+    Cells run in a process pool (`max_workers`, 1 for in-process) and, with
+    `checkpoint_dir`, each finished cell is saved at once so a restarted sweep
+    only computes the missing cells. `sizes` and `dimensions` default to
+    [num_points] and [dimension].
+    """
+    # One independent, reproducible random stream per cell, keyed by the cell's values
+    cells = expand_grid(complexity=list(complexities), framework=list(frameworks), num_points=list(sizes or [num_points]),
+                        dimension=list(dimensions or [dimension]), replicate=list(range(replicates)))
+    records = run_sweep(partial(run_experiment_cell, num_landmarks=num_landmarks), cells, checkpoint_dir=checkpoint_dir,
+                        seed=seed, max_workers=max_workers)
+
+    # Initialize results storage, keyed by framework and by the remaining cell values
+    all_results = defaultdict(dict)
+    for record in records:
+        cell = record['cell']
+        if record['error'] is not None:
+            continue
+        stats = record['result']
+        all_results[cell['framework']][(cell['complexity'], cell['num_points'], cell['dimension'], cell['replicate'])] = stats
+        print(f"--- Statistical Summary for {cell['framework'].capitalize()} Framework (Complexity {cell['complexity']}, "
+              f"{cell['num_points']} points, dimension {cell['dimension']}, replicate {cell['replicate']}) ---")
+        print(f"H_0 (Connected Components): {stats['H_0']}")
+        print(f"H_1 (Loops): {stats['H_1']}")
+
+    # Run null hypothesis tests between singular and control, paired on the other cell values
+    paired_cells = [key for key in all_results['singular'] if key in all_results['control']]
+    results_singular = [all_results['singular'][key] for key in paired_cells]
+    results_control = [all_results['control'][key] for key in paired_cells]
+    if len(paired_cells) < 2:
+        print("\nNot enough paired singular/control cells for null hypothesis testing.")
+        return records
 
     # Collecting statistics for each stat (mean, count, etc.)
     singular_stats = {'mean_lifespan': [res['H_0']['mean_lifespan'] for res in results_singular],
@@ -129,13 +144,32 @@ def run_ultimate_experiment(num_points=2000, dimension=5, singular_points=5):
                      'std_lifespan': [res['H_0']['std_lifespan'] for res in results_control]}
 
     # Run null hypothesis tests on the results
-    null_test_results = run_null_hypothesis_tests(singular_stats, control_stats)
+    null_test_results = run_null_hypothesis_tests(singular_stats, control_stats, seed=seed)
     print("\n--- Null Hypothesis Testing Results ---")
     for stat, result in null_test_results.items():
         print(f"\nFor statistic: {stat}")
         print(f"T-test statistic: {result['t_stat']}, P-value: {result['t_p_value']}")
         print(f"Wilcoxon signed-rank statistic: {result['wilcoxon_stat']}, P-value: {result['wilcoxon_p_value']}")
+        print(f"Permutation P-value: {result['permutation_p_value']}, Paired sign-flip P-value: {result['paired_permutation_p_value']}")
+    return records
 
 # Execute the final experiment
 if __name__ == '__main__':
-    run_ultimate_experiment(num_points=2000, dimension=5, singular_points=10)
+    parser = argparse.ArgumentParser(description="Hybrid homology experiment sweep.")
+    parser.add_argument('--checkpoint-dir', metavar='DIR', default=None, help="Save each finished cell to DIR and skip finished cells on restart.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (1 runs the cells in this process).")
+    parser.add_argument('--replicates', type=int, default=1, help="Independent replicates of every grid cell.")
+    parser.add_argument('--seed', type=int, default=None, help="Root seed of the sweep.")
+    parser.add_argument('--landmarks', type=int, default=None, help="Compute persistence on this many maxmin landmarks instead of every point.")
+    parser.add_argument('--time-budget', metavar='SECONDS', default=None, help="Cap each persistence computation at SECONDS of wall time.")
+    parser.add_argument('--memory-budget', metavar='SIZE', default=None, help="Cap each persistence computation at SIZE of memory (e.g. 4G).")
+    args = parser.parse_args()
+    if args.time_budget:
+        os.environ[TIME_BUDGET_ENV] = args.time_budget  # Inherited by the sweep worker processes
+    if args.memory_budget:
+        os.environ[MEMORY_BUDGET_ENV] = args.memory_budget
+
+    # Stage timings, memory and interval counts go to $PH_PROFILE_LOG as one record when it is set (one more per worker cell)
+    with RunProfile('hybrid_homology_experiment', num_points=2000, dimension=5, replicates=args.replicates):
+        run_ultimate_experiment(num_points=2000, dimension=5, singular_points=10, seed=args.seed, num_landmarks=args.landmarks,
+                                replicates=args.replicates, checkpoint_dir=args.checkpoint_dir, max_workers=args.workers)
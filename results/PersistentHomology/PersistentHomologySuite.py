@@ -1,65 +1,45 @@
-import gudhi
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
+import argparse
+import os
+import sys
+
+# Make the shared helpers in results/common importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.batch import run_batch
+from common.budget import MEMORY_BUDGET_ENV, describe_budget
+from common.cache import CACHE_DIR_ENV, default_cache, rips_persistence
+from common.generators import sierpinski_gasket, whitney_umbrella
+from common.landmarks import describe_landmarks
+from common.profiling import PROFILE_LOG_ENV, RunProfile, stage
 
 # --- Test 1: Sierpiński Gasket ---
-def sierpinski_gasket_test(depth):
+def sierpinski_gasket_test(depth, num_landmarks=None):
     print("Running Sierpiński Gasket Test...")
 
-    # Function to generate points in the Sierpiński gasket
-    def sierpinski_gasket(depth):
-        points = np.array([[0, 0], [1, 0], [0.5, np.sqrt(3)/2]])  # Initial triangle
-        for _ in range(depth):
-            new_points = []
-            for i in range(len(points)):
-                for j in range(i + 1, len(points)):
-                    new_points.append((points[i] + points[j]) / 2)
-            points = np.vstack([points, new_points])
-            points = np.unique(points, axis=0)
-        return points
-
     # Generate points for a depth-6 Sierpiński gasket
     points = sierpinski_gasket(depth)
 
-    # Construct a Rips complex from the points
-    rips_complex = gudhi.RipsComplex(points=points, max_edge_length=0.2)
-    simplex_tree = rips_complex.create_simplex_tree(max_dimension=2)
-
-    # Compute the persistence of the simplicial complex
-    diag = simplex_tree.persistence()
-
-    # Gather the persistence data for statistical summary
-    persistence_data = []
-    for birth_death in diag:
-        dim, (birth, death) = birth_death
-        if death == float('inf'):
-            death = np.nan  # Replace infinite death with NaN for easier statistics
-        lifespan = death - birth if not np.isnan(death) else np.nan
-        persistence_data.append([dim, birth, death, lifespan])
-
-    # Create a DataFrame for statistical analysis
-    df = pd.DataFrame(persistence_data, columns=['Dimension', 'Birth', 'Death', 'Lifespan'])
-
-    # Summary statistics for each dimension
-    summary_stats = df.groupby('Dimension').agg(
-        count=('Lifespan', 'size'),
-        avg_birth=('Birth', 'mean'),
-        avg_death=('Death', 'mean'),
-        avg_lifespan=('Lifespan', 'mean'),
-        std_lifespan=('Lifespan', 'std'),
-        max_lifespan=('Lifespan', 'max'),
-        min_lifespan=('Lifespan', 'min')
-    )
+    # Construct a Rips complex from the points and compute its persistence (reused from the cache if enabled)
+    diagram, landmark_report = rips_persistence(points, max_edge_length=0.2, max_dimension=2, cache=default_cache(), num_landmarks=num_landmarks)
+    if num_landmarks is not None:
+        print(describe_landmarks(landmark_report))
+    if landmark_report['construction'].get('budget'):
+        print(describe_budget(landmark_report['construction']['budget']))
+
+    # Summary statistics for each dimension and the long-format table
+    with stage('statistics'):
+        summary_stats = diagram.summary()
+        df = diagram.to_dataframe()
 
     # Display summary statistics
     print("Sierpiński Gasket Persistence Summary:")
     print(summary_stats)
 
     # Plot persistence lifespan histograms
-    for dim in df['Dimension'].unique():
-        dim_df = df[df['Dimension'] == dim]
-        plt.hist(dim_df['Lifespan'].dropna(), bins=20, alpha=0.7, label=f'Dimension {dim}')
+    for dim in summary_stats.index:
+        lifespans = diagram[dim]['lifespan']
+        plt.hist(lifespans[np.isfinite(lifespans)], bins=20, alpha=0.7, label=f'Dimension {dim}')
         plt.title(f'Sierpiński Gasket: Lifespan Histogram for Dimension {dim}')
         plt.xlabel('Lifespan')
         plt.ylabel('Frequency')
@@ -69,51 +49,33 @@ def sierpinski_gasket_test(depth):
     return df
 
 # --- Test 2: Triangulated Cube ---
-def triangulated_cube_test():
+def triangulated_cube_test(num_landmarks=None):
     print("Running Triangulated Cube Test...")
 
     # Vertices of a cube in 3D space
     vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [0, 0, 1],
                          [1, 1, 0], [1, 0, 1], [0, 1, 1], [1, 1, 1]])
 
-    # Create a Rips complex for the triangulated cube
-    rips_complex = gudhi.RipsComplex(points=vertices, max_edge_length=2.0)
-    simplex_tree = rips_complex.create_simplex_tree(max_dimension=3)
-
-    # Compute persistence of the complex
-    diag = simplex_tree.persistence()
-
-    # Gather persistence data
-    persistence_data = []
-    for birth_death in diag:
-        dim, (birth, death) = birth_death
-        if death == float('inf'):
-            death = np.nan  # Replace infinite death with NaN for easier statistics
-        lifespan = death - birth if not np.isnan(death) else np.nan
-        persistence_data.append([dim, birth, death, lifespan])
-
-    # Create a DataFrame for statistical analysis
-    df = pd.DataFrame(persistence_data, columns=['Dimension', 'Birth', 'Death', 'Lifespan'])
-
-    # Summary statistics for each dimension
-    summary_stats = df.groupby('Dimension').agg(
-        count=('Lifespan', 'size'),
-        avg_birth=('Birth', 'mean'),
-        avg_death=('Death', 'mean'),
-        avg_lifespan=('Lifespan', 'mean'),
-        std_lifespan=('Lifespan', 'std'),
-        max_lifespan=('Lifespan', 'max'),
-        min_lifespan=('Lifespan', 'min')
-    )
+    # Create a Rips complex for the triangulated cube and compute its persistence
+    diagram, landmark_report = rips_persistence(vertices, max_edge_length=2.0, max_dimension=3, cache=default_cache(), num_landmarks=num_landmarks)
+    if num_landmarks is not None:
+        print(describe_landmarks(landmark_report))
+    if landmark_report['construction'].get('budget'):
+        print(describe_budget(landmark_report['construction']['budget']))
+
+    # Summary statistics for each dimension and the long-format table
+    with stage('statistics'):
+        summary_stats = diagram.summary()
+        df = diagram.to_dataframe()
 
     # Display summary statistics
     print("Triangulated Cube Persistence Summary:")
     print(summary_stats)
 
     # Plot persistence lifespan histograms
-    for dim in df['Dimension'].unique():
-        dim_df = df[df['Dimension'] == dim]
-        plt.hist(dim_df['Lifespan'].dropna(), bins=20, alpha=0.7, label=f'Dimension {dim}')
+    for dim in summary_stats.index:
+        lifespans = diagram[dim]['lifespan']
+        plt.hist(lifespans[np.isfinite(lifespans)], bins=20, alpha=0.7, label=f'Dimension {dim}')
         plt.title(f'Triangulated Cube: Lifespan Histogram for Dimension {dim}')
         plt.xlabel('Lifespan')
         plt.ylabel('Frequency')
@@ -123,60 +85,32 @@ def triangulated_cube_test():
     return df
 
 # --- Test 3: Whitney Umbrella Approximation ---
-def whitney_umbrella_test(num_points):
+def whitney_umbrella_test(num_points, seed=None, num_landmarks=None):
     print("Running Whitney Umbrella Approximation Test...")
 
     # Generate points approximating a Whitney Umbrella-like structure
-    def whitney_umbrella(num_points):
-        points = []
-        for _ in range(num_points):
-            x = np.random.uniform(-1, 1)
-            y = x * np.random.uniform(-1, 1)  # Singular line at y = 0
-            z = y ** 2
-            points.append([x, y, z])
-        return np.array(points)
-
-    # Generate points
-    points = whitney_umbrella(num_points)
-
-    # Create a Rips complex from the points
-    rips_complex = gudhi.RipsComplex(points=points, max_edge_length=0.5)
-    simplex_tree = rips_complex.create_simplex_tree(max_dimension=2)
-
-    # Compute persistence of the complex
-    diag = simplex_tree.persistence()
-
-    # Gather persistence data
-    persistence_data = []
-    for birth_death in diag:
-        dim, (birth, death) = birth_death
-        if death == float('inf'):
-            death = np.nan  # Replace infinite death with NaN for easier statistics
-        lifespan = death - birth if not np.isnan(death) else np.nan
-        persistence_data.append([dim, birth, death, lifespan])
-
-    # Create a DataFrame for statistical analysis
-    df = pd.DataFrame(persistence_data, columns=['Dimension', 'Birth', 'Death', 'Lifespan'])
-
-    # Summary statistics for each dimension
-    summary_stats = df.groupby('Dimension').agg(
-        count=('Lifespan', 'size'),
-        avg_birth=('Birth', 'mean'),
-        avg_death=('Death', 'mean'),
-        avg_lifespan=('Lifespan', 'mean'),
-        std_lifespan=('Lifespan', 'std'),
-        max_lifespan=('Lifespan', 'max'),
-        min_lifespan=('Lifespan', 'min')
-    )
+    points = whitney_umbrella(num_points, seed=seed)
+
+    # Create a Rips complex from the points and compute its persistence
+    diagram, landmark_report = rips_persistence(points, max_edge_length=0.5, max_dimension=2, cache=default_cache(), num_landmarks=num_landmarks)
+    if num_landmarks is not None:
+        print(describe_landmarks(landmark_report))
+    if landmark_report['construction'].get('budget'):
+        print(describe_budget(landmark_report['construction']['budget']))
+
+    # Summary statistics for each dimension and the long-format table
+    with stage('statistics'):
+        summary_stats = diagram.summary()
+        df = diagram.to_dataframe()
 
     # Display summary statistics
     print("Whitney Umbrella Approximation Persistence Summary:")
     print(summary_stats)
 
     # Plot persistence lifespan histograms
-    for dim in df['Dimension'].unique():
-        dim_df = df[df['Dimension'] == dim]
-        plt.hist(dim_df['Lifespan'].dropna(), bins=20, alpha=0.7, label=f'Dimension {dim}')
+    for dim in summary_stats.index:
+        lifespans = diagram[dim]['lifespan']
+        plt.hist(lifespans[np.isfinite(lifespans)], bins=20, alpha=0.7, label=f'Dimension {dim}')
         plt.title(f'Whitney Umbrella: Lifespan Histogram for Dimension {dim}')
         plt.xlabel('Lifespan')
         plt.ylabel('Frequency')
@@ -186,18 +120,49 @@ def whitney_umbrella_test(num_points):
     return df
 
 # --- Run All Tests in the Unified Suite ---
-def run_unified_test_suite():
+def run_unified_test_suite(num_landmarks=None):
     print("Running Unified Persistent Homology Test Suite...\n")
 
-    # Run Sierpiński Gasket Test
-    sierpinski_gasket_test(depth=6)
+    # Stage timings, memory and simplex counts go to $PH_PROFILE_LOG as one record when it is set
+    with RunProfile('persistent_homology_suite', num_landmarks=num_landmarks):
+        # Run Sierpiński Gasket Test
+        sierpinski_gasket_test(depth=6, num_landmarks=num_landmarks)
+
+        # Run Triangulated Cube Test
+        triangulated_cube_test(num_landmarks=num_landmarks)
+
+        # Run Whitney Umbrella Approximation Test
+        whitney_umbrella_test(num_points=500, num_landmarks=num_landmarks)
 
-    # Run Triangulated Cube Test
-    triangulated_cube_test()
+# --- Run All Tests Headlessly in Parallel ---
+def run_unified_test_suite_batch(output_dir, max_workers=None, num_landmarks=None):
+    print(f"Running Unified Persistent Homology Test Suite in batch mode (output: {output_dir})...\n")
 
-    # Run Whitney Umbrella Approximation Test
-    whitney_umbrella_test(num_points=500)
+    tasks = {
+        'sierpinski_gasket': (sierpinski_gasket_test, {'depth': 6, 'num_landmarks': num_landmarks}),
+        'triangulated_cube': (triangulated_cube_test, {'num_landmarks': num_landmarks}),
+        'whitney_umbrella': (whitney_umbrella_test, {'num_points': 500, 'num_landmarks': num_landmarks}),
+    }
+    return run_batch(tasks, output_dir, max_workers=max_workers)
 
 # Execute the unified test suite
 if __name__ == "__main__":
-    run_unified_test_suite()
+    parser = argparse.ArgumentParser(description="Unified persistent homology test suite.")
+    parser.add_argument('--batch', metavar='OUTPUT_DIR', help="Run headlessly in a process pool and write results to OUTPUT_DIR.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes in batch mode.")
+    parser.add_argument('--cache', metavar='CACHE_DIR', default=None, help="Reuse persistence diagrams stored in CACHE_DIR.")
+    parser.add_argument('--memory-budget', metavar='SIZE', default=None, help="Estimate each complex first and shrink it to fit SIZE (e.g. 4G).")
+    parser.add_argument('--profile', metavar='LOG', default=None, help="Append a JSON-lines timing/memory record for each run to LOG.")
+    parser.add_argument('--landmarks', type=int, default=None, help="Build each complex on this many maxmin landmarks instead of every point.")
+    args = parser.parse_args()
+    if args.cache:
+        os.environ[CACHE_DIR_ENV] = args.cache  # Inherited by batch worker processes
+    if args.memory_budget:
+        os.environ[MEMORY_BUDGET_ENV] = args.memory_budget
+    if args.profile:
+        os.environ[PROFILE_LOG_ENV] = args.profile  # Each batch worker appends its own record
+
+    if args.batch:
+        run_unified_test_suite_batch(args.batch, max_workers=args.workers, num_landmarks=args.landmarks)
+    else:
+        run_unified_test_suite(num_landmarks=args.landmarks)
@@ -1,58 +1,115 @@
 import numpy as np
 import yfinance as yf
-from ripser import ripser
 from scipy.spatial.distance import pdist, squareform
-from itertools import combinations
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.neighbors import NearestNeighbors
-from scipy.linalg import svd
 from collections import defaultdict
 from scipy.optimize import linear_sum_assignment
 from scipy.signal import find_peaks
 from matplotlib import pyplot as plt
 import seaborn as sns
 import logging
+import os
+import sys
+
+# Make the shared helpers in results/common importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.boundary import betti_numbers, boundary_matrix, simplex_keys
+from common.budgeted import describe_budgeted
+from common.cache import default_cache, ripser_persistence
+from common.complexes import rips_cliques
+from common.embedding import delay_embedding
+from common.landmarks import describe_landmarks
+from common.prices import PRICE_STORE_ENV, PriceStore
+from common.profiling import RunProfile, record, timed
+from common.simplex_index import SimplexIndex, encode_simplices
+from common.simplicial import NON_SMOOTH, SINGULAR, SMOOTH, TRANSITION, CompactComplex
 
 # Set up logging for detailed debug information
 logging.basicConfig(filename='persistent_homology.log', level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # --------------------- STOCK DATA LOADING AND PREPROCESSING --------------------- #
 
-# Enhanced stock data loader with robust error handling and missing data checks
-def load_stock_data(symbols, start, end):
-    """Load stock data from Yahoo Finance for a list of symbols."""
-    data = {}
+# Default location of the local price store (overridden by $PH_PRICE_STORE)
+DEFAULT_PRICE_STORE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_store')
+
+# Enhanced stock data downloader with robust error handling and missing data checks
+def download_stock_data(symbols, start, end):
+    """Download price tables from Yahoo Finance, one request per symbol; symbols without data are skipped."""
+    frames = {}
     for symbol in symbols:
         try:
             logging.info(f"Fetching data for {symbol}...")
-            stock_data = yf.download(symbol, start=start, end=end)
+            stock_data = yf.download(symbol, start=start, end=end, auto_adjust=False)
             if stock_data.empty:
                 logging.warning(f"Warning: No data found for {symbol}. Skipping this symbol.")
                 continue
-            data[symbol] = stock_data['Adj Close'].values
+            frames[symbol] = stock_data
         except Exception as e:
             logging.error(f"Error fetching data for {symbol}: {e}")
+    return frames
+
+# Function to open the local price store, ingesting (once) any symbols or dates it does not cover yet
+def open_price_store(symbols, start, end, store_dir=None):
+    """
+    Return the PriceStore in `store_dir` ($PH_PRICE_STORE, default price_store/ next to this script).
+
+    Symbols missing from the store, or stored for a narrower date range, are
+    downloaded and ingested, so repeated runs of an analysis need no network.
+    """
+    store_dir = store_dir or os.environ.get(PRICE_STORE_ENV) or DEFAULT_PRICE_STORE
+    store = PriceStore(store_dir) if PriceStore.exists(store_dir) else None
+    missing = list(symbols) if store is None else store.missing(symbols, start, end)
+    if missing:
+        frames = download_stock_data(missing, start, end)
+        if frames:
+            store = PriceStore.ingest(store_dir, frames, start=start, end=end)
+    return store
+
+# Stock data loader reading the local columnar price store
+@timed('load')
+def load_stock_data(symbols, start, end, store_dir=None):
+    """Load adjusted closes for a list of symbols as a dict of arrays (see `open_price_store`)."""
+    store = open_price_store(symbols, start, end, store_dir)
+    data = {}
+    for symbol in symbols:
+        if store is None or symbol not in store.symbols:
+            continue
+        prices = store.series(symbol, start, end)
+        if len(prices) == 0:
+            logging.warning(f"Warning: No data found for {symbol}. Skipping this symbol.")
+            continue
+        data[symbol] = prices
     return data
 
-# Function for time-delay embedding with dimension adjustments based on data length
-def time_delay_embedding(data, delay, embedding_dimension):
-    """Convert time series to a high-dimensional point cloud using time-delay embedding."""
-    logging.info(f"Performing time-delay embedding with dimension {embedding_dimension} and delay {delay}...")
+# Bulk loader returning every symbol aligned on common dates
+@timed('load')
+def load_price_matrix(symbols, start, end, store_dir=None, dropna='any'):
+    """
+    Load an aligned (dates x symbols) matrix of adjusted closes in one read of the price store.
 
-    # Perform time-delay embedding
-    embedded_data = np.array([data[i:i + embedding_dimension] for i in range(len(data) - embedding_dimension)])
+    Returns:
+        tuple: (dates, symbols, prices); symbols without data are left out.
+    """
+    store = open_price_store(symbols, start, end, store_dir)
+    if store is None:
+        return np.array([], dtype='datetime64[D]'), [], np.empty((0, 0))
+    return store.matrix([symbol for symbol in symbols if symbol in store.symbols], start, end, dropna=dropna)
 
-    # Adjust embedding dimension if necessary
+# Function for time-delay embedding as a zero-copy view of the price series
+@timed('embed')
+def time_delay_embedding(data, delay, embedding_dimension):
+    """Convert time series to a high-dimensional point cloud using time-delay embedding (read-only view)."""
+    logging.info(f"Performing time-delay embedding with dimension {embedding_dimension} and delay {delay}...")
+    embedded_data = delay_embedding(data, embedding_dimension, delay)
     if len(embedded_data) < 20:
-        logging.warning(f"Embedded data has fewer than 20 points. Adjusting embedding dimension.")
-        embedding_dimension += 2
-        embedded_data = np.array([data[i:i + embedding_dimension] for i in range(len(data) - embedding_dimension)])
-
+        logging.warning(f"Embedded data has only {len(embedded_data)} points.")
     return embedded_data
 
 # Function to normalize and scale the time-delay embedded data
+@timed('embed')
 def normalize_time_series(embedded_data):
-    """Normalize the time series data to be used in topological computations."""
+    """Normalize the time series data to be used in topological computations (the embedding's only copy)."""
     scaler = MinMaxScaler()
     normalized_data = scaler.fit_transform(embedded_data)
     logging.info(f"Normalized the embedded time series data with MinMax scaling.")
@@ -73,77 +130,93 @@ def plot_stock_data(stock_data):
 
 # --------------------- INTERSECTION HOMOLOGY AND SINGULAR STRATA --------------------- #
 
-# Compute the boundary map for a given simplicial complex and dimension with enhanced validation
-def compute_boundary_map(simplices, dimension):
-    """Compute the boundary map for simplices of a given dimension with thorough validation."""
-    boundary_map = []
-    if len(simplices) == 0:
-        logging.warning(f"Empty simplices list for dimension {dimension}. Returning empty boundary map.")
-        return boundary_map
-
-    for simplex in simplices:
-        if len(simplex) == dimension + 1:
-            boundary = [simplex[:i] + simplex[i + 1:] for i in range(len(simplex))]
-            boundary_map.append(boundary)
-        else:
-            logging.debug(f"Skipping simplex of incorrect size: {simplex}")
+# Function to accept a complex as a CompactComplex, per-dimension vertex arrays or a list of simplices
+def as_complex(simplicial_complex, region=SMOOTH):
+    """Return `simplicial_complex` as a CompactComplex (vertex lists or (vertex list, value) pairs are converted once)."""
+    if isinstance(simplicial_complex, CompactComplex):
+        return simplicial_complex
+    if all(isinstance(simplices, np.ndarray) and simplices.ndim == 2 for simplices in simplicial_complex):
+        return CompactComplex(simplicial_complex, regions=region)
+    return CompactComplex.from_simplex_list(simplicial_complex, region)
+
+# Compute the sparse boundary matrix of a simplicial complex with validation
+@timed('homology')
+def compute_boundary_map(simplices, values=None):
+    """
+    Compute the Z/2 boundary matrix of a complex (any form accepted by `as_complex`).
 
-    logging.info(f"Computed boundary map for dimension {dimension} with {len(boundary_map)} simplices.")
+    Columns hold the filtration positions of each simplex's faces (CSC form, see
+    `common.boundary.boundary_matrix`); `values` optionally gives per-dimension
+    filtration values, otherwise simplices are ordered by dimension.
+    """
+    simplices = as_complex(simplices).simplices
+    if sum(len(dimension_simplices) for dimension_simplices in simplices) == 0:
+        logging.warning("Empty simplicial complex. Returning empty boundary map.")
+    boundary_map = boundary_matrix(simplices, values)
+    logging.info(f"Computed boundary map with {len(boundary_map.dimensions)} columns and {len(boundary_map.indices)} "
+                 f"nonzero entries.")
     return boundary_map
 
-# Solve homology for a given boundary map using SVD decomposition and validation
-def solve_homology(boundary_map):
-    """Compute homology by calculating the kernel and image of the boundary map with enhanced SVD handling."""
-    if len(boundary_map) == 0:
-        logging.warning("Empty boundary map detected, returning zero homology.")
-        return 0
-
-    try:
-        matrix = np.array(boundary_map, dtype=np.float32)
-        if matrix.size == 0:
-            logging.warning("Boundary map matrix has invalid dimensions, returning zero homology.")
-            return 0
-
-        u, s, vh = svd(matrix, full_matrices=False)
-        null_mask = (s <= 1e-10)
-        kernel = vh[null_mask]
-
-        image = np.dot(matrix, np.eye(matrix.shape[1])) if matrix.shape[1] > 0 else np.array([])
-        homology = max(0, len(kernel) - image.shape[0] if image.size > 0 else len(kernel))
-        logging.info(f"Homology computed with kernel size {len(kernel)} and image size {image.shape[0]}")
+# Solve homology by reducing the boundary matrix over Z/2
+@timed('homology')
+def solve_homology(boundary_map, cohomology=True, max_dimension=None):
+    """
+    Compute the Betti numbers of the complex by column reduction of its boundary matrix.
 
-    except Exception as e:
-        logging.error(f"Error in SVD computation: {e}")
-        return 0
+    betti_k = #k-simplices - rank(boundary_k) - rank(boundary_k+1), with the ranks
+    read off the reduced matrix (see `common.boundary.reduce_boundary`); the
+    cohomology reduction is the faster one on Rips complexes.
 
-    return homology
+    Returns:
+        list: Betti numbers of dimensions 0 up to `max_dimension`, by default one
+        below the top dimension of the complex (its top dimension is a truncated
+        skeleton's, see `common.boundary.betti_numbers`).
+    """
+    betti = betti_numbers(boundary_map, cohomology, max_dimension)
+    logging.info(f"Homology computed with Betti numbers {betti}")
+    return betti
 
 # Function to compute allowable chains for intersection homology with advanced perversity checks
-def compute_allowable_chains(boundary_map, strata, perversity):
-    """Compute allowable chains in intersection homology based on strata and perversity."""
+def compute_allowable_chains(simplicial_complex, strata, perversity):
+    """
+    Compute the subcomplex of allowable simplices for intersection homology.
+
+    A simplex is allowable when at most `perversity` of its faces meet the
+    singular strata (a set of vertices) and all of its faces are allowable,
+    so the result is again a complex (a CompactComplex keeping values and regions).
+    """
     logging.info(f"Computing allowable chains with perversity {perversity}...")
-    allowable_chains = []
-    for chain in boundary_map:
-        if satisfies_perversity(chain, strata, perversity):
-            allowable_chains.append(chain)
-    logging.info(f"Computed {len(allowable_chains)} allowable chains out of {len(boundary_map)} total chains.")
-    return allowable_chains
-
-# Function to check if chain satisfies the perversity conditions for intersection homology
-def satisfies_perversity(chain, strata, perversity):
-    """Check if the chain satisfies intersection homology conditions based on perversity."""
-    singular_intersections = count_singular_intersections(chain, strata)
+    simplicial_complex = as_complex(simplicial_complex)
+    num_vertices = simplicial_complex.num_vertices
+    masks = []
+    for k, simplices in enumerate(simplicial_complex.simplices):
+        keep = satisfies_perversity(simplices, strata, perversity)
+        if k > 0:
+            kept_keys = simplex_keys(simplicial_complex.simplices[k - 1][masks[k - 1]], num_vertices)
+            for dropped in range(k + 1):
+                faces = np.delete(simplices, dropped, axis=1)
+                keep &= np.isin(simplex_keys(faces, num_vertices), kept_keys)
+        masks.append(keep)
+    allowable = simplicial_complex.select(masks)
+    logging.info(f"Computed {len(allowable)} allowable simplices out of {len(simplicial_complex)} total simplices.")
+    return allowable
+
+# Function to check which simplices satisfy the perversity conditions for intersection homology
+def satisfies_perversity(simplices, strata, perversity):
+    """Boolean mask of the simplices (rows of a vertex array) satisfying the perversity bound."""
+    singular_intersections = count_singular_intersections(simplices, strata)
     return singular_intersections <= perversity
 
-# Function to count intersections of chain with singular strata
-def count_singular_intersections(chain, strata):
-    """Count how many times a chain intersects singular strata."""
-    intersections = 0
-    for simplex in chain:
-        if any(vertex in strata for vertex in simplex):
-            intersections += 1
-    logging.debug(f"Chain intersects singular strata {intersections} times.")
-    return intersections
+# Function to count intersections of each simplex's boundary with singular strata
+def count_singular_intersections(simplices, strata):
+    """Count, for each simplex (row), how many of its faces contain a vertex of the singular strata."""
+    simplices = np.asarray(simplices)
+    if simplices.shape[1] < 2:
+        return np.zeros(len(simplices), dtype=np.int64)
+    singular = np.isin(simplices, np.asarray(list(strata), dtype=np.int64))
+    # The face dropping vertex p meets the strata when another vertex is singular
+    others = singular.sum(axis=1, keepdims=True) - singular
+    return (others > 0).sum(axis=1)
 
 # Adaptive radius selection for Vietoris-Rips complex based on point cloud density
 def adaptive_radius_selection(point_cloud, method='knn', neighbors=5, scale_factor=1.5):
@@ -183,137 +256,163 @@ def adaptive_radius_selection(point_cloud, method='knn', neighbors=5, scale_fact
 
 # Function to compute intersection homology for singular strata with enhanced degree handling
 def compute_intersection_homology(singular_complex, strata, degree, perversity):
-    """Compute intersection homology for singular strata with respect to a given perversity."""
+    """Compute intersection homology (Betti numbers of dimensions below `degree`) of the allowable subcomplex."""
     logging.info(f"Computing intersection homology for singular strata with degree {degree} and perversity {perversity}...")
-    homology_groups = []
-    for dim in range(degree):
-        boundary_map = compute_boundary_map(singular_complex, dim)
-        allowable_chains = compute_allowable_chains(boundary_map, strata, perversity)
-        homology_group = solve_homology(allowable_chains)
-        homology_groups.append(homology_group)
+    allowable = compute_allowable_chains(as_complex(singular_complex).skeleton(degree), strata, perversity)
+    homology_groups = solve_homology(compute_boundary_map(allowable), max_dimension=degree - 1)
     logging.info(f"Intersection homology computed with {len(homology_groups)} groups across {degree} dimensions.")
     return homology_groups
 
 # --------------------- HYBRID FILTRATION SCHEME --------------------- #
 
 # Function to compute Vietoris-Rips filtration for smooth regions with validation
-def vietoris_rips(point_cloud, radius):
-    """Compute Vietoris-Rips complex for a point cloud with detailed logging and validation."""
-    logging.info(f"Building Vietoris-Rips complex with radius: {radius}...")
-    distances = squareform(pdist(point_cloud))
-    simplicial_complex = []
-
-    # Add 0-simplices (vertices)
-    for i in range(len(point_cloud)):
-        simplicial_complex.append([i])
-
-    # Add 1-simplices (edges)
-    for i, j in combinations(range(len(point_cloud)), 2):
-        if distances[i, j] <= radius:
-            simplicial_complex.append([i, j])
+@timed('complex')
+def vietoris_rips(point_cloud, radius, max_dimension=2):
+    """
+    Compute the Vietoris-Rips complex of a point cloud at `radius`.
 
-    # Add 2-simplices (triangles)
-    for i, j, k in combinations(range(len(point_cloud)), 3):
-        if distances[i, j] <= radius and distances[j, k] <= radius and distances[i, k] <= radius:
-            simplicial_complex.append([i, j, k])
+    Edges come from a KD-tree radius query and triangles (and higher cliques up
+    to `max_dimension`) are enumerated among neighbours only, see
+    `common.complexes.flag_cliques`.
 
+    Returns:
+        tuple: (simplicial_complex, success) with a CompactComplex labelled as the smooth region.
+    """
+    logging.info(f"Building Vietoris-Rips complex with radius: {radius}...")
+    simplicial_complex = CompactComplex(rips_cliques(point_cloud, radius, max_dimension), regions=SMOOTH,
+                                        num_vertices=len(point_cloud))
+    simplices_by_dimension = simplicial_complex.num_simplices_by_dimension()
     logging.info(f"Vietoris-Rips complex built with {len(simplicial_complex)} simplices.")
+    record('complex', complex='vietoris_rips', points=len(point_cloud), radius=float(radius),
+           simplices_by_dimension=simplices_by_dimension)
     return simplicial_complex, True
 
 # Discrete Morse function for non-smooth regions with comprehensive simplex handling
 def discrete_morse_function(simplicial_complex):
-    """Assign discrete Morse function values to the simplicial complex with validation."""
+    """Assign discrete Morse function values (each simplex's dimension) to the complex, labelled non-smooth."""
     logging.info(f"Assigning discrete Morse function values to simplices.")
-    critical_simplices = []
+    simplicial_complex = as_complex(simplicial_complex, NON_SMOOTH)
 
     if len(simplicial_complex) == 0:
         logging.warning("No simplices provided for Morse function. Returning empty critical simplices.")
-        return critical_simplices
-
-    for simplex in simplicial_complex:
-        if len(simplex) == 1:
-            critical_simplices.append((simplex, 0))  # 0-simplices (vertices)
-        elif len(simplex) == 2:
-            critical_simplices.append((simplex, 1))  # 1-simplices (edges)
-        elif len(simplex) == 3:
-            critical_simplices.append((simplex, 2))  # 2-simplices (triangles)
 
+    values = [np.full(len(simplices), k, dtype=np.float64) for k, simplices in enumerate(simplicial_complex.simplices)]
+    critical_simplices = simplicial_complex.with_values(values, NON_SMOOTH)
     logging.info(f"Assigned Morse function values to {len(critical_simplices)} simplices.")
     return critical_simplices
 
 # Function to apply curvature-weighted filtration to singular regions based on stock price changes
 def curvature_weighted_filtration(simplicial_complex, stock_data):
-    """Apply curvature-weighted filtration to singular regions with validation."""
-    weighted_simplices = []
+    """
+    Weight every simplex by the change of `stock_data` between its first and last vertex, labelled singular.
+
+    `stock_data` is indexed by vertex: a price series gives |p_last - p_first|, a
+    point cloud the distance between the two points.
+    """
+    simplicial_complex = as_complex(simplicial_complex, SINGULAR)
 
     if len(simplicial_complex) == 0:
         logging.warning("Empty simplicial complex for curvature-weighted filtration.")
-        return weighted_simplices
 
-    for simplex in simplicial_complex:
-        birth = stock_data[simplex[0]]
-        death = stock_data[simplex[-1]]
-        curvature = abs(death - birth)
-        weighted_simplices.append((simplex, curvature))
+    stock_data = np.asarray(stock_data, dtype=np.float64)
+    values = []
+    for simplices in simplicial_complex.simplices:
+        change = stock_data[simplices[:, -1]] - stock_data[simplices[:, 0]]
+        values.append(np.abs(change) if change.ndim == 1 else np.linalg.norm(change, axis=1))
+    weighted_simplices = simplicial_complex.with_values(values, SINGULAR)
 
     logging.info(f"Curvature-weighted filtration applied with {len(weighted_simplices)} simplices.")
     return weighted_simplices
 
 # Function to ensure smooth transition across boundaries between regions in hybrid filtration
 def apply_boundary_transition(smooth_simplices, non_smooth_simplices, singular_simplices):
-    """Smoothly transition across boundaries between regions."""
-    transition_simplices = []
-
-    for simplex in smooth_simplices:
-        if simplex in non_smooth_simplices or simplex in singular_simplices:
-            transition_simplices.append(simplex)
+    """
+    Find the simplices shared by at least two of the smooth, non-smooth and singular regions.
 
-    for simplex in non_smooth_simplices:
-        if simplex in smooth_simplices or simplex in singular_simplices:
-            transition_simplices.append(simplex)
+    Each region may be a CompactComplex, per-dimension vertex arrays or a list of
+    simplices or (simplex, value) pairs. Every region is encoded once as graded
+    integer keys (see `common.simplex_index`); one sort by key, region and
+    value then gives, for every key, the regions holding it and its lowest value,
+    so no simplex is compared with another in Python.
 
-    for simplex in singular_simplices:
-        if simplex in smooth_simplices or simplex in non_smooth_simplices:
-            transition_simplices.append(simplex)
+    Returns:
+        CompactComplex: The transition simplices, each once with its lowest value over the regions.
+    """
+    regions = [as_complex(region) for region in (smooth_simplices, non_smooth_simplices, singular_simplices)]
+    num_vertices = max(region.num_vertices for region in regions)
+    keys = np.concatenate([encode_simplices(region.simplices, num_vertices) for region in regions])
+    values = np.concatenate([value for region in regions for value in region.values] or [np.zeros(0)])
+    labels = np.repeat(np.arange(len(regions)), [len(region) for region in regions])
+
+    # Lowest value of each (key, region) pair, then the keys held by at least two regions
+    order = np.lexsort((values, labels, keys))
+    keys, labels, values = keys[order], labels[order], values[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = (keys[1:] != keys[:-1]) | (labels[1:] != labels[:-1])
+    keys, values = keys[first], values[first]
+    unique_keys, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+    shared = counts >= 2
+    lowest = np.minimum.reduceat(values, starts)[shared] if len(starts) else values
+
+    simplices = SimplexIndex(unique_keys[shared], num_vertices).simplices()
+    split = np.cumsum([len(dimension_simplices) for dimension_simplices in simplices])[:-1]
+    transition_simplices = CompactComplex(simplices, np.split(lowest, split), TRANSITION, num_vertices)
 
     logging.info(f"Found {len(transition_simplices)} transition simplices across boundaries.")
     return transition_simplices
 
 # Main hybrid filtration function combining smooth, non-smooth, and singular regions
 def hybrid_filtration(point_cloud, singular_regions, smooth_regions, non_smooth_regions):
-    """Compute a hybrid filtration for smooth, non-smooth, and singular regions."""
+    """
+    Compute a hybrid filtration for smooth, non-smooth, and singular regions.
+
+    `smooth_regions` is a point cloud, the other two are complexes on the
+    vertices of `point_cloud` (see `as_complex`). The result is one
+    CompactComplex whose region column tells the stages apart; use
+    `to_simplex_tree()` for a gudhi SimplexTree.
+    """
     logging.info("Applying extended hybrid filtration scheme with enhanced transition rules...")
-    hybrid_complex = []
+    parts = []
 
     # Smooth region filtration using Vietoris-Rips
     smooth_simplices, success = vietoris_rips(smooth_regions, adaptive_radius_selection(smooth_regions))
     if success:
-        hybrid_complex.extend(smooth_simplices)
+        parts.append(smooth_simplices)
     else:
         logging.warning("Insufficient simplices in smooth region.")
 
     # Non-smooth region filtration using Discrete Morse theory
     non_smooth_simplices = discrete_morse_function(non_smooth_regions)
-    hybrid_complex.extend(non_smooth_simplices)
+    parts.append(non_smooth_simplices)
 
     # Singular region filtration using curvature-weighted filtration
-    singular_simplices = curvature_weighted_filtration(singular_regions, singular_regions)
-    hybrid_complex.extend(singular_simplices)
+    singular_simplices = curvature_weighted_filtration(singular_regions, point_cloud)
+    parts.append(singular_simplices)
 
     # Apply boundary transition rules between smooth, non-smooth, and singular regions
     logging.info("Ensuring smooth transition between different regions of space...")
     transition_simplices = apply_boundary_transition(smooth_simplices, non_smooth_simplices, singular_simplices)
-    hybrid_complex.extend(transition_simplices)
+    parts.append(transition_simplices)
 
-    return hybrid_complex
+    return CompactComplex.concatenate(parts)
 
 
 # --------------------- PERSISTENCE AND STABILITY MEASURES --------------------- #
 
 # Persistent homology computation using Ripser
-def compute_persistent_homology(point_cloud):
-    """Compute persistent homology using Ripser with enhanced filtration handling."""
-    diagrams = ripser(point_cloud)['dgms']
+def compute_persistent_homology(point_cloud, num_landmarks=None, time_budget=None, memory_budget=None):
+    """
+    Compute persistent homology using Ripser, optionally on `num_landmarks` maxmin landmarks and cached in $PH_CACHE_DIR.
+
+    With a time or memory budget (or $PH_TIME_BUDGET / $PH_MEMORY_BUDGET) the best diagrams
+    that fit are returned and the log records where they were truncated.
+    """
+    diagrams, landmark_report = ripser_persistence(point_cloud, cache=default_cache(), num_landmarks=num_landmarks,
+                                                   time_budget=time_budget, memory_budget=memory_budget)
+    if 'rounds' in landmark_report:
+        logging.info(describe_budgeted(landmark_report))
+    elif num_landmarks is not None:
+        logging.info(describe_landmarks(landmark_report))
     logging.info(f"Computed persistent homology with {len(diagrams)} diagrams across dimensions.")
     return diagrams
 
@@ -372,6 +471,7 @@ def detect_topological_transitions(persistence_diagrams, peak_prominence=0.02):
 # --------------------- FINAL STATISTICAL SUMMARY AND ANALYSIS --------------------- #
 
 # Enhanced statistical summary function
+@timed('statistics')
 def enhanced_statistical_summary(stock_data, persistence_diagrams, topological_transitions, homology_groups, index_names):
     """Produce an enhanced statistical summary of persistent homology and financial metrics."""
     logging.info("Generating enhanced statistical summary for stock data and persistent homology.")
@@ -427,6 +527,9 @@ def enhanced_statistical_summary(stock_data, persistence_diagrams, topological_t
 
 if __name__ == "__main__":
     indices = ["^GSPC", "^DJI", "^NDX", "^RUT", "XLF", "IYR", "BAC", "JPM", "C", "AIG", "GS", "GLD"]
+
+    # Stage timings, memory and simplex counts go to $PH_PROFILE_LOG as one record when it is set
+    run_profile = RunProfile('stock_market_suite', symbols=indices).start()
     stock_data = load_stock_data(indices, "2005-01-01", "2010-12-31")
 
     persistence_diagrams_all = []
@@ -456,11 +559,8 @@ if __name__ == "__main__":
         singular_weighted_simplices = curvature_weighted_filtration(smooth_simplices, data)
 
         # Boundary map and homology group calculation
-        homology_groups = []
-        for dim in range(3):
-            boundary_map = compute_boundary_map(smooth_simplices, dim)
-            homology_group = solve_homology(boundary_map)
-            homology_groups.append(homology_group)
+        boundary_map = compute_boundary_map(smooth_simplices)
+        homology_groups = solve_homology(boundary_map)
 
         homology_groups_all.append(homology_groups)
 
@@ -477,3 +577,5 @@ if __name__ == "__main__":
 
     # Final statistical summary
     enhanced_statistical_summary(stock_data, persistence_diagrams_all, topological_transitions_all, homology_groups_all, indices)
+
+    run_profile.finish()
@@ -0,0 +1 @@
+"""Shared building blocks for the persistent homology test suites."""
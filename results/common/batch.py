@@ -0,0 +1,119 @@
+import contextlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from common.diagrams import PersistenceDiagram
+from common.profiling import RunProfile
+
+# Switch every worker to the off-screen Agg backend so plt.show() never blocks
+def _init_headless_worker():
+    plt.switch_backend('Agg')
+
+# Context manager that turns plt.show() into "save the current figure and close it"
+@contextlib.contextmanager
+def capture_figures(output_dir, prefix):
+    """Save every figure a test would have shown to `output_dir` as `<prefix>_figure<k>.png`."""
+    saved = []
+    original_show = plt.show
+
+    def save_and_close(*args, **kwargs):
+        path = os.path.join(output_dir, f"{prefix}_figure{len(saved)}.png")
+        plt.savefig(path)
+        plt.close('all')
+        saved.append(path)
+
+    plt.show = save_and_close
+    try:
+        yield saved
+    finally:
+        plt.show = original_show
+
+# Write a test's return value to disk: arrays as .npy, tables as .csv (plus a summary for diagram tables)
+def _save_result(result, output_dir, name):
+    if isinstance(result, (tuple, list)):
+        paths = []
+        for i, item in enumerate(result):
+            paths.extend(_save_result(item, output_dir, f"{name}_{i}"))
+        return paths
+    if isinstance(result, np.ndarray):
+        path = os.path.join(output_dir, f"{name}.npy")
+        np.save(path, result)
+        return [path]
+    if isinstance(result, pd.DataFrame):
+        path = os.path.join(output_dir, f"{name}.csv")
+        result.to_csv(path, index=False)
+        paths = [path]
+        if {'Dimension', 'Birth', 'Death'} <= set(result.columns):
+            summary_path = os.path.join(output_dir, f"{name}_summary.csv")
+            PersistenceDiagram.from_dataframe(result).summary().to_csv(summary_path)
+            paths.append(summary_path)
+        return paths
+    return []
+
+# Run one test inside a worker, capturing its printed output, figures, wall time and stage profile
+def _run_task(name, func, kwargs, output_dir):
+    record = {'name': name, 'error': None}
+    result = None
+    start = time.perf_counter()
+    with open(os.path.join(output_dir, f"{name}.log"), 'w') as log, contextlib.redirect_stdout(log), \
+            capture_figures(output_dir, name) as figures, RunProfile(name) as profile:
+        try:
+            result = func(**kwargs)
+        except Exception as e:
+            record['error'] = repr(e)
+    record['wall_time'] = time.perf_counter() - start
+    record['profile'] = profile.to_record()
+    record['figures'] = figures
+    record['outputs'] = _save_result(result, output_dir, name)
+    return record, result
+
+# Execute independent tests in a process pool and write their artifacts to an output directory
+def run_batch(tasks, output_dir, max_workers=None):
+    """
+    Run independent suite tests headlessly in parallel.
+
+    Args:
+        tasks: Mapping of test name to (function, keyword arguments).
+        output_dir: Directory receiving logs, diagrams, summaries, figures and `report.json`
+            (which includes each test's stage profile; with $PH_PROFILE_LOG set every
+            test also appends its record there).
+        max_workers: Size of the process pool (defaults to one worker per test, capped by CPU count).
+
+    Returns:
+        tuple: (results, report) where results maps test name to the test's return
+        value (None if it failed) and report holds the per-test records and wall times.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if max_workers is None:
+        max_workers = min(len(tasks), os.cpu_count() or 1)
+
+    results = {}
+    records = {}
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_headless_worker) as pool:
+        futures = {pool.submit(_run_task, name, func, kwargs, output_dir): name for name, (func, kwargs) in tasks.items()}
+        for future in as_completed(futures):
+            try:
+                record, result = future.result()
+            except Exception as e:
+                # A worker killed from outside (e.g. by the OOM killer) breaks the pool for every pending test
+                record = {'name': futures[future], 'error': repr(e), 'wall_time': time.perf_counter() - start,
+                          'figures': [], 'outputs': [], 'profile': None}
+                result = None
+            results[record['name']] = result
+            records[record['name']] = record
+            status = f"failed: {record['error']}" if record['error'] else "done"
+            print(f"[batch] {record['name']} {status} in {record['wall_time']:.2f} seconds")
+
+    report = {'total_wall_time': time.perf_counter() - start, 'max_workers': max_workers,
+              'tests': [records[name] for name in tasks]}
+    with open(os.path.join(output_dir, 'report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"[batch] All {len(tasks)} tests finished in {report['total_wall_time']:.2f} seconds")
+    return results, report
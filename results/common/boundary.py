@@ -0,0 +1,259 @@
+from collections import namedtuple
+from math import comb
+
+import numpy as np
+
+# Sparse Z/2 boundary matrix of a filtered complex in CSC form; columns and rows are filtration positions
+BoundaryMatrix = namedtuple('BoundaryMatrix', ['indptr', 'indices', 'dimensions', 'rows', 'values'])
+
+
+# Function to tabulate the binomial coefficients behind the simplex keys
+def binomial_table(num_vertices, max_size):
+    """
+    Table of C(v, j) for v < num_vertices and j <= max_size, as an int64 array indexed [j, v].
+
+    Raises:
+        OverflowError: If C(num_vertices, j) does not fit in an int64 for some j <= max_size.
+    """
+    if max(comb(num_vertices, j) for j in range(max_size + 1)) >= 2 ** 63:
+        raise OverflowError(f"Keys of {max_size}-vertex simplices on {num_vertices} vertices do not fit in int64.")
+    table = np.zeros((max_size + 1, max(num_vertices, 1)), dtype=np.int64)
+    table[0] = 1
+    for j in range(1, max_size + 1):
+        # C(v, j) = sum of C(u, j - 1) over u < v
+        np.cumsum(table[j - 1][:-1], out=table[j][1:])
+    return table
+
+# Number of simplices with fewer than `size` vertices, the first graded key of `size`-vertex simplices
+def graded_offset(num_vertices, size):
+    return sum(comb(num_vertices, j) for j in range(size))
+
+# Function to encode simplices as single integers
+def simplex_keys(simplices, num_vertices, graded=False):
+    """
+    Encode each row of sorted vertices (v0 < ... < vk) as sum_i C(v_i, i + 1).
+
+    This is the combinatorial number system: a bijection between the (k+1)-subsets
+    of range(num_vertices) and range(C(num_vertices, k + 1)), so equal keys mean
+    equal simplices of the same dimension. With `graded`, the number of all
+    smaller subsets (`graded_offset`) is added, so keys of different dimensions
+    never collide and sort by dimension first.
+
+    Raises:
+        OverflowError: If the keys of this dimension do not fit in an int64.
+    """
+    simplices = np.asarray(simplices, dtype=np.int64)
+    if simplices.ndim == 1:
+        simplices = simplices[:, None]
+    size = simplices.shape[1]
+    offset = graded_offset(num_vertices, size) if graded else 0
+    if offset + comb(num_vertices, size) >= 2 ** 63:
+        raise OverflowError(f"Graded keys of {size}-vertex simplices on {num_vertices} vertices do not fit in int64.")
+    table = binomial_table(num_vertices, size)
+    return table[np.arange(1, size + 1), simplices].sum(axis=1) + offset
+
+# Keys of the faces of every simplex, face p dropping vertex p
+def _face_keys(simplices, table):
+    size = simplices.shape[1]
+    # Vertices before the dropped one keep their position, the ones after move down by one
+    same = table[np.arange(1, size + 1), simplices]
+    shifted = table[np.arange(0, size), simplices]
+    before = np.cumsum(same, axis=1) - same
+    after = np.cumsum(shifted[:, ::-1], axis=1)[:, ::-1] - shifted
+    return before + after
+
+# Function to build the filtered boundary matrix of a simplicial complex
+def boundary_matrix(simplices, values=None, num_vertices=None):
+    """
+    Build the Z/2 boundary matrix of a complex given as per-dimension vertex arrays.
+
+    Simplices are put in filtration order: by value, then dimension, then their
+    row in `simplices[k]` (without values, by dimension only). Column j lists
+    the positions of the faces of the j-th simplex, sorted; the faces of every
+    dimension are located at once through `simplex_keys`.
+
+    Args:
+        simplices: List whose k-th entry is an integer array of shape (count, k + 1)
+            with sorted vertices, closed under taking faces (e.g. from
+            `common.complexes.flag_cliques`).
+        values: Optional list of filtration values per dimension; a face must not
+            enter after its cofaces.
+        num_vertices: Vertex count for the keys (defaults to len(simplices[0])).
+
+    Returns:
+        BoundaryMatrix: indptr/indices in CSC form, and for every position the
+        dimension, the row in `simplices[dimension]` and the filtration value.
+
+    Raises:
+        ValueError: If a simplex has a missing face or enters before one of its faces.
+    """
+    simplices = [np.asarray(s, dtype=np.int64).reshape(len(s), k + 1) for k, s in enumerate(simplices)]
+    if num_vertices is None:
+        num_vertices = len(simplices[0]) if simplices else 0
+    counts = np.array([len(s) for s in simplices], dtype=np.int64)
+    total = int(counts.sum())
+    index_dtype = np.int32 if total < 2 ** 31 else np.int64
+
+    dimensions = np.repeat(np.arange(len(simplices)), counts)
+    rows = np.concatenate([np.arange(count) for count in counts]) if total else np.zeros(0, dtype=np.int64)
+    if values is None:
+        order = np.arange(total)
+        filtration = np.zeros(total)
+    else:
+        filtration = np.concatenate([np.asarray(v, dtype=np.float64).reshape(-1) for v in values])
+        order = np.lexsort((dimensions, filtration))
+        filtration = filtration[order]
+    dimensions, rows = dimensions[order], rows[order]
+    # Position of every simplex, per dimension and row
+    position = np.empty(total, dtype=np.int64)
+    position[order] = np.arange(total)
+    firsts = np.concatenate(([0], np.cumsum(counts)))
+
+    table = binomial_table(num_vertices, len(simplices)) if len(simplices) > 1 else None
+    faces_by_dimension = [np.zeros((counts[0], 0), dtype=np.int64)] if len(simplices) else []
+    for k in range(1, len(simplices)):
+        sorted_keys = table[np.arange(1, k + 1), simplices[k - 1]].sum(axis=1)
+        key_order = np.argsort(sorted_keys)
+        sorted_keys = sorted_keys[key_order]
+        face_keys = _face_keys(simplices[k], table)
+        found = np.minimum(np.searchsorted(sorted_keys, face_keys), max(len(sorted_keys) - 1, 0))
+        if len(face_keys) and (len(sorted_keys) == 0 or not (sorted_keys[found] == face_keys).all()):
+            raise ValueError(f"Some {k}-simplices have faces missing from the complex.")
+        faces = position[firsts[k - 1] + key_order[found]] if len(face_keys) else np.zeros((0, k + 1), dtype=np.int64)
+        faces_by_dimension.append(np.sort(faces, axis=1))
+
+    sizes = dimensions + 1
+    sizes[dimensions == 0] = 0
+    indptr = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+    indices = np.empty(int(indptr[-1]), dtype=index_dtype)
+    for k in range(1, len(simplices)):
+        columns = position[firsts[k]:firsts[k + 1]]
+        targets = indptr[columns][:, None] + np.arange(k + 1)
+        indices[targets.reshape(-1)] = faces_by_dimension[k].reshape(-1)
+        if len(columns) and (faces_by_dimension[k][:, -1] >= columns).any():
+            raise ValueError(f"Some {k}-simplices enter the filtration before one of their faces.")
+    return BoundaryMatrix(indptr, indices, dimensions, rows, filtration)
+
+# Anti-transpose of a boundary matrix: the coboundary matrix with the filtration order reversed
+def _anti_transpose(matrix):
+    total = len(matrix.dimensions)
+    columns = np.repeat(np.arange(total), np.diff(matrix.indptr))
+    new_columns, new_rows = total - 1 - matrix.indices.astype(np.int64), total - 1 - columns
+    order = np.lexsort((new_rows, new_columns))
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(new_columns, minlength=total)))).astype(np.int64)
+    return indptr, new_rows[order].astype(matrix.indices.dtype)
+
+# Column reduction over Z/2 with clearing, columns visited one dimension at a time
+def _reduce(indptr, indices, column_groups):
+    """
+    Reduce columns left to right within each group, adding earlier columns with the same pivot.
+
+    Groups are visited in order; a column whose pivot is row i makes column i
+    cleared (it would reduce to zero), so groups must run from the dimension
+    whose pivots fall in the next group. Only columns that were changed are
+    kept in memory; the others are read from the CSC arrays.
+
+    Returns:
+        np.ndarray: pivots[i] = the column whose reduced pivot is row i, or -1.
+    """
+    total = len(indptr) - 1
+    pivots = np.full(total, -1, dtype=np.int64)
+    cleared = np.zeros(total, dtype=bool)
+    reduced = {}
+    for group in column_groups:
+        for j in group.tolist():
+            if cleared[j]:
+                continue
+            column = indices[indptr[j]:indptr[j + 1]]
+            if len(column) == 0:
+                continue
+            owner = pivots[column[-1]]
+            changed = False
+            while owner >= 0:
+                other = reduced.get(owner)
+                if other is None:
+                    other = indices[indptr[owner]:indptr[owner + 1]]
+                column = np.setxor1d(column, other, assume_unique=True)
+                changed = True
+                if len(column) == 0:
+                    break
+                owner = pivots[column[-1]]
+            if len(column):
+                low = column[-1]
+                pivots[low] = j
+                cleared[low] = True
+                if changed:
+                    reduced[j] = column
+    return pivots
+
+# Function to pair the simplices of a filtered complex by boundary-matrix reduction
+def reduce_boundary(matrix, cohomology=False):
+    """
+    Persistence pairs of a filtered complex over Z/2.
+
+    Homology reduces the boundary columns from the highest dimension down, and
+    a column with pivot i clears column i (the twist/clearing optimization).
+    With `cohomology`, the anti-transposed coboundary matrix is reduced from the
+    lowest dimension up instead, which gives the same pairs and is usually
+    faster on Rips complexes, whose coboundary columns need fewer additions.
+
+    Returns:
+        tuple: (pairs, essential) where pairs is an (m, 2) array of (birth, death)
+        positions in the filtration and essential holds the positions of the
+        simplices creating classes that never die.
+    """
+    total = len(matrix.dimensions)
+    max_dimension = int(matrix.dimensions.max()) if total else -1
+    positions = np.arange(total)
+    if cohomology:
+        indptr, indices = _anti_transpose(matrix)
+        reversed_dimensions = matrix.dimensions[::-1]
+        groups = [positions[reversed_dimensions == k] for k in range(max_dimension + 1)]
+        pivots = _reduce(indptr, indices, groups)
+        rows = np.flatnonzero(pivots >= 0)
+        pairs = np.column_stack([total - 1 - pivots[rows], total - 1 - rows])
+    else:
+        groups = [positions[matrix.dimensions == k] for k in range(max_dimension, 0, -1)]
+        pivots = _reduce(matrix.indptr, matrix.indices, groups)
+        rows = np.flatnonzero(pivots >= 0)
+        pairs = np.column_stack([rows, pivots[rows]])
+    pairs = pairs[np.argsort(pairs[:, 1], kind='stable')].astype(np.int64).reshape(-1, 2)
+    paired = np.zeros(total, dtype=bool)
+    paired[pairs.reshape(-1)] = True
+    return pairs, np.flatnonzero(~paired)
+
+# Function to compute Betti numbers from the reduced boundary matrix
+def betti_numbers(matrix, cohomology=False, max_dimension=None):
+    """
+    Betti numbers over Z/2 of dimensions 0..max_dimension.
+
+    betti_k = (number of k-simplices) - rank(boundary_k) - rank(boundary_k+1),
+    which is the number of k-simplices left unpaired by the reduction. The
+    count of the top dimension is only a Betti number if the complex really
+    stops there: in a truncated skeleton (e.g. a Rips complex built up to some
+    dimension) the missing higher simplices would bound most of those cycles.
+    `max_dimension` therefore defaults to one below the top dimension; pass the
+    top dimension for a complex that is not truncated.
+    """
+    _, essential = reduce_boundary(matrix, cohomology)
+    if max_dimension is None:
+        max_dimension = (int(matrix.dimensions.max()) if len(matrix.dimensions) else 0) - 1
+    counts = np.bincount(matrix.dimensions[essential], minlength=max_dimension + 1)
+    return counts[:max_dimension + 1].tolist()
+
+# Function to compute persistence diagrams from the reduced boundary matrix
+def persistence_pairs(matrix, cohomology=False, min_persistence=0.0):
+    """
+    Persistence diagrams of a filtered complex, one (n, 2) birth/death array per dimension.
+
+    Intervals no longer than `min_persistence` are dropped (zero-length ones by
+    default, as gudhi does); classes that never die have death = inf.
+    """
+    pairs, essential = reduce_boundary(matrix, cohomology)
+    max_dimension = int(matrix.dimensions.max()) if len(matrix.dimensions) else -1
+    births = np.concatenate([matrix.values[pairs[:, 0]], matrix.values[essential]])
+    deaths = np.concatenate([matrix.values[pairs[:, 1]], np.full(len(essential), np.inf)])
+    dimensions = matrix.dimensions[np.concatenate([pairs[:, 0], essential])]
+    keep = deaths - births > min_persistence
+    return [np.column_stack([births[keep & (dimensions == k)], deaths[keep & (dimensions == k)]])
+            for k in range(max_dimension + 1)]
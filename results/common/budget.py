@@ -0,0 +1,201 @@
+import itertools
+import os
+from math import comb
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Environment variable holding the memory budget of complex construction (e.g. "4G"); unset means no budget
+MEMORY_BUDGET_ENV = 'PH_MEMORY_BUDGET'
+
+# Peak bytes per simplex of a gudhi SimplexTree plus its persistence computation (measured ~40 + ~30, rounded up)
+BYTES_PER_SIMPLEX = 96
+
+# Multipliers of the size suffixes accepted by `parse_memory_size`
+_SIZE_SUFFIXES = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}
+
+
+# Function to parse a memory size such as "512M", "4G" or a plain byte count
+def parse_memory_size(value):
+    """Convert a byte count or a string with a K/M/G/T suffix into bytes."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = value.strip().upper().rstrip('B')
+    if text and text[-1] in _SIZE_SUFFIXES:
+        return int(float(text[:-1]) * _SIZE_SUFFIXES[text[-1]])
+    return int(float(text))
+
+# Function to get the memory budget configured through the environment
+def default_memory_budget():
+    """Return the budget in bytes from $PH_MEMORY_BUDGET, or None when no budget is set."""
+    value = os.environ.get(MEMORY_BUDGET_ENV)
+    return parse_memory_size(value) if value else None
+
+# Function to list the edges of a Rips neighbourhood graph with their lengths
+def neighbourhood_edges(points, max_edge_length):
+    """Return (edges, lengths) for every pair of points at distance <= max_edge_length, edges as sorted (i, j) rows with i < j."""
+    points = np.asarray(points, dtype=np.float64)
+    edges = cKDTree(points).query_pairs(max_edge_length, output_type='ndarray').astype(np.int64)
+    lengths = np.linalg.norm(points[edges[:, 0]] - points[edges[:, 1]], axis=1)
+    return edges, lengths
+
+# Function to estimate the number of simplices of every dimension of a flag complex
+def estimate_clique_counts(num_vertices, edges, max_dimension, sample_vertices=256, samples_per_vertex=256, seed=0):
+    """
+    Estimate the simplex counts of the flag complex of a graph, dimension by dimension.
+
+    Every k-simplex is counted once at its lowest vertex v, as a k-subset of the
+    forward neighbourhood N+(v) (neighbours with a larger index) that is a clique.
+    For a sample of vertices, the number of such cliques is counted exactly when
+    C(|N+(v)|, k) is small and otherwise estimated as C(|N+(v)|, k) times the
+    fraction of random k-subsets that are cliques; the vertex sample is then
+    scaled up to the whole graph. Vertex and edge counts are exact.
+
+    Args:
+        num_vertices: Number of vertices.
+        edges: Integer array of shape (m, 2) with i < j in every row.
+        max_dimension: Highest simplex dimension to estimate.
+        sample_vertices: Number of vertices whose neighbourhoods are examined.
+        samples_per_vertex: Random k-subsets drawn per vertex and dimension.
+        seed: Seed of the sampling, fixed by default so repeated estimates agree.
+
+    Returns:
+        np.ndarray: Estimated number of simplices of dimension 0..max_dimension.
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    counts = np.zeros(max_dimension + 1)
+    counts[0] = num_vertices
+    if max_dimension >= 1:
+        counts[1] = len(edges)
+    if max_dimension < 2 or len(edges) == 0:
+        return counts
+
+    rng = np.random.default_rng(seed)
+    order = np.argsort(edges[:, 0], kind='stable')
+    heads, tails = edges[order, 0], edges[order, 1]
+    starts = np.searchsorted(heads, np.arange(num_vertices + 1))
+    keys = np.sort(edges[:, 0] * num_vertices + edges[:, 1])
+
+    if num_vertices <= sample_vertices:
+        sampled = np.arange(num_vertices)
+    else:
+        sampled = rng.choice(num_vertices, sample_vertices, replace=False)
+    scale = num_vertices / len(sampled)
+
+    for v in sampled:
+        forward = np.sort(tails[starts[v]:starts[v + 1]])
+        degree = len(forward)
+        for k in range(2, min(max_dimension, degree) + 1):
+            total = comb(degree, k)
+            if total <= samples_per_vertex:
+                subsets = np.array(list(itertools.combinations(range(degree), k)))
+            else:
+                subsets = np.sort(np.argpartition(rng.random((samples_per_vertex, degree)), k, axis=1)[:, :k], axis=1)
+            members = forward[subsets]
+            first, second = np.triu_indices(k, 1)
+            pair_keys = members[:, first] * num_vertices + members[:, second]
+            positions = np.minimum(np.searchsorted(keys, pair_keys), len(keys) - 1)
+            cliques = (keys[positions] == pair_keys).all(axis=1)
+            counts[k] += scale * total * cliques.mean()
+    return counts
+
+# Function to predict the size of a Rips complex before building it
+def estimate_complex_size(points, max_edge_length, max_dimension, **sampling):
+    """
+    Predict simplex counts and memory of the Rips complex on `points` without building it.
+
+    Returns:
+        dict: Estimated simplices per dimension, their total and the predicted peak bytes.
+    """
+    edges, _ = neighbourhood_edges(points, max_edge_length)
+    counts = estimate_clique_counts(len(points), edges, max_dimension, **sampling)
+    return _size_report(counts)
+
+def _size_report(counts):
+    return {'simplices': [int(round(c)) for c in counts], 'total_simplices': int(round(counts.sum())),
+            'bytes': int(round(counts.sum() * BYTES_PER_SIMPLEX))}
+
+# Function to fit a flag complex into a memory budget
+def plan_flag_complex(num_vertices, edges, lengths, max_edge_length, max_dimension, memory_budget, policy='threshold', **sampling):
+    """
+    Choose a threshold and dimension whose estimated complex fits in `memory_budget`.
+
+    Args:
+        num_vertices, edges, lengths: The neighbourhood graph at `max_edge_length`.
+        max_edge_length, max_dimension: The requested Rips parameters.
+        memory_budget: Budget in bytes.
+        policy: 'refuse' raises MemoryError when the estimate exceeds the budget;
+            'dimension' lowers the dimension first and then the threshold;
+            'threshold' keeps the dimension and lowers the threshold.
+        **sampling: Options of `estimate_clique_counts`.
+
+    Returns:
+        tuple: (max_edge_length, max_dimension, report) with the requested and the
+        chosen parameters, their estimates and whether anything was reduced.
+
+    Raises:
+        MemoryError: If the policy is 'refuse' and the estimate does not fit, or if
+            even the vertices alone exceed the budget.
+    """
+    if policy not in ('refuse', 'dimension', 'threshold'):
+        raise ValueError("Invalid budget policy. Use 'refuse', 'dimension' or 'threshold'.")
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    lengths = np.asarray(lengths, dtype=np.float64)
+
+    def estimate(threshold, dimension):
+        return _size_report(estimate_clique_counts(num_vertices, edges[lengths <= threshold], dimension, **sampling))
+
+    requested = estimate(max_edge_length, max_dimension)
+    report = {'memory_budget': memory_budget, 'policy': policy, 'requested': {
+        'max_edge_length': max_edge_length, 'max_dimension': max_dimension, **requested}}
+    chosen_length, chosen_dimension, chosen = max_edge_length, max_dimension, requested
+
+    if chosen['bytes'] > memory_budget:
+        if policy == 'refuse':
+            raise MemoryError(f"Estimated Rips complex needs {requested['bytes']} bytes "
+                              f"({requested['total_simplices']} simplices), over the budget of {memory_budget} bytes.")
+        if num_vertices * BYTES_PER_SIMPLEX > memory_budget:
+            raise MemoryError(f"The {num_vertices} vertices alone exceed the budget of {memory_budget} bytes.")
+
+        if policy == 'dimension':
+            while chosen_dimension > 1 and chosen['bytes'] > memory_budget:
+                chosen_dimension -= 1
+                chosen = estimate(chosen_length, chosen_dimension)
+
+        if chosen['bytes'] > memory_budget:
+            # Bisect over the sorted edge lengths for the largest threshold that fits
+            candidates = np.unique(lengths[lengths <= max_edge_length])
+            low, high = -1, len(candidates) - 1
+            while low < high:
+                middle = (low + high + 1) // 2
+                if estimate(candidates[middle], chosen_dimension)['bytes'] <= memory_budget:
+                    low = middle
+                else:
+                    high = middle - 1
+            chosen_length = float(candidates[low]) if low >= 0 else 0.0
+            chosen = estimate(chosen_length, chosen_dimension)
+
+    report['chosen'] = {'max_edge_length': chosen_length, 'max_dimension': chosen_dimension, **chosen}
+    report['reduced'] = (chosen_length, chosen_dimension) != (max_edge_length, max_dimension)
+    return chosen_length, chosen_dimension, report
+
+# Function to plan a Rips complex on a point cloud under a memory budget
+def plan_rips(points, max_edge_length, max_dimension, memory_budget, policy='threshold', **sampling):
+    """Run `plan_flag_complex` on the neighbourhood graph of `points`."""
+    edges, lengths = neighbourhood_edges(points, max_edge_length)
+    return plan_flag_complex(len(points), edges, lengths, max_edge_length, max_dimension, memory_budget, policy, **sampling)
+
+# One-line description of a budget report for the suite printouts
+def describe_budget(report):
+    """Format a budget report as a single human-readable line."""
+    requested, chosen = report['requested'], report['chosen']
+    skeleton = report.get('skeleton')
+    original = skeleton['requested']['max_edge_length'] if skeleton else requested['max_edge_length']
+    line = f"Memory budget {report['memory_budget']} bytes: requested edge length {original}, dimension {requested['max_dimension']}"
+    if skeleton and skeleton['reduced']:
+        line += f"; neighbourhood graph cut to edge length {skeleton['chosen']['max_edge_length']:.4f}"
+    line += f" (~{requested['total_simplices']} simplices, ~{requested['bytes']} bytes)"
+    if chosen['max_edge_length'] != requested['max_edge_length'] or chosen['max_dimension'] != requested['max_dimension']:
+        line += (f"; reduced to edge length {chosen['max_edge_length']:.4f}, dimension {chosen['max_dimension']} "
+                 f"(~{chosen['total_simplices']} simplices, ~{chosen['bytes']} bytes)")
+    return line
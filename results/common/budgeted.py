@@ -0,0 +1,205 @@
+import os
+import time
+
+import numpy as np
+from ripser import ripser
+
+from common.landmarks import GreedyPermutation, landmark_report
+
+# Environment variable holding the wall-time budget of one persistence computation in seconds; unset means no budget
+TIME_BUDGET_ENV = 'PH_TIME_BUDGET'
+
+# Peak bytes per point pair of ripser on a dense (unthresholded) cloud, measured at maxdim 1 on 1000-4000 points in 5-D
+RIPSER_DENSE_BYTES_PER_EDGE = 200
+
+# Peak bytes per edge of ripser's sparse (thresholded) mode, on top of 8 bytes per point pair for the distance matrix
+RIPSER_SPARSE_BYTES_PER_EDGE = 800
+
+# Growth of ripser time with the edge count, used until two rounds have been timed
+DEFAULT_TIME_EXPONENT = 1.5
+
+# Share of the remaining time a round may plan to use, leaving room for extrapolation error
+TIME_SAFETY_FACTOR = 0.75
+
+# Random point pairs sampled to estimate how many edges a threshold keeps
+DISTANCE_SAMPLE_SIZE = 100000
+
+
+# Function to get the time budget configured through the environment
+def default_time_budget():
+    """Return the budget in seconds from $PH_TIME_BUDGET, or None when no budget is set."""
+    value = os.environ.get(TIME_BUDGET_ENV)
+    return float(value) if value else None
+
+# Function to predict the peak memory of one ripser call
+def estimate_ripser_bytes(num_points, num_edges, thresholded):
+    """Peak bytes of ripser on `num_points` points with `num_edges` edges below the threshold."""
+    if thresholded:
+        return 8 * num_points ** 2 + RIPSER_SPARSE_BYTES_PER_EDGE * num_edges
+    return RIPSER_DENSE_BYTES_PER_EDGE * num_edges
+
+# Sorted sample of pairwise distances, exact for small clouds
+def _distance_sample(points, rng):
+    num_points = len(points)
+    if num_points * (num_points - 1) // 2 <= DISTANCE_SAMPLE_SIZE:
+        first, second = np.triu_indices(num_points, 1)
+    else:
+        first, second = rng.integers(0, num_points, size=(2, DISTANCE_SAMPLE_SIZE))
+        keep = first != second
+        first, second = first[keep], second[keep]
+    return np.sort(np.linalg.norm(points[first] - points[second], axis=1))
+
+# Largest threshold keeping about `max_edges` of the `total` point pairs
+def _threshold_for_edges(distances, total, max_edges):
+    if max_edges >= total:
+        return np.inf
+    return float(distances[int(len(distances) * max_edges / total)])
+
+# Predicted number of edges below a threshold
+def _edges_below(distances, total, threshold):
+    if not np.isfinite(threshold):
+        return total
+    return int(round(total * np.searchsorted(distances, threshold, side='right') / len(distances)))
+
+# Function to compute the best ripser diagrams that fit a time and/or memory budget
+def budgeted_ripser(points, maxdim=1, time_budget=None, memory_budget=None, policy='subsample', initial_points=128,
+                    growth=2.0, max_points=None, seed=None, **ripser_kwargs):
+    """
+    Run ripser on progressively larger greedy-permutation prefixes until the budget runs out.
+
+    Round k uses the first initial_points * growth**k maxmin landmarks. The greedy
+    permutation is extended only as far as the next round needs, and its
+    selection time counts against the time budget: a round whose selection
+    alone would not fit in the time left is not started. Before each
+    round its peak memory is predicted from the edge count (`estimate_ripser_bytes`,
+    edges estimated from sampled pair distances) and its time is extrapolated
+    from the rounds already timed. A round that does not fit at the full
+    threshold either ends the search ('subsample' policy: keep every edge, cap
+    the points) or runs with the largest threshold that fits ('threshold'
+    policy: keep growing the points, cut the filtration). If the first round
+    leaves no time to grow, the max dimension is lowered (down to 1) and the
+    search restarts. The diagrams of the last completed round are returned.
+
+    Args:
+        points: Point cloud of shape (n, dimension).
+        maxdim: Requested maximum homology dimension.
+        time_budget: Wall-time budget in seconds, or None.
+        memory_budget: Memory budget in bytes, or None.
+        policy: 'subsample' or 'threshold', see above.
+        initial_points: Landmarks in the first round.
+        growth: Factor between the sizes of consecutive rounds.
+        max_points: Largest prefix to try (e.g. a landmark count); None allows every point.
+        seed: Seed of the first landmark and of the distance sampling.
+        **ripser_kwargs: Extra ripser options; a `thresh` caps every round.
+
+    Returns:
+        tuple: (ripser result dict, report) where report holds the landmark fields of
+        `landmark_ripser` (the bottleneck bound applies to features dying below the
+        threshold), the chosen threshold and max dimension, 'truncated', the
+        limiting resource in 'stopped' ('complete', 'time' or 'memory') and one
+        entry per round.
+    """
+    if policy not in ('subsample', 'threshold'):
+        raise ValueError("Invalid budget policy. Use 'subsample' or 'threshold'.")
+    points = np.asarray(points, dtype=np.float64)
+    num_points = len(points)
+    requested_threshold = float(ripser_kwargs.pop('thresh', np.inf))
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+
+    largest = num_points if max_points is None else min(max_points, num_points)
+    sizes = []
+    size = min(initial_points, largest)
+    while True:
+        sizes.append(size)
+        if size >= largest:
+            break
+        size = min(int(np.ceil(size * growth)), largest)
+
+    # Every round is a prefix of one greedy permutation, grown round by round
+    permutation = GreedyPermutation(points, seed=seed)
+    selection_rate = None  # Seconds per landmark of the last extension
+
+    dimension = maxdim
+    best, rounds, stopped, timings = None, [], 'complete', []
+    round_index = 0
+    while round_index < len(sizes):
+        size = sizes[round_index]
+        added = size - len(permutation)
+        if time_budget is not None and best is not None and added > 0 and \
+                selection_rate * added > time_budget - (time.perf_counter() - start):
+            stopped = 'time'
+            break
+        selection_start = time.perf_counter()
+        permutation.extend(size)
+        selection_seconds = time.perf_counter() - selection_start
+        if added > 0:
+            selection_rate = selection_seconds / added
+        indices, covering_radius = permutation.indices[:size], permutation.prefix_covering_radius(size)
+        landmarks = points[indices]
+        total = size * (size - 1) // 2
+        distances = _distance_sample(landmarks, rng) if total else np.zeros(1)
+
+        # Edge caps from the memory model and from the time left, extrapolated from the timed rounds
+        caps = {}
+        if memory_budget is not None and estimate_ripser_bytes(size, total, False) > memory_budget:
+            caps['memory'] = max((memory_budget - 8 * size ** 2) // RIPSER_SPARSE_BYTES_PER_EDGE, 0)
+        if time_budget is not None and timings:
+            remaining = TIME_SAFETY_FACTOR * (time_budget - (time.perf_counter() - start))
+            if len(timings) >= 2 and timings[-1][0] > timings[-2][0] and timings[-2][1] > 0:
+                exponent = np.log(timings[-1][1] / timings[-2][1]) / np.log(timings[-1][0] / timings[-2][0])
+                exponent = float(np.clip(exponent, 1.0, 3.0))
+            else:
+                exponent = DEFAULT_TIME_EXPONENT
+            edges, seconds = timings[-1]
+            caps['time'] = int(edges * (max(remaining, 0.0) / seconds) ** (1 / exponent)) if seconds > 0 else total
+
+        limit = min(caps, key=caps.get) if caps else None
+        max_edges = min(caps.values()) if caps else total
+        threshold = min(_threshold_for_edges(distances, total, max_edges), requested_threshold)
+        cut = threshold < requested_threshold
+        fits = max_edges >= size - 1 or total == 0
+
+        if best is not None and (not fits or (cut and policy == 'subsample')):
+            if round_index == 1 and limit == 'time' and dimension > 1:
+                # The first round leaves no time to grow: retry the search one dimension lower
+                dimension -= 1
+                timings, round_index = [], 0
+                continue
+            stopped = limit
+            break
+        if best is None and not fits:
+            stopped = limit  # Even the smallest round is over budget; run it anyway so there is a result
+
+        round_start = time.perf_counter()
+        result = ripser(landmarks, maxdim=dimension, thresh=threshold, **ripser_kwargs)
+        seconds = time.perf_counter() - round_start
+        edges = _edges_below(distances, total, threshold)
+        timings.append((max(edges, 1), seconds))
+        rounds.append({'num_landmarks': size, 'max_dimension': dimension, 'threshold': threshold, 'edges': edges,
+                       'seconds': seconds, 'selection_seconds': selection_seconds})
+        best = (result, indices, covering_radius, threshold)
+        round_index += 1
+        if cut and limit is not None:
+            stopped = limit
+
+    result, indices, covering_radius, threshold = best
+    report = landmark_report(num_points, indices, covering_radius, 'rips')
+    report.update({'threshold': threshold, 'requested_threshold': requested_threshold, 'max_dimension': dimension,
+                   'requested_max_dimension': maxdim, 'policy': policy, 'time_budget': time_budget,
+                   'memory_budget': memory_budget, 'seconds': time.perf_counter() - start, 'rounds': rounds})
+    report['truncated'] = len(indices) < largest or threshold < requested_threshold or dimension < maxdim
+    report['stopped'] = stopped if report['truncated'] else 'complete'
+    return result, report
+
+# One-line description of a budgeted run for the suite printouts
+def describe_budgeted(report):
+    """Format a `budgeted_ripser` report as a single human-readable line."""
+    budgets = ', '.join(part for part in (
+        f"{report['time_budget']} s" if report['time_budget'] is not None else None,
+        f"{report['memory_budget']} bytes" if report['memory_budget'] is not None else None) if part) or "none"
+    if not report['truncated']:
+        return f"Budgeted persistence (budget {budgets}): complete in {report['seconds']:.2f} s"
+    return (f"Budgeted persistence (budget {budgets}): truncated by {report['stopped']} after {len(report['rounds'])} rounds; "
+            f"{report['num_landmarks']} of {report['num_points']} points (bottleneck bound {report['bottleneck_bound']:.4f}), "
+            f"threshold {report['threshold']:.4f}, max dimension {report['max_dimension']} of {report['requested_max_dimension']}")
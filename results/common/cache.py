@@ -0,0 +1,225 @@
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+
+import numpy as np
+import gudhi
+import ripser as ripser_module
+
+from common.budget import default_memory_budget
+from common.budgeted import budgeted_ripser, default_time_budget
+from common.diagrams import PersistenceDiagram
+from common.landmarks import landmark_ripser, rips_simplex_tree
+from common.profiling import json_default, record, stage
+
+# Environment variable naming the shared cache directory; unset means caching is off
+CACHE_DIR_ENV = 'PH_CACHE_DIR'
+
+# Default size bound of a cache directory (1 GiB)
+DEFAULT_MAX_BYTES = 1 << 30
+
+# Version of the entry format and of the complex construction, hashed into every key;
+# bump it whenever a construction (or a default it does not expose) changes its diagrams
+CACHE_VERSION = 1
+
+
+class PersistenceCache:
+    """
+    Content-addressed on-disk cache of persistence diagrams.
+
+    Entries are keyed by a SHA-256 hash of the point array (shape, dtype and raw
+    bytes) together with every parameter that affects the diagram (defaults
+    included), the backend version and `CACHE_VERSION`. Each entry is one
+    uncompressed .npz file holding one float64 (n, 2) array per dimension plus
+    a small JSON report.
+
+    Writes go to a temporary file that is atomically renamed into place, so
+    concurrent worker processes never observe partial entries. Hits refresh the
+    file's modification time, and once the directory grows beyond `max_bytes`
+    the least recently used entries are deleted.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, points, **params):
+        """Hash a point cloud and its computation parameters into a cache key."""
+        points = np.ascontiguousarray(points)
+        hasher = hashlib.sha256()
+        header = {'shape': points.shape, 'dtype': points.dtype.str, 'cache_version': CACHE_VERSION, **params}
+        hasher.update(json.dumps(header, sort_keys=True).encode())
+        hasher.update(points)
+        return hasher.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """Return (diagram, report) for a cached key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                num_dims = int(entry['num_dims'])
+                diagram = PersistenceDiagram([entry[f"dim{dim}"] for dim in range(num_dims)])
+                report = json.loads(str(entry['report']))
+            os.utime(path)
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            # Missing, evicted by another process, or unreadable: treat as a miss
+            return None
+        return diagram, report
+
+    def put(self, key, diagram, report=None):
+        """Store a diagram (and optional JSON-serializable report) under `key`."""
+        arrays = {f"dim{dim}": diagram.pairs(dim) for dim in range(len(diagram.intervals))}
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, num_dims=len(diagram.intervals), report=json.dumps(report or {}, default=json_default), **arrays)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the directory fits in `max_bytes`."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.npz'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Another process evicted it first
+            total -= size
+
+    def clear(self):
+        """Remove every cached entry."""
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(('.npz', '.tmp')):
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+
+# Every parameter of a call to `function` with its defaults filled in, for cache keys
+def _resolved_options(function, *args, **kwargs):
+    bound = inspect.signature(function).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+# Report the size of one persistence computation to the active profile
+def _record_persistence(complex_type, points, diagram, report, cached):
+    construction = report.get('construction') or {}
+    record('persistence', complex=complex_type, points=len(points), cached=cached,
+           simplices_by_dimension=construction.get('simplices_by_dimension'),
+           intervals_by_dimension=[len(intervals) for intervals in diagram.intervals])
+
+# Function to get the cache configured through the environment
+def default_cache():
+    """Return a PersistenceCache for $PH_CACHE_DIR, or None when caching is not enabled."""
+    directory = os.environ.get(CACHE_DIR_ENV)
+    return PersistenceCache(directory) if directory else None
+
+# Function to compute (or fetch) a Rips persistence diagram
+def rips_persistence(points, max_edge_length, max_dimension, cache=None, **construction):
+    """
+    Rips persistence diagram built with `rips_simplex_tree`, served from `cache` when possible.
+
+    Args:
+        points: Point cloud of shape (n, dimension).
+        max_edge_length, max_dimension: Rips parameters.
+        cache: PersistenceCache or None to always recompute.
+        **construction: Extra `rips_simplex_tree` options (num_landmarks, method, seed, collapse, sparse,
+            memory_budget, budget_policy). Without an explicit memory_budget the one
+            from $PH_MEMORY_BUDGET applies, if set.
+
+    Returns:
+        tuple: (PersistenceDiagram, report) with the landmark/construction report.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if 'memory_budget' not in construction and default_memory_budget() is not None:
+        construction['memory_budget'] = default_memory_budget()
+    if cache is not None:
+        options = _resolved_options(rips_simplex_tree, None, max_edge_length, max_dimension, **construction)
+        del options['points']
+        key = cache.key(points, complex='rips', backend=f"gudhi-{gudhi.__version__}", **options)
+        with stage('cache'):
+            hit = cache.get(key)
+        if hit is not None:
+            _record_persistence('rips', points, hit[0], hit[1], cached=True)
+            return hit
+
+    with stage('complex'):
+        simplex_tree, report = rips_simplex_tree(points, max_edge_length, max_dimension, **construction)
+    with stage('persistence'):
+        # A memory budget may have lowered the dimension; the top dimension of such a skeleton is not homology
+        budget = (report.get('construction') or {}).get('budget')
+        built_dimension = budget['chosen']['max_dimension'] if budget else max_dimension
+        diagram = PersistenceDiagram.from_simplex_tree(simplex_tree, max(built_dimension - 1, 0))
+        diagram.intervals += [diagram[dim] for dim in range(len(diagram.intervals), max(max_dimension - 1, 0) + 1)]
+    _record_persistence('rips', points, diagram, report, cached=False)
+    if cache is not None:
+        cache.put(key, diagram, report)
+    return diagram, report
+
+# Function to compute (or fetch) ripser diagrams
+def ripser_persistence(points, cache=None, num_landmarks=None, seed=None, time_budget=None, memory_budget=None,
+                       budget_policy='subsample', **ripser_kwargs):
+    """
+    Ripser diagrams via `landmark_ripser`, served from `cache` when possible.
+
+    With a time or memory budget (explicit, or from $PH_TIME_BUDGET / $PH_MEMORY_BUDGET)
+    the diagrams come from `budgeted_ripser` instead, never from the cache since
+    what fits depends on the machine; its report says where they were truncated.
+
+    Returns:
+        tuple: (dgms, report) where dgms is a ripser-style list of float64 (n, 2) arrays.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    time_budget = default_time_budget() if time_budget is None else time_budget
+    memory_budget = default_memory_budget() if memory_budget is None else memory_budget
+    if time_budget is not None or memory_budget is not None:
+        with stage('persistence'):
+            result, report = budgeted_ripser(points, time_budget=time_budget, memory_budget=memory_budget, policy=budget_policy,
+                                             max_points=num_landmarks, seed=seed, **ripser_kwargs)
+        diagram = PersistenceDiagram.from_ripser(result['dgms'])
+        _record_persistence('ripser-budgeted', points, diagram, report, cached=False)
+        return [diagram.pairs(dim) for dim in range(len(diagram.intervals))], report
+
+    if cache is not None:
+        options = _resolved_options(ripser_module.ripser, None, **ripser_kwargs)
+        del options['X']
+        key = cache.key(points, complex='ripser', num_landmarks=num_landmarks, seed=seed,
+                        backend=f"ripser-{ripser_module.__version__}", **options)
+        with stage('cache'):
+            hit = cache.get(key)
+        if hit is not None:
+            diagram, report = hit
+            _record_persistence('ripser', points, diagram, report, cached=True)
+            return [diagram.pairs(dim) for dim in range(len(diagram.intervals))], report
+
+    # ripser builds the complex and reduces it in one call, so both count as persistence
+    with stage('persistence'):
+        result, report = landmark_ripser(points, num_landmarks=num_landmarks, seed=seed, **ripser_kwargs)
+    diagram = PersistenceDiagram.from_ripser(result['dgms'])
+    _record_persistence('ripser', points, diagram, report, cached=False)
+    if cache is not None:
+        cache.put(key, diagram, report)
+    return [diagram.pairs(dim) for dim in range(len(diagram.intervals))], report
@@ -0,0 +1,175 @@
+import numpy as np
+import gudhi
+
+from common.budget import neighbourhood_edges, plan_flag_complex
+
+# Function to enumerate the cliques of a graph as per-dimension integer arrays
+def flag_cliques(num_vertices, edges, max_dimension):
+    """
+    List the simplices of the flag complex of a graph up to `max_dimension`.
+
+    Edges are sorted into forward adjacency lists (neighbours with a larger
+    index, in CSR form). Every k-clique (v0 < ... < vk) is extended by the
+    forward neighbours w of its last vertex vk, and a candidate is kept when
+    (vi, w) is an edge for every other vertex, which is a lookup in the sorted
+    edge keys. All cliques of one dimension are extended together with array
+    operations, so the work is proportional to the number of candidates, which
+    stays close to linear in the number of simplices on sparse neighbourhoods.
+
+    Args:
+        num_vertices: Number of vertices.
+        edges: Integer array of shape (m, 2).
+        max_dimension: Highest simplex dimension to list.
+
+    Returns:
+        list: One int32 array per dimension k = 0..max_dimension of shape
+        (count, k + 1), with sorted vertices in each row and rows in lexicographic order.
+    """
+    edges = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1, 2), axis=1)
+    keys = np.unique(edges[:, 0] * num_vertices + edges[:, 1])
+    heads, tails = keys // num_vertices, keys % num_vertices
+    starts = np.searchsorted(heads, np.arange(num_vertices + 1))
+
+    simplices = [np.arange(num_vertices, dtype=np.int32)[:, None]]
+    if max_dimension >= 1:
+        simplices.append(np.stack([heads, tails], axis=1).astype(np.int32))
+    for _ in range(2, max_dimension + 1):
+        cliques = simplices[-1].astype(np.int64)
+        last = cliques[:, -1]
+        degrees = starts[last + 1] - starts[last]
+        # Every clique paired with each forward neighbour of its last vertex
+        rows = np.repeat(np.arange(len(cliques)), degrees)
+        offsets = np.arange(len(rows)) - np.repeat(np.cumsum(degrees) - degrees, degrees)
+        candidates = tails[starts[last][rows] + offsets]
+        keep = np.ones(len(rows), dtype=bool)
+        for column in range(cliques.shape[1] - 1):
+            pair_keys = cliques[rows, column] * num_vertices + candidates
+            positions = np.minimum(np.searchsorted(keys, pair_keys), max(len(keys) - 1, 0))
+            keep &= keys[positions] == pair_keys
+        simplices.append(np.column_stack([cliques[rows[keep]], candidates[keep]]).astype(np.int32))
+    return simplices
+
+# Function to list the simplices of a Rips complex through a KD-tree radius query
+def rips_cliques(points, radius, max_dimension=2):
+    """Simplices of the Rips complex at `radius` (pairs at distance <= radius), as returned by `flag_cliques`."""
+    edges, _ = neighbourhood_edges(points, radius)
+    return flag_cliques(len(points), edges, max_dimension)
+
+# Collapse the edges of a flag filtration until no more edges can be removed
+def _collapse_edges(simplex_tree):
+    """Run gudhi's edge collapse to a fixed point and return the number of remaining edges."""
+    remaining = simplex_tree.num_simplices() - simplex_tree.num_vertices()
+    # Each pass can expose new dominated edges, so iterate to a fixed point
+    while True:
+        simplex_tree.collapse_edges()
+        collapsed = simplex_tree.num_simplices() - simplex_tree.num_vertices()
+        if collapsed == remaining:
+            return remaining
+        remaining = collapsed
+
+# Function to build a Rips simplex tree through the 1-skeleton, edge collapse and expansion
+def flag_simplex_tree(points, max_edge_length, max_dimension, collapse=True, sparse=None, memory_budget=None,
+                      budget_policy='threshold'):
+    """
+    Build a Rips simplex tree without materializing the full flag complex first.
+
+    The 1-skeleton is built on its own and, with `collapse`, reduced by gudhi's
+    edge collapses until no more edges can be removed; only then is it expanded
+    to `max_dimension`. Edge collapses preserve the persistent homology of the
+    flag filtration in every dimension, so this exact mode yields the same
+    diagrams as the full Rips complex with far fewer high-dimensional simplices.
+
+    With `sparse=eps` gudhi's sparse Rips complex is built instead. Its diagrams
+    are a (1 + eps)-multiplicative approximation of the Rips diagrams, and since
+    it is not a flag complex no collapse is applied.
+
+    With a `memory_budget` the size of the complex is estimated before anything
+    large is built (see `common.budget.plan_flag_complex`). In exact mode the
+    estimate is taken on the collapsed graph, so only the simplices that will
+    actually be expanded count against the budget; the sparse estimate uses the
+    full neighbourhood graph and is therefore conservative.
+
+    Args:
+        points: Point cloud of shape (n, dimension).
+        max_edge_length: Rips threshold.
+        max_dimension: Maximum simplex dimension after expansion.
+        collapse: Apply edge collapses before expansion (exact mode).
+        sparse: Approximation parameter for the sparse Rips complex, or None.
+        memory_budget: Budget in bytes, or None to build without a size check.
+        budget_policy: 'refuse', 'dimension' or 'threshold', see `plan_flag_complex`.
+
+    Returns:
+        tuple: (simplex_tree, stats) with the construction mode, edge counts before
+        and after collapsing, the final number of simplices (in total and per
+        dimension) and, with a budget,
+        the budget report including the threshold and dimension actually used.
+    """
+    budget = None
+    if memory_budget is not None:
+        # Guard the neighbourhood graph itself (or the whole sparse complex) before building it
+        edges, lengths = neighbourhood_edges(points, max_edge_length)
+        dimension = max_dimension if sparse is not None else 1
+        max_edge_length, dimension, budget = plan_flag_complex(len(points), edges, lengths, max_edge_length, dimension,
+                                                               memory_budget, budget_policy)
+        if sparse is not None:
+            max_dimension = dimension
+
+    if sparse is not None:
+        rips_complex = gudhi.RipsComplex(points=points, max_edge_length=max_edge_length, sparse=sparse)
+        simplex_tree = rips_complex.create_simplex_tree(max_dimension=max_dimension)
+        return simplex_tree, {'mode': 'sparse', 'sparse': sparse, 'edges': None, 'collapsed_edges': None,
+                              'num_simplices': simplex_tree.num_simplices(),
+                              'simplices_by_dimension': simplex_tree.num_simplices_by_dimension(), 'budget': budget}
+
+    simplex_tree = gudhi.RipsComplex(points=points, max_edge_length=max_edge_length).create_simplex_tree(max_dimension=1)
+    edges = simplex_tree.num_simplices() - simplex_tree.num_vertices()
+    remaining = _collapse_edges(simplex_tree) if collapse and max_dimension > 1 else edges
+    if memory_budget is not None and max_dimension > 1:
+        skeleton = [(simplex, filtration) for simplex, filtration in simplex_tree.get_skeleton(1) if len(simplex) == 2]
+        graph = np.array([simplex for simplex, _ in skeleton], dtype=np.int64).reshape(-1, 2)
+        values = np.array([filtration for _, filtration in skeleton], dtype=np.float64)
+        threshold, max_dimension, expanded = plan_flag_complex(len(points), np.sort(graph, axis=1), values, max_edge_length,
+                                                               max_dimension, memory_budget, budget_policy)
+        if threshold < max_edge_length:
+            simplex_tree.prune_above_filtration(threshold)
+        expanded['skeleton'] = budget
+        expanded['reduced'] = expanded['reduced'] or budget['reduced']
+        budget = expanded
+    simplex_tree.expansion(max_dimension)
+    return simplex_tree, {'mode': 'collapse' if collapse and max_dimension > 1 else 'full', 'sparse': None,
+                          'edges': edges, 'collapsed_edges': edges - remaining,
+                          'num_simplices': simplex_tree.num_simplices(),
+                          'simplices_by_dimension': simplex_tree.num_simplices_by_dimension(), 'budget': budget}
+
+# Function to build a flag simplex tree from explicit vertex and edge filtration values
+def weighted_flag_simplex_tree(vertex_values, edges, edge_values, max_dimension, collapse=True):
+    """
+    Build the flag complex of a graph whose filtration is given on vertices and edges.
+
+    Every higher simplex enters at the largest value of its edges, so with
+    edge_values[i] = max(vertex_values[u], vertex_values[v]) this is the
+    lower-star filtration of the vertex function on the flag complex. Any flag
+    filtration is compatible with edge collapses, which are applied as in
+    `flag_simplex_tree`.
+
+    Args:
+        vertex_values: Filtration value of every vertex.
+        edges: Integer array of shape (m, 2).
+        edge_values: Filtration value of every edge (not below its vertices' values).
+        max_dimension: Maximum simplex dimension after expansion.
+        collapse: Apply edge collapses before expansion.
+
+    Returns:
+        tuple: (simplex_tree, stats) with the same fields as `flag_simplex_tree`.
+    """
+    vertex_values = np.asarray(vertex_values, dtype=np.float64)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    simplex_tree = gudhi.SimplexTree()
+    simplex_tree.insert_batch(np.arange(len(vertex_values))[None, :], vertex_values)
+    simplex_tree.insert_batch(edges.T, np.asarray(edge_values, dtype=np.float64))
+    remaining = _collapse_edges(simplex_tree) if collapse and max_dimension > 1 else len(edges)
+    simplex_tree.expansion(max_dimension)
+    return simplex_tree, {'mode': 'collapse' if collapse and max_dimension > 1 else 'full', 'sparse': None,
+                          'edges': len(edges), 'collapsed_edges': len(edges) - remaining,
+                          'num_simplices': simplex_tree.num_simplices(),
+                          'simplices_by_dimension': simplex_tree.num_simplices_by_dimension(), 'budget': None}
@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from common.budget import neighbourhood_edges
+from common.complexes import weighted_flag_simplex_tree
+from common.diagrams import PersistenceDiagram
+from common.profiling import record, stage, timed
+
+# Default number of points whose neighbour blocks are processed at once
+DEFAULT_CHUNK_SIZE = 16384
+
+# Mean pairwise angle between the neighbour vectors of a block of points
+def _mean_neighbour_angles(points, centers, neighbours):
+    """
+    Average angle between all pairs of neighbour vectors for each point of a block.
+
+    The vectors are normalized once per block and all pairwise cosines come from
+    one batched Gram matrix; pairs involving a zero vector (duplicate points)
+    are skipped, and points without any valid pair get angle 0.
+    """
+    vectors = points[neighbours] - centers[:, None, :]
+    norms = np.linalg.norm(vectors, axis=2)
+    valid = norms > 0
+    unit = vectors / np.where(valid, norms, 1.0)[..., None]
+    gram = np.einsum('bid,bjd->bij', unit, unit, optimize=True)
+
+    first, second = np.triu_indices(neighbours.shape[1], 1)
+    pair_valid = valid[:, first] & valid[:, second]
+    angles = np.arccos(np.clip(gram[:, first, second], -1.0, 1.0))
+    angle_sum = np.where(pair_valid, angles, 0.0).sum(axis=1)
+    count = pair_valid.sum(axis=1)
+    return np.divide(angle_sum, count, out=np.zeros(len(centers)), where=count > 0)
+
+# Function to compute the density/angle curvature proxy of every point
+@timed('curvature')
+def refined_curvature(points, n_neighbors=10, chunk_size=DEFAULT_CHUNK_SIZE, max_workers=None):
+    """
+    Curvature proxy combining local density and local angles: mean neighbour angle / mean neighbour distance.
+
+    Neighbours come from one KD-tree query (excluding the point itself), issued in
+    the tree's own leaf order so consecutive queries touch nearby memory. The
+    angle kernel then runs over the same order in memory-bounded chunks of
+    `chunk_size` points, each using O(chunk_size * n_neighbors^2) memory,
+    optionally spread over a thread pool (numpy releases the GIL inside the
+    kernel).
+
+    Args:
+        points: Point cloud of shape (n, dimension).
+        n_neighbors: Neighbourhood size, including the point itself.
+        chunk_size: Number of points per chunk.
+        max_workers: Thread pool size; None or 1 processes the chunks serially.
+
+    Returns:
+        np.ndarray: Curvature proxy of every point.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    tree = cKDTree(points, balanced_tree=False, compact_nodes=False)
+    order = tree.indices
+    distances, indices = tree.query(points[order], k=n_neighbors, workers=-1)
+    avg_density_distance = np.empty(len(points))
+    avg_density_distance[order] = distances[:, 1:].mean(axis=1)
+
+    angles = np.empty(len(points))
+
+    def process(start):
+        block = order[start:start + chunk_size]
+        angles[block] = _mean_neighbour_angles(points, points[block], indices[start:start + chunk_size, 1:])
+
+    starts = range(0, len(points), chunk_size)
+    if max_workers is None or max_workers == 1 or len(starts) <= 1:
+        for start in starts:
+            process(start)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(process, starts))
+
+    # The lower the distance and the larger the angles, the higher the curvature proxy
+    return angles / avg_density_distance
+
+# Function to build one simplex tree filtered by curvature
+def curvature_simplex_tree(points, curvatures, max_edge_length, max_dimension, mode='lower-star', scale=1.0, collapse=True):
+    """
+    Rips complex at `max_edge_length` filtered by a vertex curvature function.
+
+    In 'lower-star' mode a simplex enters at the largest curvature of its vertices,
+    so the sublevel complex at t is the Rips complex on the points with curvature
+    <= t; one persistence computation therefore covers every curvature threshold.
+    In 'max' mode a simplex enters at max(curvature, scale * diameter), a single
+    filtration that grows in curvature and scale together.
+
+    Returns:
+        tuple: (simplex_tree, stats) as returned by `weighted_flag_simplex_tree`.
+    """
+    curvatures = np.asarray(curvatures, dtype=np.float64)
+    edges, lengths = neighbourhood_edges(points, max_edge_length)
+    edge_values = np.maximum(curvatures[edges[:, 0]], curvatures[edges[:, 1]])
+    if mode == 'max':
+        edge_values = np.maximum(edge_values, scale * lengths)
+    elif mode != 'lower-star':
+        raise ValueError("Invalid curvature filtration mode. Use 'lower-star' or 'max'.")
+    return weighted_flag_simplex_tree(curvatures, edges, edge_values, max_dimension, collapse=collapse)
+
+# Function to compute the persistence of the curvature filtration
+def curvature_persistence(points, curvatures, max_edge_length, max_dimension, mode='lower-star', scale=1.0):
+    """
+    Persistence diagram of `curvature_simplex_tree`.
+
+    Per-threshold results are cheap queries on the returned diagram:
+    `diagram.truncate(t)` for the diagram up to curvature t and
+    `diagram.betti_numbers(t)` for the homology of the thresholded complex.
+    """
+    with stage('complex'):
+        simplex_tree, stats = curvature_simplex_tree(points, curvatures, max_edge_length, max_dimension, mode=mode, scale=scale)
+    with stage('persistence'):
+        diagram = PersistenceDiagram.from_simplex_tree(simplex_tree, max_dimension=max(max_dimension - 1, 0))
+    record('persistence', complex=f"curvature-{mode}", points=len(points), cached=False,
+           simplices_by_dimension=stats['simplices_by_dimension'],
+           intervals_by_dimension=[len(intervals) for intervals in diagram.intervals])
+    return diagram
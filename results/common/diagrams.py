@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+# Record layout of one persistence interval; infinite intervals keep death = inf
+INTERVAL_DTYPE = np.dtype([('birth', np.float64), ('death', np.float64), ('lifespan', np.float64)])
+
+# Columns of the per-dimension summary table, in the order the suites print them
+SUMMARY_COLUMNS = ['count', 'avg_birth', 'avg_death', 'avg_lifespan', 'std_lifespan', 'max_lifespan', 'min_lifespan']
+
+# Convert an (n, 2) array of (birth, death) pairs into a structured interval array
+def _to_intervals(pairs):
+    pairs = np.asarray(pairs, dtype=np.float64).reshape(-1, 2)
+    intervals = np.empty(len(pairs), dtype=INTERVAL_DTYPE)
+    intervals['birth'] = pairs[:, 0]
+    intervals['death'] = pairs[:, 1]
+    intervals['lifespan'] = pairs[:, 1] - pairs[:, 0]
+    return intervals
+
+# Reductions that return NaN instead of warning on empty input
+def _mean(values):
+    return values.mean() if len(values) > 0 else np.nan
+
+def _std(values):
+    return values.std(ddof=1) if len(values) > 1 else np.nan
+
+def _max(values):
+    return values.max() if len(values) > 0 else np.nan
+
+def _min(values):
+    return values.min() if len(values) > 0 else np.nan
+
+
+class PersistenceDiagram:
+    """
+    Columnar persistence diagram with one structured array of intervals per homology dimension.
+
+    Each array has `birth`, `death` and `lifespan` fields. Intervals that never die
+    keep death = inf and are selected with `infinite_mask(dim)`; all statistics
+    are computed with vectorized reductions over these columns.
+    """
+    __slots__ = ('intervals',)
+
+    def __init__(self, intervals):
+        self.intervals = [_to_intervals(pairs) for pairs in intervals]
+
+    @classmethod
+    def from_simplex_tree(cls, simplex_tree, max_dimension):
+        """
+        Build the diagram of homology dimensions 0..max_dimension from a gudhi SimplexTree.
+
+        Persistence is computed with `persistence_dim_max=True`, so classes of the
+        tree's top dimension are kept when a construction (e.g. edge collapse)
+        leaves the tree lower-dimensional than requested. There is always one
+        interval array per requested dimension, empty where there are no classes.
+        """
+        simplex_tree.compute_persistence(persistence_dim_max=True)
+        intervals = [simplex_tree.persistence_intervals_in_dimension(dim).reshape(-1, 2) for dim in range(max_dimension + 1)]
+        return cls(intervals)
+
+    @classmethod
+    def from_ripser(cls, dgms):
+        """Build the diagram from the `dgms` list returned by ripser."""
+        return cls(dgms)
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """Build the diagram from gudhi's list of (dimension, (birth, death)) tuples."""
+        if len(pairs) == 0:
+            return cls([])
+        dims = np.fromiter((dim for dim, _ in pairs), dtype=np.int64, count=len(pairs))
+        values = np.array([interval for _, interval in pairs], dtype=np.float64)
+        return cls([values[dims == dim] for dim in range(dims.max() + 1)])
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Build the diagram back from a long-format table with Dimension, Birth and Death columns (NaN death = infinite)."""
+        dims = df['Dimension'].to_numpy(dtype=np.int64)
+        values = np.column_stack((df['Birth'].to_numpy(dtype=np.float64),
+                                  np.nan_to_num(df['Death'].to_numpy(dtype=np.float64), nan=np.inf)))
+        if len(dims) == 0:
+            return cls([])
+        return cls([values[dims == dim] for dim in range(dims.max() + 1)])
+
+    def __len__(self):
+        return sum(len(intervals) for intervals in self.intervals)
+
+    def __getitem__(self, dim):
+        if dim < len(self.intervals):
+            return self.intervals[dim]
+        return np.empty(0, dtype=INTERVAL_DTYPE)
+
+    @property
+    def max_dimension(self):
+        return len(self.intervals) - 1
+
+    def infinite_mask(self, dim):
+        """Boolean mask of the intervals in `dim` that never die."""
+        return np.isinf(self[dim]['death'])
+
+    def pairs(self, dim=None, finite=False):
+        """
+        Return (birth, death) pairs as an (n, 2) float array.
+
+        Args:
+            dim: Homology dimension, or None to stack every dimension.
+            finite: Drop intervals with infinite death.
+        """
+        if dim is None:
+            blocks = [self.pairs(d, finite) for d in range(len(self.intervals))]
+            return np.vstack(blocks) if blocks else np.empty((0, 2))
+        intervals = self[dim]
+        if finite:
+            intervals = intervals[~np.isinf(intervals['death'])]
+        return np.column_stack((intervals['birth'], intervals['death']))
+
+    def to_persistence_pairs(self):
+        """
+        Convert to gudhi's list of (dimension, (birth, death)) tuples.
+
+        Intervals are ordered like SimplexTree.persistence(): by dimension, then by
+        lifespan, both descending. Intended for plotting and small diagrams.
+        """
+        dims, birth, death, lifespan = self.columns()
+        order = np.lexsort((-lifespan, -dims))
+        return [(int(dims[i]), (float(birth[i]), float(death[i]))) for i in order]
+
+    def truncate(self, threshold):
+        """
+        Diagram of the filtration stopped at `threshold`.
+
+        Keeps the intervals born at or before the threshold and makes those still
+        alive there infinite, which is exactly the persistence of the sublevel
+        filtration up to `threshold`; no recomputation is needed.
+        """
+        truncated = []
+        for intervals in self.intervals:
+            intervals = intervals[intervals['birth'] <= threshold]
+            truncated.append(np.column_stack((intervals['birth'], np.where(intervals['death'] > threshold, np.inf, intervals['death']))))
+        return PersistenceDiagram(truncated)
+
+    def betti_numbers(self, threshold):
+        """Betti numbers of the complex at filtration value `threshold` (intervals with birth <= threshold < death)."""
+        return [int(np.count_nonzero((intervals['birth'] <= threshold) & (intervals['death'] > threshold)))
+                for intervals in self.intervals]
+
+    def columns(self):
+        """Return flat (dimension, birth, death, lifespan) arrays covering every interval."""
+        dims = np.repeat(np.arange(len(self.intervals)), [len(intervals) for intervals in self.intervals])
+        if len(dims) == 0:
+            empty = np.empty(0)
+            return dims, empty, empty, empty
+        stacked = np.concatenate(self.intervals)
+        return dims, stacked['birth'], stacked['death'], stacked['lifespan']
+
+    def dimension_summary(self, dim):
+        """Summary statistics for one dimension; infinite intervals are counted but excluded from death/lifespan statistics."""
+        intervals = self[dim]
+        finite = intervals[~np.isinf(intervals['death'])]
+        lifespans = finite['lifespan']
+        return {'count': len(intervals), 'avg_birth': _mean(intervals['birth']), 'avg_death': _mean(finite['death']),
+                'avg_lifespan': _mean(lifespans), 'std_lifespan': _std(lifespans),
+                'max_lifespan': _max(lifespans), 'min_lifespan': _min(lifespans)}
+
+    def summary(self):
+        """Per-dimension summary table indexed by `Dimension`, skipping dimensions without intervals."""
+        dims = [dim for dim, intervals in enumerate(self.intervals) if len(intervals) > 0]
+        rows = [self.dimension_summary(dim) for dim in dims]
+        return pd.DataFrame(rows, index=pd.Index(dims, name='Dimension'), columns=SUMMARY_COLUMNS)
+
+    def to_dataframe(self, finite=False):
+        """
+        Long-format DataFrame with Dimension, Birth, Death and Lifespan columns.
+
+        Infinite deaths become NaN, matching the tables the suites used to build
+        row by row; with `finite=True` those intervals are dropped instead.
+        """
+        dims, birth, death, lifespan = self.columns()
+        infinite = np.isinf(death)
+        if finite:
+            keep = ~infinite
+            dims, birth, death, lifespan = dims[keep], birth[keep], death[keep], lifespan[keep]
+        else:
+            death = np.where(infinite, np.nan, death)
+            lifespan = np.where(infinite, np.nan, lifespan)
+        return pd.DataFrame({'Dimension': dims, 'Birth': birth, 'Death': death, 'Lifespan': lifespan})
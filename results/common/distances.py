@@ -0,0 +1,101 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import gudhi
+import gudhi.wasserstein as wasserstein
+
+from common.diagrams import PersistenceDiagram
+from common.profiling import timed
+
+# Finite (birth, death) pairs per dimension, installed once in each worker process
+_worker_pairs = None
+
+# Extract finite pairs for each requested dimension from any supported diagram representation
+def _finite_pairs(diagram, dims):
+    """
+    Normalize one diagram to a list of finite (n, 2) arrays, one per entry of `dims`.
+
+    Accepts a PersistenceDiagram, a ripser-style list of per-dimension arrays, or
+    a single (n, 2) array (treated as one diagram regardless of `dims`). Points
+    with infinite death are always dropped so every metric sees the same input.
+    """
+    if isinstance(diagram, np.ndarray) and diagram.ndim == 2:
+        pairs = diagram.astype(np.float64)
+        return [pairs[np.isfinite(pairs[:, 1])]]
+    if not isinstance(diagram, PersistenceDiagram):
+        diagram = PersistenceDiagram.from_ripser(diagram)
+    return [diagram.pairs(dim, finite=True) for dim in dims]
+
+# Distance between two finite diagrams of the same dimension
+def _pair_distance(first, second, metric, order):
+    if metric == 'bottleneck':
+        return gudhi.bottleneck_distance(first, second)
+    if metric == 'wasserstein':
+        return wasserstein.wasserstein_distance(first, second, order=order)
+    raise ValueError("Invalid metric. Use 'bottleneck' or 'wasserstein'.")
+
+# Install the shared diagram pairs in a worker (or in this process for serial runs)
+def _init_worker(pairs):
+    global _worker_pairs
+    _worker_pairs = pairs
+
+# Compute one block of condensed entries for one dimension inside a worker
+def _distance_block(slot, rows, cols, metric, order):
+    pairs = _worker_pairs[slot]
+    return [_pair_distance(pairs[i], pairs[j], metric, order) for i, j in zip(rows, cols)]
+
+# Function to compute the all-pairs distance matrix of a diagram collection
+@timed('distances')
+def distance_matrix(diagrams, metric='bottleneck', dims=(0, 1), order=1.0, combine=True, max_workers=None, block_size=256):
+    """
+    Compute pairwise bottleneck or Wasserstein distances across many persistence diagrams.
+
+    Work is split per homology dimension and into blocks of the condensed upper
+    triangle, which are evaluated in a process pool. Infinite points are
+    discarded from every diagram before any distance is computed.
+
+    Args:
+        diagrams: Sequence of PersistenceDiagram objects, ripser `dgms` lists, or (n, 2) arrays.
+        metric: 'bottleneck' or 'wasserstein'.
+        dims: Homology dimensions to compare (ignored for plain (n, 2) arrays).
+        order: Wasserstein order p.
+        combine: If True, merge dimensions (max for bottleneck, l_p sum for
+            Wasserstein); if False, return one condensed array per dimension.
+        max_workers: Process pool size; 1 computes serially in this process.
+        block_size: Number of diagram pairs per task.
+
+    Returns:
+        np.ndarray: Condensed distance vector of length n * (n - 1) / 2, ordered
+        like scipy.spatial.distance.pdist (usable with squareform and
+        scipy.cluster.hierarchy.linkage). With combine=False, a dict mapping
+        each dimension to such a vector.
+    """
+    per_diagram = [_finite_pairs(diagram, dims) for diagram in diagrams]
+    plain_arrays = any(isinstance(diagram, np.ndarray) and diagram.ndim == 2 for diagram in diagrams)
+    slots = [None] if plain_arrays else list(dims)
+    pairs = [[diagram_pairs[k] for diagram_pairs in per_diagram] for k in range(len(slots))]
+
+    rows, cols = np.triu_indices(len(per_diagram), k=1)
+    offsets = [(slot, start) for slot in range(len(slots)) for start in range(0, len(rows), block_size)]
+    blocks = [(slot, rows[start:start + block_size], cols[start:start + block_size]) for slot, start in offsets]
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers == 1 or len(blocks) <= 1:
+        _init_worker(pairs)
+        results = [_distance_block(slot, r, c, metric, order) for slot, r, c in blocks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(pairs,)) as pool:
+            futures = [pool.submit(_distance_block, slot, r, c, metric, order) for slot, r, c in blocks]
+            results = [future.result() for future in futures]
+
+    condensed = np.empty((len(slots), len(rows)))
+    for (slot, start), values in zip(offsets, results):
+        condensed[slot, start:start + len(values)] = values
+
+    if not combine:
+        return {slot: condensed[k] for k, slot in enumerate(slots)}
+    if metric == 'bottleneck':
+        return condensed.max(axis=0)
+    return (condensed ** order).sum(axis=0) ** (1.0 / order)
@@ -0,0 +1,56 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Function to build a zero-copy time-delay embedding
+def delay_embedding(series, embedding_dimension, delay=1, axis=0):
+    """
+    Time-delay embedding x_i = (s_i, s_{i+delay}, ..., s_{i+(m-1)delay}) as a strided view.
+
+    The result is a read-only `sliding_window_view` over `series`, so no sample
+    is copied whatever the length of the series; memory-mapped inputs stay on
+    disk until the view is read. Copy it (or normalize it) before writing.
+
+    Args:
+        series: A 1-D series, or an array whose `axis` is time (e.g. an aligned
+            dates x symbols price matrix) to embed every other index at once.
+        embedding_dimension: Number of coordinates m of each delay vector.
+        delay: Step between consecutive coordinates, in samples.
+        axis: Time axis of `series`.
+
+    Returns:
+        np.ndarray: Shape (n - (m - 1) * delay, m) for a 1-D series; for a
+        (dates x symbols) matrix, shape (symbols, n - (m - 1) * delay, m).
+    """
+    if embedding_dimension < 1 or delay < 1:
+        raise ValueError("The embedding dimension and the delay must be positive.")
+    series = np.asarray(series)
+    axis = axis % series.ndim
+    span = (embedding_dimension - 1) * delay + 1
+    if series.shape[axis] < span:
+        raise ValueError(f"A series of {series.shape[axis]} samples is too short for dimension {embedding_dimension} "
+                         f"with delay {delay}.")
+    # Windows of the full span along `axis`, keeping every delay-th sample; the windows become the last axis
+    windows = sliding_window_view(series, span, axis=axis)[..., ::delay]
+    # Time first within each embedding, other axes in front: (..., vectors, m)
+    return np.moveaxis(windows, axis, -2)
+
+# Function to cut an embedding into rolling windows of consecutive delay vectors
+def rolling_windows(embedding, window, step=1):
+    """
+    Rolling point clouds of `window` consecutive delay vectors, `step` vectors apart, as a read-only view.
+
+    Args:
+        embedding: Output of `delay_embedding`, with delay vectors on the second-to-last axis.
+        window: Delay vectors per point cloud.
+        step: Offset between the starts of consecutive windows.
+
+    Returns:
+        np.ndarray: Shape (..., num_windows, window, m).
+    """
+    if window < 1 or step < 1:
+        raise ValueError("The window and the step must be positive.")
+    if embedding.shape[-2] < window:
+        raise ValueError(f"An embedding of {embedding.shape[-2]} vectors is too short for windows of {window}.")
+    windows = sliding_window_view(embedding, window, axis=-2)[..., ::step, :, :]
+    return np.swapaxes(windows, -1, -2)
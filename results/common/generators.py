@@ -0,0 +1,272 @@
+import numpy as np
+
+from common.profiling import timed
+
+# --------------------- SIERPIŃSKI GASKET --------------------- #
+
+# Default corners of the planar Sierpiński gasket used throughout the suites
+GASKET_CORNERS = np.array([[0.0, 0.0], [1.0, 0.0], [0.5, np.sqrt(3) / 2]])
+
+# Integer barycentric vertex sets keyed by (number of corners, depth)
+_gasket_cache = {}
+
+# Build the integer barycentric vertex set of a Sierpiński simplex for one depth
+def _gasket_barycentric(num_corners, depth):
+    """
+    Return the gasket vertices at a given depth as integer barycentric coordinates.
+
+    Each row sums to 2**depth and the first `num_corners` rows are always the
+    corners of the outer simplex. Depth d+1 is built from the cached depth d by
+    applying the iterated-function-system maps f_i(v) = v + 2**d * e_i and
+    dropping the vertices shared between neighbouring copies.
+    """
+    key = (num_corners, depth)
+    if key in _gasket_cache:
+        return _gasket_cache[key]
+
+    if depth == 0:
+        vertices = np.eye(num_corners, dtype=np.int64)
+    else:
+        previous = _gasket_barycentric(num_corners, depth - 1)
+        shift = 2 ** (depth - 1) * np.eye(num_corners, dtype=np.int64)
+
+        # Copy i shares its j-th corner with copy j for every j < i; since the
+        # corners lead the previous depth, dropping them is a plain slice
+        copies = [previous[i:] + shift[i] for i in range(num_corners)]
+        vertices = np.vstack(copies)
+
+        # Outer corner i is the first row of copy i; move the corners to the front
+        corner_rows = np.cumsum([0] + [len(copy) for copy in copies[:-1]])
+        rest = np.ones(len(vertices), dtype=bool)
+        rest[corner_rows] = False
+        vertices = np.vstack([vertices[corner_rows], vertices[rest]])
+
+    vertices.setflags(write=False)
+    _gasket_cache[key] = vertices
+    return vertices
+
+# Function to generate the vertex set of a Sierpiński gasket
+@timed('generate')
+def sierpinski_gasket(depth, corners=None):
+    """
+    Generate the vertices of a Sierpiński gasket of the given depth.
+
+    Args:
+        depth: Number of subdivision levels (depth d has 3 * (3**d + 1) / 2 vertices).
+        corners: Optional (m, dimension) array of outer corners; defaults to the
+            unit equilateral triangle. More than three corners give the
+            Sierpiński simplex spanned by them.
+
+    Returns:
+        np.ndarray: Array of shape (num_vertices, dimension).
+    """
+    corners = GASKET_CORNERS if corners is None else np.asarray(corners, dtype=float)
+    barycentric = _gasket_barycentric(len(corners), depth)
+    return (barycentric / 2.0 ** depth) @ corners
+
+# Function to stream the gasket vertices in fixed-size chunks
+def iter_sierpinski_gasket(depth, corners=None, chunk_size=100000):
+    """Yield the vertices of `sierpinski_gasket(depth, corners)` in chunks of at most `chunk_size` rows."""
+    corners = GASKET_CORNERS if corners is None else np.asarray(corners, dtype=float)
+    barycentric = _gasket_barycentric(len(corners), depth)
+    for start in range(0, len(barycentric), chunk_size):
+        yield (barycentric[start:start + chunk_size] / 2.0 ** depth) @ corners
+
+# Number of distinct vertices of the depth-d Sierpiński simplex with `num_corners` corners
+def gasket_vertex_count(num_corners, depth):
+    """Vertex count of `sierpinski_gasket(depth, corners)` for `num_corners` corners (m copies share m(m-1)/2 vertices per level)."""
+    count = num_corners
+    for _ in range(depth):
+        count = num_corners * count - num_corners * (num_corners - 1) // 2
+    return count
+
+# Draw distinct random ranks of gasket vertices
+def _sample_gasket_ranks(rng, num_corners, depth, count):
+    total = gasket_vertex_count(num_corners, depth)
+    if count > total:
+        raise ValueError(f"The depth-{depth} gasket with {num_corners} corners has only {total} vertices, "
+                         f"fewer than the {count} requested.")
+    if total >= 2 ** 63:
+        raise OverflowError(f"Vertex ranks of the depth-{depth} gasket with {num_corners} corners do not fit in int64.")
+    return rng.choice(total, size=count, replace=False).astype(np.int64)
+
+# Integer barycentric coordinates of gasket vertices given by rank
+def _decode_gasket_ranks(ranks, num_corners, depth):
+    """
+    Integer barycentric coordinates (rows summing to 2**depth) of the vertices with the given ranks.
+
+    A rank is a row index of `_gasket_barycentric(num_corners, depth)`, recovered
+    without building it: ranks below num_corners are the outer corners, and the
+    rest enumerate copy i's rows previous[i + 1:] shifted by 2**(depth-1) * e_i.
+    Every level peels one copy index off all ranks at once, so the cost is
+    O(len(ranks) * depth).
+    """
+    counts = [gasket_vertex_count(num_corners, level) for level in range(depth + 1)]
+    ranks = np.array(ranks, dtype=np.int64)
+    coordinates = np.zeros((len(ranks), num_corners), dtype=np.int64)
+    rows = np.arange(len(ranks))
+    for level in range(depth, 0, -1):
+        corner = ranks < num_corners
+        coordinates[rows[corner], ranks[corner]] += 2 ** level
+        rows, ranks = rows[~corner], ranks[~corner] - num_corners
+
+        # Copy i contributes the N_{level-1} - i - 1 rows of the previous level after its first i + 1
+        sizes = counts[level - 1] - 1 - np.arange(num_corners)
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        copies = np.searchsorted(offsets, ranks, side='right') - 1
+        coordinates[rows, copies] += 2 ** (level - 1)
+        ranks = ranks - offsets[copies] + copies + 1
+    coordinates[rows, ranks] += 1
+    return coordinates
+
+# Function to sample exactly num_points vertices of a Sierpiński gasket
+def sample_sierpinski_gasket(num_points, depth, corners=None, seed=None):
+    """
+    Sample `num_points` distinct vertices of `sierpinski_gasket(depth, corners)` without building it.
+
+    Vertex ranks are drawn without replacement and decoded level by level, so
+    the cost depends on num_points and linearly on depth, not on the 3**depth
+    size of the full vertex set.
+
+    Raises:
+        ValueError: If the gasket has fewer than `num_points` vertices.
+    """
+    corners = GASKET_CORNERS if corners is None else np.asarray(corners, dtype=float)
+    rng = np.random.default_rng(seed)
+    ranks = _sample_gasket_ranks(rng, len(corners), depth, num_points)
+    return (_decode_gasket_ranks(ranks, len(corners), depth) / 2.0 ** depth) @ corners
+
+# --------------------- SEEDED RANDOM CLOUDS --------------------- #
+
+# Default number of rows produced per chunk by the streaming generators
+DEFAULT_CHUNK_SIZE = 1000000
+
+# Function to derive independent, reproducible seeds for parallel workers
+def spawn_seeds(seed, count):
+    """
+    Split one seed into `count` independent SeedSequence children, one per worker or replicate.
+
+    Unlike SeedSequence.spawn this does not advance the parent, so the same seed
+    always yields the same children.
+    """
+    seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return [np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (i,), pool_size=seed.pool_size)
+            for i in range(count)]
+
+# Create independent generators for the separate random quantities of a cloud
+def _streams(seed, count):
+    """
+    Return `count` Generators with independent streams derived from `seed`.
+
+    Each random quantity (base coordinates, perturbations, corners) reads from its
+    own stream, so the values drawn do not depend on how the cloud is chunked.
+    """
+    return [np.random.default_rng(child) for child in spawn_seeds(seed, count)]
+
+# Chunk boundaries covering num_points rows
+def _chunk_bounds(num_points, chunk_size):
+    for start in range(0, num_points, chunk_size):
+        yield start, min(start + chunk_size, num_points)
+
+# Concatenate streamed chunks into one array
+def _collect(chunks, dimension):
+    chunks = list(chunks)
+    return np.concatenate(chunks) if chunks else np.empty((0, dimension))
+
+# Function to stream points approximating the Whitney umbrella
+def iter_whitney_umbrella(num_points, chunk_size=DEFAULT_CHUNK_SIZE, seed=None):
+    """Yield Whitney umbrella samples (x, y = x*u, z = y**2) in chunks of at most `chunk_size` rows."""
+    rng, = _streams(seed, 1)
+    for start, stop in _chunk_bounds(num_points, chunk_size):
+        uniforms = rng.uniform(-1, 1, size=(stop - start, 2))
+        x = uniforms[:, 0]
+        y = x * uniforms[:, 1]  # Singular line at y = 0
+        yield np.column_stack((x, y, y ** 2))
+
+# Function to generate points approximating the Whitney umbrella
+@timed('generate')
+def whitney_umbrella(num_points, seed=None):
+    """Sample `num_points` points approximating a Whitney umbrella-like structure."""
+    return _collect(iter_whitney_umbrella(num_points, chunk_size=max(num_points, 1), seed=seed), 3)
+
+# Function to stream a synthetic point cloud for one of the experiment frameworks
+def iter_synthetic_cloud(framework, num_points, dimension, complexity, chunk_size=DEFAULT_CHUNK_SIZE, seed=None):
+    """
+    Yield a synthetic point cloud in chunks of at most `chunk_size` rows.
+
+    Args:
+        framework: One of 'singular', 'non-smooth', 'fractal', 'hybrid', 'curvature' or 'control'.
+        num_points: Number of points generated.
+        dimension: Ambient dimension of the cloud.
+        complexity: Framework-specific complexity level.
+        chunk_size: Maximum rows per yielded chunk; the values do not depend on it.
+        seed: Integer, SeedSequence or None for fresh OS entropy.
+    """
+    if framework == 'singular':
+        # Singular point cloud with perturbations for higher-dimensional singularities
+        base, noise = _streams(seed, 2)
+        for start, stop in _chunk_bounds(num_points, chunk_size):
+            yield base.random((stop - start, dimension)) + noise.normal(scale=0.05 * complexity, size=(stop - start, dimension))
+    elif framework == 'non-smooth':
+        # Non-smooth with polyhedral-like irregularities: the first half is irregularly scaled
+        base, = _streams(seed, 1)
+        half = num_points // 2
+        for start, stop in _chunk_bounds(num_points, chunk_size):
+            cloud = base.random((stop - start, dimension))
+            cloud[:max(0, min(stop, half) - start)] *= complexity * 0.1
+            yield cloud
+    elif framework == 'fractal':
+        # Fractal-like structure: num_points distinct vertices of the gasket spanned by a random simplex,
+        # at depth `complexity` or the first deeper one with enough vertices, sampled lazily by rank
+        base, paths = _streams(seed, 2)
+        corners = base.random((3, dimension))  # Initial simplex
+        depth = complexity
+        while gasket_vertex_count(3, depth) < num_points:
+            depth += 1
+        ranks = _sample_gasket_ranks(paths, 3, depth, num_points)
+        for start, stop in _chunk_bounds(num_points, chunk_size):
+            yield (_decode_gasket_ranks(ranks[start:stop], 3, depth) / 2.0 ** depth) @ corners
+    elif framework == 'hybrid':
+        # Hybrid combining singularities with non-smooth and fractal structures
+        singular_seed, fractal_seed = spawn_seeds(seed, 2)
+        yield from iter_synthetic_cloud('singular', num_points // 2, dimension, complexity, chunk_size, singular_seed)
+        yield from iter_synthetic_cloud('fractal', num_points - num_points // 2, dimension, complexity, chunk_size, fractal_seed)
+    elif framework == 'curvature':
+        # Simple curvature effect: rows scaled by sin over [0, pi] along the cloud
+        base, = _streams(seed, 1)
+        step = np.pi / max(num_points - 1, 1)
+        for start, stop in _chunk_bounds(num_points, chunk_size):
+            curvature_weight = np.sin(np.arange(start, stop) * step)
+            yield base.random((stop - start, dimension)) * curvature_weight[:, np.newaxis]
+    elif framework == 'control':
+        # Control random point cloud
+        base, = _streams(seed, 1)
+        for start, stop in _chunk_bounds(num_points, chunk_size):
+            yield base.random((stop - start, dimension))
+    else:
+        raise ValueError(f"Unknown framework: {framework}")
+
+# Function to generate a synthetic point cloud for one of the experiment frameworks
+@timed('generate')
+def synthetic_cloud(framework, num_points, dimension, complexity, seed=None):
+    """Generate a whole synthetic cloud; see `iter_synthetic_cloud` for the arguments."""
+    chunks = iter_synthetic_cloud(framework, num_points, dimension, complexity, chunk_size=max(num_points, 1), seed=seed)
+    return _collect(chunks, dimension)
+
+# Function to write a streamed cloud straight into a memory-mapped .npy file
+def write_cloud_npy(path, chunks, num_points, dimension):
+    """
+    Write chunks from one of the `iter_*` generators into a .npy file without holding the cloud in memory.
+
+    Returns:
+        np.memmap: Read-only memory map of the written rows (fewer than
+        `num_points` if the generator stopped early, e.g. a small gasket).
+    """
+    cloud = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(num_points, dimension))
+    written = 0
+    for chunk in chunks:
+        cloud[written:written + len(chunk)] = chunk
+        written += len(chunk)
+    cloud.flush()
+    del cloud
+    return np.load(path, mmap_mode='r')[:written]
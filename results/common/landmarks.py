@@ -0,0 +1,161 @@
+import numpy as np
+import gudhi
+from ripser import ripser
+
+from common.complexes import flag_simplex_tree
+
+
+class GreedyPermutation:
+    """
+    Farthest-point (maxmin) landmark selection that can be grown in steps.
+
+    Each new landmark is the point farthest from those already chosen. Only one
+    vector of nearest-landmark distances is kept, and it survives between calls
+    to `extend`, so growing the selection from k to m landmarks costs
+    O(n * (m - k)) time and the selection is always a prefix of the same
+    greedy permutation of the cloud.
+    """
+    __slots__ = ('points', 'indices', 'insertion_radii', 'covering_radius', '_squared_norms', '_nearest', '_current')
+
+    def __init__(self, points, seed=None):
+        self.points = np.asarray(points, dtype=np.float64)
+        num_points = len(self.points)
+        self.indices = np.empty(0, dtype=np.int64)
+        self.insertion_radii = np.empty(0)
+        self.covering_radius = np.inf
+        self._squared_norms = np.einsum('ij,ij->i', self.points, self.points)
+        self._nearest = np.full(num_points, np.inf)
+        self._current = 0 if seed is None or num_points == 0 else int(np.random.default_rng(seed).integers(num_points))
+
+    def __len__(self):
+        return len(self.indices)
+
+    def extend(self, num_landmarks):
+        """Grow the selection to `num_landmarks` landmarks (clipped to n); a smaller count is a no-op."""
+        num_landmarks = min(num_landmarks, len(self.points))
+        start = len(self.indices)
+        if num_landmarks <= start:
+            return self
+        indices = np.concatenate((self.indices, np.empty(num_landmarks - start, dtype=np.int64)))
+        insertion_radii = np.concatenate((self.insertion_radii, np.empty(num_landmarks - start)))
+        points, squared_norms, nearest = self.points, self._squared_norms, self._nearest
+        current, radius = self._current, self.covering_radius
+        for k in range(start, num_landmarks):
+            indices[k] = current
+            insertion_radii[k] = radius
+            # |x - c|^2 = |x|^2 - 2 x.c + |c|^2 needs one matrix-vector product per landmark
+            squared = squared_norms - 2.0 * (points @ points[current]) + squared_norms[current]
+            np.minimum(nearest, np.maximum(squared, 0.0), out=nearest)
+            current = int(np.argmax(nearest))
+            radius = np.sqrt(nearest[current])
+        self.indices, self.insertion_radii, self._current, self.covering_radius = indices, insertion_radii, current, radius
+        return self
+
+    def prefix_covering_radius(self, num_landmarks):
+        """Largest distance from any point to the first `num_landmarks` selected landmarks."""
+        if num_landmarks < len(self.indices):
+            return float(self.insertion_radii[num_landmarks])
+        return float(self.covering_radius)
+
+
+# Function to pick landmarks by maxmin (greedy permutation) selection
+def maxmin_landmarks(points, num_landmarks, seed=None):
+    """
+    Select landmarks by farthest-point (maxmin) sampling.
+
+    The selection is a prefix of the greedy permutation of the cloud (see
+    `GreedyPermutation`), computed in O(n) memory and O(n * num_landmarks) time.
+
+    Args:
+        points: Point cloud of shape (n, dimension).
+        num_landmarks: Number of landmarks to select (clipped to n).
+        seed: Seed for choosing the first landmark; None starts from point 0.
+
+    Returns:
+        tuple: (indices, insertion_radii, covering_radius) where insertion_radii[k]
+        is the distance of landmark k to the earlier landmarks and covering_radius
+        is the largest distance from any point to its nearest landmark.
+    """
+    permutation = GreedyPermutation(points, seed=seed).extend(num_landmarks)
+    return permutation.indices, permutation.insertion_radii, permutation.covering_radius
+
+# Describe how a landmark complex approximates the complex on all points
+def landmark_report(num_points, indices, covering_radius, method):
+    """
+    Summarize a landmark selection.
+
+    For Rips complexes on a landmark subset L of X the Gromov-Hausdorff distance
+    is at most the covering radius, so the bottleneck distance between the two
+    Rips diagrams is at most twice the covering radius. No comparable additive
+    bound is reported for witness complexes.
+    """
+    return {'num_points': num_points, 'num_landmarks': len(indices), 'method': method,
+            'covering_radius': float(covering_radius),
+            'bottleneck_bound': 2.0 * float(covering_radius) if method == 'rips' else None}
+
+# Function to build a Rips (or landmark) simplex tree with an optional landmark mode
+def rips_simplex_tree(points, max_edge_length, max_dimension, num_landmarks=None, method='rips', seed=None,
+                      collapse=True, sparse=None, memory_budget=None, budget_policy='threshold'):
+    """
+    Build a gudhi simplex tree on all points or, in landmark mode, on a maxmin subset.
+
+    Args:
+        points: Point cloud of shape (n, dimension).
+        max_edge_length: Rips threshold (for 'witness', the alpha limit is its square).
+        max_dimension: Maximum simplex dimension of the complex.
+        num_landmarks: None for the full Rips complex; otherwise the number of landmarks.
+        method: 'rips' for the Rips complex on the landmarks, 'witness' for gudhi's
+            Euclidean strong witness complex with every point as a witness.
+        seed: Seed for the first landmark.
+        collapse, sparse, memory_budget, budget_policy: Rips construction options, see
+            `common.complexes.flag_simplex_tree` (the budget does not apply to 'witness').
+
+    Returns:
+        tuple: (simplex_tree, report) where report holds the covering radius, for
+        'rips' the bottleneck bound 2 * covering_radius (0 in full mode), and the
+        construction statistics of the Rips complex.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if num_landmarks is None or num_landmarks >= len(points):
+        simplex_tree, stats = flag_simplex_tree(points, max_edge_length, max_dimension, collapse=collapse, sparse=sparse,
+                                                 memory_budget=memory_budget, budget_policy=budget_policy)
+        report = landmark_report(len(points), np.arange(len(points)), 0.0, 'rips')
+        report['construction'] = stats
+        return simplex_tree, report
+
+    indices, _, covering_radius = maxmin_landmarks(points, num_landmarks, seed=seed)
+    landmarks = points[indices]
+    report = landmark_report(len(points), indices, covering_radius, method)
+    if method == 'rips':
+        simplex_tree, report['construction'] = flag_simplex_tree(landmarks, max_edge_length, max_dimension, collapse=collapse, sparse=sparse,
+                                                                 memory_budget=memory_budget, budget_policy=budget_policy)
+    elif method == 'witness':
+        witness_complex = gudhi.EuclideanStrongWitnessComplex(witnesses=points, landmarks=landmarks)
+        simplex_tree = witness_complex.create_simplex_tree(max_alpha_square=max_edge_length ** 2, limit_dimension=max_dimension)
+        report['construction'] = {'mode': 'witness', 'num_simplices': simplex_tree.num_simplices(),
+                                  'simplices_by_dimension': simplex_tree.num_simplices_by_dimension()}
+    else:
+        raise ValueError("Invalid landmark method. Use 'rips' or 'witness'.")
+    return simplex_tree, report
+
+# Function to run ripser on all points or on a maxmin landmark subset
+def landmark_ripser(points, num_landmarks=None, seed=None, **ripser_kwargs):
+    """
+    Run ripser on the full cloud or, when `num_landmarks` is set, on its maxmin landmarks.
+
+    Returns:
+        tuple: (ripser result dict, report) with the same report fields as `rips_simplex_tree`.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if num_landmarks is None or num_landmarks >= len(points):
+        return ripser(points, **ripser_kwargs), landmark_report(len(points), np.arange(len(points)), 0.0, 'rips')
+
+    indices, _, covering_radius = maxmin_landmarks(points, num_landmarks, seed=seed)
+    return ripser(points[indices], **ripser_kwargs), landmark_report(len(points), indices, covering_radius, 'rips')
+
+# One-line description of a landmark report for the suite printouts
+def describe_landmarks(report):
+    """Format a landmark report as a single human-readable line."""
+    bound = f"{report['bottleneck_bound']:.4f}" if report['bottleneck_bound'] is not None else "n/a"
+    return (f"Landmark mode ({report['method']}): {report['num_landmarks']} of {report['num_points']} points, "
+            f"covering radius {report['covering_radius']:.4f}, bottleneck bound {bound}")
@@ -0,0 +1,274 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Environment variable naming the local price store directory
+PRICE_STORE_ENV = 'PH_PRICE_STORE'
+
+# Price field stored when none is given (the one the stock suite analyses)
+DEFAULT_FIELD = 'Adj Close'
+
+# Name of the JSON file listing the symbols, fields, per-symbol date coverage and current data version of a store
+MANIFEST_NAME = 'manifest.json'
+
+# Prefix of the subdirectories holding one version of a store's data files
+VERSION_PREFIX = 'version_'
+
+
+# File name of one field's column matrix
+def _field_file(field):
+    return re.sub(r'[^A-Za-z0-9]+', '_', field).strip('_').lower() + '.npy'
+
+# Union of two [first, last) coverage ranges, or the newer one if they leave a gap between them
+def _merge_coverage(old, new):
+    if None in old:
+        return new
+    if None in new:
+        return old
+    if np.datetime64(new[0]) > np.datetime64(old[1]) or np.datetime64(old[0]) > np.datetime64(new[1]):
+        return new
+    return [min(old[0], new[0]), max(old[1], new[1])]
+
+# Number of a version directory name, or None for other entries of the store
+def _version_number(name):
+    digits = name[len(VERSION_PREFIX):]
+    return int(digits) if name.startswith(VERSION_PREFIX) and digits.isdigit() else None
+
+# Claim the next free version directory; os.mkdir fails on an existing one, so concurrent
+# ingests that pick the same number move on to the next instead of sharing a directory
+def _create_version_directory(directory):
+    numbers = [_version_number(name) for name in os.listdir(directory)]
+    number = max((n for n in numbers if n is not None), default=0) + 1
+    while True:
+        version = f"{VERSION_PREFIX}{number:06d}"
+        try:
+            os.mkdir(os.path.join(directory, version))
+            return version, os.path.join(directory, version)
+        except FileExistsError:
+            number += 1
+
+# Write the manifest to a temporary file and rename it over the current one
+def _write_manifest(directory, manifest):
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, os.path.join(directory, MANIFEST_NAME))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+# Function to read one symbol's price table from a CSV or Parquet file
+def read_price_file(path):
+    """
+    Read a price table (e.g. a Yahoo Finance CSV export) into a DataFrame indexed by date.
+
+    The date is taken from a 'Date'/'Datetime' column, or from the first column;
+    Parquet files need pandas' optional pyarrow or fastparquet engine.
+    """
+    if path.endswith(('.parquet', '.pq')):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path)
+    if not isinstance(frame.index, pd.DatetimeIndex):
+        date_column = next((c for c in frame.columns if str(c).lower() in ('date', 'datetime')), frame.columns[0])
+        frame = frame.set_index(pd.to_datetime(frame.pop(date_column)))
+    return frame
+
+
+class PriceStore:
+    """
+    Local columnar store of daily prices, memory-mapped on read.
+
+    A store is a directory holding a JSON manifest and versioned data
+    subdirectories. A version holds the sorted union of all trading dates
+    (`dates.npy`, datetime64[D]) and one float64 (dates x symbols) matrix per
+    price field saved in column-major order so every symbol's history is one
+    contiguous column (NaN where a symbol has no quote). The manifest lists the
+    symbols, fields, the date range each symbol covers and the current version.
+    Symbols and dates are looked up by index, so an aligned matrix for any
+    symbols and date range is a single slice of the memory map.
+
+    `ingest` writes a complete new version and then renames a new manifest over
+    the old one, so the swap is a single atomic step: readers see either the
+    old store or the new one, never a mix. The previous version is kept for
+    readers that opened it just before the swap; older ones are removed.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+        self.symbols = manifest['symbols']
+        self.fields = manifest['fields']
+        self.coverage = manifest['coverage']
+        self.version = manifest['version']
+        self.data_directory = os.path.join(directory, self.version)
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.dates = np.load(os.path.join(self.data_directory, 'dates.npy'), mmap_mode='r')
+        self._matrices = {}
+
+    @staticmethod
+    def exists(directory):
+        """Whether `directory` holds a store."""
+        return directory is not None and os.path.exists(os.path.join(directory, MANIFEST_NAME))
+
+    @classmethod
+    def ingest(cls, directory, frames, fields=(DEFAULT_FIELD,), start=None, end=None):
+        """
+        Write price tables into the store at `directory` and return it.
+
+        Args:
+            directory: Store directory (created if needed).
+            frames: Mapping of symbol to a DataFrame indexed by date (or to a CSV/Parquet
+                path read with `read_price_file`). Rows of a symbol already stored are
+                merged with its stored history, the new quotes winning on shared dates.
+            fields: Price columns to store; a missing 'Adj Close' falls back to 'Close'.
+            start, end: Date range [start, end) the tables were requested for; defaults to
+                the first and the day after the last date. A symbol's coverage becomes the
+                union of this range and its stored one (the new range alone if they are disjoint).
+        """
+        existing = cls(directory) if cls.exists(directory) else None
+        fields = list(fields) if existing is None else list(dict.fromkeys(existing.fields + list(fields)))
+
+        series, coverage = {}, {}
+        if existing is not None:
+            for symbol in existing.symbols:
+                series[symbol] = {field: existing._stored_series(symbol, field) for field in fields}
+                coverage[symbol] = existing.coverage[symbol]
+        for symbol, frame in frames.items():
+            if isinstance(frame, (str, os.PathLike)):
+                frame = read_price_file(os.fspath(frame))
+            if isinstance(frame.columns, pd.MultiIndex):
+                frame = frame.xs(symbol, axis=1, level=-1) if symbol in frame.columns.get_level_values(-1) else frame.droplevel(-1, axis=1)
+            dates = pd.DatetimeIndex(frame.index).tz_localize(None).values.astype('datetime64[D]')
+            stored = series.get(symbol, {})
+            columns = {}
+            for field in fields:
+                column = field if field in frame.columns else ('Close' if field == DEFAULT_FIELD and 'Close' in frame.columns else None)
+                values = frame[column].to_numpy(dtype=np.float64) if column is not None else np.full(len(frame), np.nan)
+                values = pd.Series(values, index=dates).dropna()
+                columns[field] = pd.concat([stored[field], values]) if field in stored else values
+            series[symbol] = columns
+            first = str(np.datetime64(start, 'D')) if start is not None else (str(dates.min()) if len(dates) else None)
+            last = str(np.datetime64(end, 'D')) if end is not None else (str(dates.max() + 1) if len(dates) else None)
+            coverage[symbol] = _merge_coverage(coverage[symbol], [first, last]) if symbol in coverage else [first, last]
+
+        symbols = sorted(series)
+        indexes = [values.index.values for columns in series.values() for values in columns.values()]
+        all_dates = np.unique(np.concatenate(indexes)).astype('datetime64[D]') if indexes else np.array([], dtype='datetime64[D]')
+
+        os.makedirs(directory, exist_ok=True)
+        version, version_directory = _create_version_directory(directory)
+        try:
+            np.save(os.path.join(version_directory, 'dates.npy'), all_dates)
+            for field in fields:
+                matrix = np.full((len(all_dates), len(symbols)), np.nan, order='F')
+                for column, symbol in enumerate(symbols):
+                    values = series[symbol][field]
+                    # Later rows win, so re-ingested quotes replace the stored ones on shared dates
+                    values = values[~values.index.duplicated(keep='last')]
+                    matrix[np.searchsorted(all_dates, values.index.values), column] = values.to_numpy()
+                np.save(os.path.join(version_directory, _field_file(field)), matrix)
+        except BaseException:
+            shutil.rmtree(version_directory, ignore_errors=True)
+            raise
+        # Readers only open the version named in the manifest, so this publishes the new one
+        _write_manifest(directory, {'symbols': symbols, 'fields': fields, 'version': version,
+                                    'coverage': {symbol: coverage[symbol] for symbol in symbols}})
+
+        # Keep the new version and the one it replaced; newer numbers may belong to concurrent ingests
+        if existing is not None:
+            replaced = _version_number(existing.version)
+            for name in os.listdir(directory):
+                number = _version_number(name)
+                if number is not None and number < replaced:
+                    shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        return cls(directory)
+
+    def _matrix(self, field):
+        if field not in self._matrices:
+            if field not in self.fields:
+                raise KeyError(f"Field {field!r} is not in the store (fields: {self.fields}).")
+            self._matrices[field] = np.load(os.path.join(self.data_directory, _field_file(field)), mmap_mode='r')
+        return self._matrices[field]
+
+    def _stored_series(self, symbol, field):
+        dates = np.asarray(self.dates)
+        values = np.asarray(self._matrix(field)[:, self._columns[symbol]]) if field in self.fields else np.full(len(dates), np.nan)
+        keep = ~np.isnan(values)
+        return pd.Series(values[keep], index=dates[keep])
+
+    def _rows(self, start, end):
+        """Row slice of the dates in [start, end) (end exclusive, like yfinance)."""
+        first = 0 if start is None else int(np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left'))
+        last = len(self.dates) if end is None else int(np.searchsorted(self.dates, np.datetime64(end, 'D'), side='left'))
+        return slice(first, last)
+
+    def missing(self, symbols, start=None, end=None):
+        """The requested symbols that are not in the store, or whose stored range does not cover [start, end)."""
+        def covered(symbol):
+            first, last = self.coverage[symbol]
+            return ((start is None or (first is not None and np.datetime64(first) <= np.datetime64(start, 'D'))) and
+                    (end is None or (last is not None and np.datetime64(end, 'D') <= np.datetime64(last))))
+        return [symbol for symbol in symbols if symbol not in self._columns or not covered(symbol)]
+
+    def matrix(self, symbols=None, start=None, end=None, field=DEFAULT_FIELD, dropna=None):
+        """
+        Aligned (dates x symbols) price matrix in one read.
+
+        Args:
+            symbols: Symbols in the column order wanted (default: all, sorted).
+            start, end: Date range [start, end); None leaves that side open.
+            field: Price field.
+            dropna: None keeps every date (NaN where a symbol has no quote), 'any' keeps
+                dates quoted for every symbol and 'all' drops dates quoted for none.
+
+        Returns:
+            tuple: (dates, symbols, prices) with prices of shape (len(dates), len(symbols)).
+        """
+        symbols = list(self.symbols) if symbols is None else list(symbols)
+        missing = [symbol for symbol in symbols if symbol not in self._columns]
+        if missing:
+            raise KeyError(f"Symbols not in the price store: {missing}")
+        rows = self._rows(start, end)
+        columns = [self._columns[symbol] for symbol in symbols]
+        prices = self._matrix(field)[rows][:, columns]
+        dates = np.asarray(self.dates[rows])
+        if dropna in ('any', 'all'):
+            quoted = ~np.isnan(prices)
+            keep = quoted.all(axis=1) if dropna == 'any' else quoted.any(axis=1)
+            dates, prices = dates[keep], prices[keep]
+        elif dropna is not None:
+            raise ValueError("Invalid dropna. Use None, 'any' or 'all'.")
+        return dates, symbols, prices
+
+    def series(self, symbol, start=None, end=None, field=DEFAULT_FIELD):
+        """One symbol's quoted prices in [start, end), as a read-only view when it has no gaps."""
+        rows = self._rows(start, end)
+        values = self._matrix(field)[rows, self._columns[symbol]]
+        quoted = ~np.isnan(values)
+        return values if quoted.all() else values[quoted]
+
+# Function to build a synthetic stand-in for downloaded price tables
+def synthetic_price_frames(symbols, start, end, seed=None):
+    """
+    Geometric random-walk daily prices on business days in [start, end), one DataFrame per symbol.
+
+    A deterministic offline fixture for ingesting into a `PriceStore` where the
+    network is unavailable; the values are not real market data.
+    """
+    dates = pd.bdate_range(start, end, inclusive='left')
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for symbol in symbols:
+        returns = rng.normal(0.0002, 0.012, len(dates))
+        close = 100.0 * np.exp(np.cumsum(returns))
+        frames[symbol] = pd.DataFrame({'Close': close, DEFAULT_FIELD: close}, index=dates)
+    return frames
@@ -0,0 +1,205 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then reported as None
+    resource = None
+
+# Environment variable naming the JSON-lines file that receives one record per run; unset means no output
+PROFILE_LOG_ENV = 'PH_PROFILE_LOG'
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+# The profile that module-level `stage`, `timed` and `record` report to, if any
+_active_profile = None
+
+
+# Resident set size of this process right now, in bytes (None where it cannot be read)
+def _current_rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return _peak_rss()
+
+# Function to make numpy scalars and arrays in records JSON-serializable
+def json_default(value):
+    """`default` hook for json.dump: numpy values become lists or Python scalars, anything else its str()."""
+    return value.tolist() if hasattr(value, 'tolist') else str(value)
+
+# High-water mark of the resident set size of this process, in bytes (None without the resource module)
+def _peak_rss():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+# Largest of the memory readings that are available, or None if none is
+def _max_known(*values):
+    return max((value for value in values if value is not None), default=None)
+
+
+class RunProfile:
+    """
+    Low-overhead profile of one experiment run, emitted as a single JSON record.
+
+    Stages are timed with `stage()` (a context manager) or `timed()` (a decorator);
+    repeated stages are aggregated into call counts, wall and CPU seconds and the
+    peak RSS seen while they were open. The peak comes from the process
+    high-water mark when a stage raises it; with `sample_interval` a background
+    thread also samples the current RSS so stages below an earlier high-water
+    mark get their own peak. `record()` attaches counts such as simplices and
+    intervals per dimension.
+
+    Used as a context manager the profile becomes the active one, so library code
+    reports into it through the module-level `stage`, `timed` and `record`; on
+    exit the record is appended to `path` (default $PH_PROFILE_LOG) as one JSON line.
+    Flat scripts can call `start()` and `finish()` instead of using a `with` block.
+    """
+
+    def __init__(self, name, path=None, sample_interval=None, **metadata):
+        self.name = name
+        self.path = path if path is not None else os.environ.get(PROFILE_LOG_ENV)
+        self.sample_interval = sample_interval
+        self.metadata = metadata
+        self.stages = {}
+        self.records = []
+        self._open = []
+        self._lock = threading.Lock()
+        self._sampler = None
+        self._stop = threading.Event()
+        self._previous = None
+        self._started = None
+        self._start_time = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(failed=exc_type is not None)
+        return False
+
+    def start(self):
+        """Activate the profile and start its clock."""
+        global _active_profile
+        self._previous, _active_profile = _active_profile, self
+        self._started = datetime.now(timezone.utc).isoformat()
+        self._start_time = time.perf_counter()
+        if self.sample_interval:
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+        return self
+
+    def finish(self, failed=False):
+        """Deactivate the profile and append its record to `path`, if any."""
+        global _active_profile
+        _active_profile = self._previous
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+        self.wall_seconds = time.perf_counter() - self._start_time
+        self.failed = failed
+        if self.path:
+            self.write(self.path)
+
+    def _sample(self):
+        while not self._stop.wait(self.sample_interval):
+            rss = _current_rss()
+            with self._lock:
+                for entry in self._open:
+                    entry['peak'] = _max_known(entry['peak'], rss)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time one stage; yields a dict whose 'seconds' is filled in when the stage ends.
+
+        A stage opened again while it is already open (e.g. a generator calling
+        another generator) is only timed by the outermost call.
+        """
+        if any(entry['name'] == name for entry in self._open):
+            wall = time.perf_counter()
+            entry = {}
+            yield entry
+            entry['seconds'] = time.perf_counter() - wall
+            return
+        entry = {'name': name, 'peak': _current_rss(), 'high_water': _peak_rss()}
+        with self._lock:
+            self._open.append(entry)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield entry
+        finally:
+            entry['seconds'] = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            high_water = _peak_rss()
+            with self._lock:
+                self._open.remove(entry)
+            grown = high_water is not None and high_water > entry['high_water']
+            peak = _max_known(entry['peak'], _current_rss(), high_water if grown else None)
+            totals = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'cpu_seconds': 0.0, 'peak_rss_bytes': None})
+            totals['calls'] += 1
+            totals['seconds'] += entry['seconds']
+            totals['cpu_seconds'] += cpu
+            totals['peak_rss_bytes'] = _max_known(totals['peak_rss_bytes'], peak)
+
+    def timed(self, name):
+        """Decorator form of `stage`."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, kind, **fields):
+        """Attach a structured record (e.g. simplex or interval counts) to the run."""
+        self.records.append({'kind': kind, **fields})
+
+    def to_record(self):
+        """The run as one JSON-serializable dict."""
+        return {'run': self.name, 'started': self._started, 'wall_seconds': getattr(self, 'wall_seconds', None),
+                'failed': getattr(self, 'failed', None), 'peak_rss_bytes': _peak_rss(), 'pid': os.getpid(),
+                **self.metadata, 'stages': self.stages, 'records': self.records}
+
+    def write(self, path):
+        """Append the run record to a JSON-lines file in a single write."""
+        line = json.dumps(self.to_record(), default=json_default) + '\n'
+        with open(path, 'a') as f:
+            f.write(line)
+
+
+# Function to time a stage in the active profile (a no-op timer when none is active)
+@contextmanager
+def stage(name):
+    if _active_profile is None:
+        entry = {}
+        wall = time.perf_counter()
+        yield entry
+        entry['seconds'] = time.perf_counter() - wall
+    else:
+        with _active_profile.stage(name) as entry:
+            yield entry
+
+# Decorator that times every call of a function as a stage of the active profile
+def timed(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Function to attach a record to the active profile, if any
+def record(kind, **fields):
+    if _active_profile is not None:
+        _active_profile.record(kind, **fields)
@@ -0,0 +1,214 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+
+from common.generators import spawn_seeds
+from common.profiling import timed
+
+# Resamples drawn per task; fixed so results depend only on the seed, not on the worker count
+DEFAULT_SHARD_SIZE = 1000
+
+# Below this many resampled values (resamples x sample size) the pool start-up costs more than it saves
+_PARALLEL_MIN_WORK = 20000000
+
+
+# Statistics of a batch of resampled samples, one sample per row
+def _mean(samples):
+    return samples.mean(axis=1)
+
+def _std(samples):
+    return samples.std(axis=1, ddof=1) if samples.shape[1] > 1 else np.full(len(samples), np.nan)
+
+def _median(samples):
+    return np.median(samples, axis=1)
+
+def _max(samples):
+    return samples.max(axis=1)
+
+def _min(samples):
+    return samples.min(axis=1)
+
+# Two-sample statistics on row-aligned batches
+def _mean_difference(first, second):
+    return first.mean(axis=1) - second.mean(axis=1)
+
+# Standardize a difference, with NaN where the spread is zero (e.g. a resample repeating one value)
+def _standardized(difference, spread):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(spread > 0, difference / spread, np.nan)
+
+def _welch_t(first, second):
+    if min(first.shape[1], second.shape[1]) < 2:
+        return np.full(len(first), np.nan)
+    variance = first.var(axis=1, ddof=1) / first.shape[1] + second.var(axis=1, ddof=1) / second.shape[1]
+    return _standardized(_mean_difference(first, second), np.sqrt(variance))
+
+def _cohens_d(first, second):
+    if min(first.shape[1], second.shape[1]) < 2:
+        return np.full(len(first), np.nan)
+    pooled = np.sqrt((first.var(axis=1, ddof=1) + second.var(axis=1, ddof=1)) / 2)
+    return _standardized(_mean_difference(first, second), pooled)
+
+ONE_SAMPLE_STATISTICS = {'mean': _mean, 'std': _std, 'median': _median, 'max': _max, 'min': _min}
+TWO_SAMPLE_STATISTICS = {'mean_difference': _mean_difference, 'welch_t': _welch_t, 'cohens_d': _cohens_d}
+
+
+# Evaluate a batch of resamples of one kind from a single independent stream
+def _resample_shard(kind, arrays, statistic, count, seed):
+    """
+    Draw `count` resamples as one index (or sign) matrix and reduce them in one vectorized call.
+
+    kinds: 'bootstrap' (one sample with replacement), 'bootstrap2' (two samples,
+    each with replacement), 'permutation' (relabel the pooled samples) and
+    'sign_flip' (paired differences with random signs).
+    """
+    rng = np.random.default_rng(seed)
+    if kind == 'bootstrap':
+        sample, = arrays
+        return ONE_SAMPLE_STATISTICS[statistic](sample[rng.integers(0, len(sample), size=(count, len(sample)))])
+    if kind == 'bootstrap2':
+        first, second = arrays
+        return TWO_SAMPLE_STATISTICS[statistic](first[rng.integers(0, len(first), size=(count, len(first)))],
+                                                second[rng.integers(0, len(second), size=(count, len(second)))])
+    if kind == 'permutation':
+        first, second = arrays
+        pooled = np.concatenate((first, second))
+        labels = rng.permuted(np.tile(np.arange(len(pooled)), (count, 1)), axis=1)
+        return TWO_SAMPLE_STATISTICS[statistic](pooled[labels[:, :len(first)]], pooled[labels[:, len(first):]])
+    if kind == 'sign_flip':
+        differences, = arrays
+        signs = rng.choice(np.array([-1.0, 1.0]), size=(count, len(differences)))
+        return ONE_SAMPLE_STATISTICS[statistic](signs * differences)
+    raise ValueError(f"Unknown resampling kind: {kind}")
+
+# Draw many resamples in fixed-size shards, optionally across processes
+def _resample(kind, arrays, statistic, num_resamples, seed, max_workers, shard_size):
+    """
+    Statistic values of `num_resamples` resamples, in shard order.
+
+    Each shard gets its own child seed from `spawn_seeds`, so the output depends
+    only on `seed` and `shard_size`, whatever the number of workers.
+    """
+    counts = [min(shard_size, num_resamples - start) for start in range(0, num_resamples, shard_size)]
+    seeds = spawn_seeds(seed, len(counts))
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    work = num_resamples * sum(len(array) for array in arrays)
+    if max_workers == 1 or len(counts) <= 1 or work < _PARALLEL_MIN_WORK:
+        return np.concatenate([_resample_shard(kind, arrays, statistic, count, s) for count, s in zip(counts, seeds)])
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_resample_shard, kind, arrays, statistic, count, s) for count, s in zip(counts, seeds)]
+        return np.concatenate([future.result() for future in futures])
+
+# Percentile interval of a resampled distribution
+def _interval(observed, values, confidence):
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return {'statistic': float(observed), 'low': np.nan, 'high': np.nan, 'std_error': np.nan}
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(values, [tail, 100 - tail])
+    return {'statistic': float(observed), 'low': float(low), 'high': float(high), 'std_error': float(values.std(ddof=1))}
+
+# Count the null values at least as extreme as the observed statistic
+def _num_extreme(observed, null, alternative):
+    if alternative == 'two-sided':
+        return int(np.count_nonzero(np.abs(null) >= abs(observed)))
+    if alternative == 'greater':
+        return int(np.count_nonzero(null >= observed))
+    if alternative == 'less':
+        return int(np.count_nonzero(null <= observed))
+    raise ValueError("Invalid alternative. Use 'two-sided', 'greater' or 'less'.")
+
+# Turn a sampled null distribution into a p-value for the observed statistic (NaN if the statistic is undefined)
+def _p_value(observed, null, alternative):
+    if np.isnan(observed):
+        return np.nan
+    return (1 + _num_extreme(observed, null, alternative)) / (1 + len(null))
+
+# Function to compute a bootstrap confidence interval for a one-sample statistic
+@timed('statistics')
+def bootstrap_ci(sample, statistic='mean', num_resamples=2000, confidence=0.95, seed=None, max_workers=None,
+                 shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Percentile bootstrap confidence interval for a statistic of one sample (e.g. lifespans).
+
+    Args:
+        sample: 1D array of observations.
+        statistic: Name from ONE_SAMPLE_STATISTICS ('mean', 'std', 'median', 'max', 'min').
+        num_resamples: Number of bootstrap resamples.
+        confidence: Coverage of the interval.
+        seed: Seed (int or SeedSequence) of the resampling streams.
+        max_workers: Process pool size for large jobs; 1 always runs in this process.
+        shard_size: Resamples per shard (each shard has its own stream).
+
+    Returns:
+        dict: statistic, low, high and std_error (NaN if the sample is empty).
+    """
+    sample = np.asarray(sample, dtype=np.float64)
+    if len(sample) == 0:
+        return {'statistic': np.nan, 'low': np.nan, 'high': np.nan, 'std_error': np.nan}
+    observed = ONE_SAMPLE_STATISTICS[statistic](sample[None, :])[0]
+    values = _resample('bootstrap', (sample,), statistic, num_resamples, seed, max_workers, shard_size)
+    return _interval(observed, values, confidence)
+
+# Function to compute a bootstrap confidence interval for a two-sample statistic
+@timed('statistics')
+def bootstrap_difference_ci(first, second, statistic='mean_difference', num_resamples=2000, confidence=0.95, seed=None,
+                            max_workers=None, shard_size=DEFAULT_SHARD_SIZE):
+    """Percentile bootstrap interval for 'mean_difference', 'welch_t' or 'cohens_d', resampling each sample separately."""
+    first, second = np.asarray(first, dtype=np.float64), np.asarray(second, dtype=np.float64)
+    if len(first) == 0 or len(second) == 0:
+        return {'statistic': np.nan, 'low': np.nan, 'high': np.nan, 'std_error': np.nan}
+    observed = TWO_SAMPLE_STATISTICS[statistic](first[None, :], second[None, :])[0]
+    values = _resample('bootstrap2', (first, second), statistic, num_resamples, seed, max_workers, shard_size)
+    return _interval(observed, values, confidence)
+
+# Function to run a two-sample permutation test
+@timed('statistics')
+def permutation_test(first, second, statistic='mean_difference', num_permutations=9999, alternative='two-sided', seed=None,
+                     max_workers=None, shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Permutation test of exchangeability between two independent samples.
+
+    Every permutation relabels the pooled observations; rows of the label matrix
+    are evaluated together. The p-value is (1 + #extreme) / (1 + num_permutations).
+
+    Returns:
+        dict: statistic, p_value, num_permutations and alternative (NaN statistic
+        and p-value if a sample is empty or the statistic is undefined).
+    """
+    first, second = np.asarray(first, dtype=np.float64), np.asarray(second, dtype=np.float64)
+    if len(first) == 0 or len(second) == 0:
+        return {'statistic': np.nan, 'p_value': np.nan, 'num_permutations': 0, 'alternative': alternative}
+    observed = TWO_SAMPLE_STATISTICS[statistic](first[None, :], second[None, :])[0]
+    null = _resample('permutation', (first, second), statistic, num_permutations, seed, max_workers, shard_size)
+    return {'statistic': float(observed), 'p_value': _p_value(observed, null, alternative),
+            'num_permutations': num_permutations, 'alternative': alternative}
+
+# Function to run a paired sign-flip permutation test
+@timed('statistics')
+def paired_permutation_test(first, second, num_permutations=9999, alternative='two-sided', seed=None, max_workers=None,
+                            shard_size=DEFAULT_SHARD_SIZE):
+    """
+    Sign-flip test of a zero mean paired difference.
+
+    When 2^n sign patterns are no more than `num_permutations`, all of them are
+    enumerated and the p-value is exact. Pairs with a non-finite difference are
+    dropped; if none remain, the statistic and p-value are NaN.
+    """
+    with np.errstate(invalid='ignore'):
+        differences = np.asarray(first, dtype=np.float64) - np.asarray(second, dtype=np.float64)
+    differences = differences[np.isfinite(differences)]
+    if len(differences) == 0:
+        return {'statistic': np.nan, 'p_value': np.nan, 'num_permutations': 0, 'alternative': alternative, 'exact': False}
+    observed = differences.mean()
+    if 2 ** len(differences) <= num_permutations:
+        signs = np.array(list(product((-1.0, 1.0), repeat=len(differences))))
+        null = (signs * differences).mean(axis=1)
+        return {'statistic': float(observed), 'p_value': _num_extreme(observed, null, alternative) / len(null),
+                'num_permutations': len(null), 'alternative': alternative, 'exact': True}
+    null = _resample('sign_flip', (differences,), 'mean', num_permutations, seed, max_workers, shard_size)
+    return {'statistic': float(observed), 'p_value': _p_value(observed, null, alternative),
+            'num_permutations': num_permutations, 'alternative': alternative, 'exact': False}
@@ -0,0 +1,196 @@
+import heapq
+
+import numpy as np
+
+from common.distances import _finite_pairs, _pair_distance
+
+# Relative slack applied to the lower bounds so rounding never prunes a true neighbour
+_BOUND_SLACK = 1e-9
+
+# Normalize a diagram collection the same way `distance_matrix` does
+def _collection_pairs(diagrams, dims):
+    plain_arrays = any(isinstance(diagram, np.ndarray) and diagram.ndim == 2 for diagram in diagrams)
+    return [_finite_pairs(diagram, dims) for diagram in diagrams], [None] if plain_arrays else list(dims)
+
+# Project diagram points and their diagonal projections onto each slicing direction
+def _project(pairs, directions):
+    """Return (points @ directions, diagonal projections @ directions), each of shape (n, num_directions)."""
+    diagonal = np.repeat(pairs.mean(axis=1, keepdims=True), 2, axis=1)
+    return pairs @ directions, diagonal @ directions
+
+# One-dimensional p-Wasserstein distance per direction between two projected diagrams
+def _sliced_costs(first, second, order):
+    """
+    Per-direction distances between two projected diagrams.
+
+    Each diagram is augmented with the diagonal projections of the other so both
+    sides have the same size, after which the sorted matching is optimal in 1D
+    for every order, including order = inf (bottleneck).
+    """
+    points_a, diagonal_a = first
+    points_b, diagonal_b = second
+    if len(points_a) + len(points_b) == 0:
+        return np.zeros(points_a.shape[1])
+    left = np.sort(np.vstack((points_a, diagonal_b)), axis=0)
+    right = np.sort(np.vstack((points_b, diagonal_a)), axis=0)
+    gaps = np.abs(left - right)
+    if np.isinf(order):
+        return gaps.max(axis=0)
+    return (gaps ** order).sum(axis=0) ** (1.0 / order)
+
+# Persistence image of one diagram on a fixed grid
+def _persistence_image(pairs, birth_grid, persistence_grid, bandwidth):
+    """Gaussian persistence image in (birth, persistence) coordinates, weighted linearly by persistence."""
+    if len(pairs) == 0:
+        return np.zeros(len(birth_grid) * len(persistence_grid))
+    births, persistence = pairs[:, 0], pairs[:, 1] - pairs[:, 0]
+    # The Gaussian is separable, so the image is one (resolution x n) @ (n x resolution) product
+    birth_kernel = np.exp(-(birth_grid[None, :] - births[:, None]) ** 2 / (2 * bandwidth ** 2))
+    persistence_kernel = np.exp(-(persistence_grid[None, :] - persistence[:, None]) ** 2 / (2 * bandwidth ** 2))
+    return ((birth_kernel * persistence[:, None]).T @ persistence_kernel).ravel()
+
+# Merge per-dimension distances like `distance_matrix(combine=True)`
+def _combine(per_dim, metric, order):
+    per_dim = np.asarray(per_dim)
+    if metric == 'bottleneck':
+        return per_dim.max(axis=0)
+    return (per_dim ** order).sum(axis=0) ** (1.0 / order)
+
+
+class DiagramIndex:
+    """
+    Screening index for nearest-neighbour queries over a persistence diagram collection.
+
+    Two cheap tiers are precomputed for every diagram:
+
+    * Sliced projections onto `num_directions` evenly spaced unit directions. For
+      each direction the 1D distance of the augmented projections lower-bounds
+      the exact distance: W_p >= W_p(theta) / (sqrt(2) * 2^(1/p)) for the
+      Wasserstein distance with L-inf ground metric, and bottleneck >=
+      W_inf(theta) / sqrt(2). The bound is the maximum over directions, and the
+      mean over directions is the sliced-distance estimate.
+    * Persistence images on a grid shared by the whole collection, whose L2
+      distances give an approximate ranking without any guarantee.
+
+    `query` computes exact distances (gudhi) only for diagrams whose lower bound
+    can still beat the current k-th best, so its top-k is exact while most of
+    the collection is pruned by the screening tier.
+    """
+
+    def __init__(self, diagrams, dims=(0, 1), num_directions=50, image_resolution=20, image_bandwidth=None):
+        self.pairs, self.slots = _collection_pairs(diagrams, dims)
+        self.dims = dims
+        angles = np.linspace(-np.pi / 2, np.pi / 2, num_directions, endpoint=False)
+        self.directions = np.vstack((np.cos(angles), np.sin(angles)))
+        self.projections = [[_project(pairs, self.directions) for pairs in diagram_pairs] for diagram_pairs in self.pairs]
+
+        # One persistence-image grid per dimension, spanning the whole collection
+        self.image_grids = []
+        for slot in range(len(self.slots)):
+            stacked = np.vstack([diagram_pairs[slot] for diagram_pairs in self.pairs] + [np.zeros((0, 2))])
+            if len(stacked) == 0:
+                stacked = np.zeros((1, 2))
+            persistence = stacked[:, 1] - stacked[:, 0]
+            birth_grid = np.linspace(stacked[:, 0].min(), stacked[:, 0].max(), image_resolution)
+            persistence_grid = np.linspace(0.0, persistence.max(), image_resolution)
+            bandwidth = image_bandwidth
+            if bandwidth is None:
+                spread = max(np.ptp(birth_grid), np.ptp(persistence_grid))
+                bandwidth = spread / image_resolution if spread > 0 else 1.0
+            self.image_grids.append((birth_grid, persistence_grid, bandwidth))
+        self.images = np.array([self._image(diagram_pairs) for diagram_pairs in self.pairs])
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def _image(self, diagram_pairs):
+        return np.concatenate([_persistence_image(pairs, *grid) for pairs, grid in zip(diagram_pairs, self.image_grids)])
+
+    def _query_pairs(self, diagram):
+        diagram_pairs = _finite_pairs(diagram, self.dims)
+        if len(diagram_pairs) != len(self.slots):
+            raise ValueError("Query diagram does not match the representation of the indexed collection.")
+        return diagram_pairs
+
+    def screen(self, diagram, metric='wasserstein', order=1.0):
+        """
+        Sliced screening distances from one diagram to every indexed diagram.
+
+        Returns:
+            tuple: (estimates, lower_bounds) arrays of length len(self); the lower
+            bounds never exceed the exact combined distance.
+        """
+        if metric not in ('bottleneck', 'wasserstein'):
+            raise ValueError("Invalid metric. Use 'bottleneck' or 'wasserstein'.")
+        p = np.inf if metric == 'bottleneck' else order
+        factor = np.sqrt(2.0) * (1.0 if np.isinf(p) else 2.0 ** (1.0 / p))
+        query = [_project(pairs, self.directions) for pairs in self._query_pairs(diagram)]
+
+        estimates = np.empty((len(self.slots), len(self)))
+        bounds = np.empty((len(self.slots), len(self)))
+        for i, projections in enumerate(self.projections):
+            for slot in range(len(self.slots)):
+                costs = _sliced_costs(query[slot], projections[slot], p)
+                estimates[slot, i] = costs.mean()
+                bounds[slot, i] = costs.max() / factor
+        return _combine(estimates, metric, order), _combine(bounds, metric, order) * (1.0 - _BOUND_SLACK)
+
+    def image_distances(self, diagram):
+        """L2 distances between the persistence image of `diagram` and every indexed image."""
+        image = self._image(self._query_pairs(diagram))
+        return np.sqrt(((self.images - image) ** 2).sum(axis=1))
+
+    def exact_distance(self, diagram, i, metric='wasserstein', order=1.0):
+        """Exact combined distance between `diagram` and indexed diagram `i`."""
+        query = self._query_pairs(diagram)
+        per_dim = [_pair_distance(query[slot], self.pairs[i][slot], metric, order) for slot in range(len(self.slots))]
+        return float(_combine(per_dim, metric, order))
+
+    def query(self, diagram, k=1, metric='wasserstein', order=1.0, screen='sliced', candidates=None, exclude=()):
+        """
+        Find the k indexed diagrams closest to `diagram`.
+
+        Args:
+            diagram: Query diagram in any representation accepted by `distance_matrix`.
+            k: Number of neighbours to return.
+            metric: 'bottleneck' or 'wasserstein' (exact distances from gudhi).
+            order: Wasserstein order p.
+            screen: 'sliced' refines candidates in lower-bound order and stops once no
+                bound can beat the k-th best, so the result is exact. 'image' refines
+                only the `candidates` closest persistence images, which is approximate.
+            candidates: Number of image-screened diagrams to refine (default 4 * k).
+            exclude: Indices to skip, e.g. the query's own position in the collection.
+
+        Returns:
+            tuple: (indices, distances, stats) with the k nearest indices sorted by exact
+            distance and a dict counting exact evaluations and pruned diagrams.
+        """
+        excluded = set(int(i) for i in exclude)
+        if screen == 'sliced':
+            _, bounds = self.screen(diagram, metric, order)
+            ranking = np.argsort(bounds, kind='stable')
+        elif screen == 'image':
+            bounds = None
+            ranking = np.argsort(self.image_distances(diagram), kind='stable')[:candidates or 4 * k + len(excluded)]
+        else:
+            raise ValueError("Invalid screen. Use 'sliced' or 'image'.")
+
+        best = []  # Max-heap of (-distance, index) holding the current top k
+        evaluations = 0
+        for i in ranking:
+            i = int(i)
+            if i in excluded:
+                continue
+            if bounds is not None and len(best) == k and bounds[i] >= -best[0][0]:
+                break
+            distance = self.exact_distance(diagram, i, metric, order)
+            evaluations += 1
+            if len(best) < k:
+                heapq.heappush(best, (-distance, i))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, i))
+
+        ordered = sorted((-neg, i) for neg, i in best)
+        stats = {'screen': screen, 'exact_evaluations': evaluations,
+                 'pruned': len(self) - len(excluded & set(range(len(self)))) - evaluations}
+        return np.array([i for _, i in ordered], dtype=np.int64), np.array([d for d, _ in ordered]), stats
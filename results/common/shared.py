@@ -0,0 +1,169 @@
+import os
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Picklable reference to a registered cloud: a few strings and ints, whatever the size of the cloud
+SharedCloud = namedtuple('SharedCloud', ['name', 'backend', 'location', 'shape', 'dtype'])
+
+# Clouds this process has attached, keyed by location, so repeated attaches reuse one mapping
+_attached = {}
+
+
+class SharedCloudRegistry:
+    """
+    Registry of point clouds that worker processes can read without copying.
+
+    `register` places a cloud in a POSIX shared-memory block ('shm' backend) or
+    a .npy file in `directory` ('npy' backend, memory-mapped on attach, so the
+    cloud may exceed RAM); `register_npy` adopts an existing .npy file, e.g. one
+    written by `common.generators.write_cloud_npy`. Each returns a small
+    `SharedCloud` handle that is passed to workers instead of the array, and
+    workers call `attach_cloud(handle)` to get a read-only view.
+
+    Used as a context manager the registry releases every cloud on exit: shared
+    blocks are unlinked and .npy files it wrote are deleted (adopted files are
+    kept). Blocks stay valid in workers that still have them attached until
+    those detach or exit.
+    """
+
+    def __init__(self, backend='shm', directory=None):
+        if backend not in ('shm', 'npy'):
+            raise ValueError("Invalid backend. Use 'shm' or 'npy'.")
+        self.backend = backend
+        self.directory = directory
+        self._handles = {}
+        self._owned = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def register(self, name, array):
+        """Copy `array` into shared storage once and return its handle."""
+        if name in self._handles:
+            raise ValueError(f"A cloud named {name!r} is already registered.")
+        array = np.ascontiguousarray(array)
+        if self.backend == 'shm':
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            cloud = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            cloud[...] = array
+            cloud.setflags(write=False)
+            handle = SharedCloud(name, 'shm', block.name, array.shape, array.dtype.str)
+            self._owned[name] = block
+            # This process (and forked workers) read the block through the registry's own mapping
+            _attached[handle.location] = (None, cloud)
+        else:
+            if self.directory is None:
+                self.directory = tempfile.mkdtemp(prefix='shared_clouds_')
+            path = os.path.join(self.directory, f"{name}.npy")
+            np.save(path, array)
+            handle = SharedCloud(name, 'npy', path, array.shape, array.dtype.str)
+            self._owned[name] = path
+        self._handles[name] = handle
+        return handle
+
+    def register_npy(self, name, path):
+        """Adopt an existing .npy file without copying it; the file is not deleted on release."""
+        if name in self._handles:
+            raise ValueError(f"A cloud named {name!r} is already registered.")
+        cloud = np.load(path, mmap_mode='r')
+        handle = SharedCloud(name, 'npy', os.path.abspath(path), cloud.shape, cloud.dtype.str)
+        self._handles[name] = handle
+        return handle
+
+    def handle(self, name):
+        """Return the handle of a registered cloud."""
+        return self._handles[name]
+
+    def release(self, name):
+        """Forget a cloud and free the storage the registry created for it."""
+        handle = self._handles.pop(name)
+        detach_cloud(handle)
+        owned = self._owned.pop(name, None)
+        if isinstance(owned, shared_memory.SharedMemory):
+            owned.unlink()
+            try:
+                owned.close()
+            except BufferError:
+                pass  # Arrays from attach_cloud are still alive here; the mapping goes when they do
+        elif owned is not None and os.path.exists(owned):
+            os.remove(owned)
+
+    def close(self):
+        """Release every registered cloud."""
+        for name in list(self._handles):
+            self.release(name)
+
+
+# Open an existing shared-memory block without making this process responsible for unlinking it
+def _open_block(location):
+    try:
+        return shared_memory.SharedMemory(name=location, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching also registers the block with the resource tracker; pool
+        # workers share the registry process's tracker, where the block is already registered,
+        # so this is a no-op and the registry's unlink stays the only one
+        return shared_memory.SharedMemory(name=location)
+
+# Function to get a zero-copy, read-only view of a registered cloud
+def attach_cloud(handle):
+    """Map the cloud behind `handle` into this process (once) and return it as a read-only array."""
+    if handle.location not in _attached:
+        if handle.backend == 'shm':
+            block = _open_block(handle.location)
+            cloud = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=block.buf)
+        else:
+            block = None
+            cloud = np.load(handle.location, mmap_mode='r')
+        cloud.setflags(write=False)
+        _attached[handle.location] = (block, cloud)
+    return _attached[handle.location][1]
+
+# Function to drop this process's mapping of a cloud
+def detach_cloud(handle):
+    """Close this process's mapping; views returned by `attach_cloud` must no longer be used."""
+    block, _ = _attached.pop(handle.location, (None, None))
+    if block is not None:
+        block.close()
+
+# Run one task on an attached cloud inside a worker
+def _run_shared_task(func, handle, args, kwargs):
+    start = time.perf_counter()
+    result = func(attach_cloud(handle), *args, **kwargs)
+    return result, time.perf_counter() - start
+
+# Function to run several analyses of shared clouds in a process pool
+def run_shared(tasks, max_workers=None):
+    """
+    Run `func(cloud, *args, **kwargs)` for every task, each worker attaching to its cloud by handle.
+
+    Args:
+        tasks: Mapping of task name to (func, handle, args, kwargs); `func` must be a
+            module-level function and should not write to the cloud.
+        max_workers: Process pool size (defaults to one worker per task, capped by the
+            CPU count); 1 runs the tasks one after another in this process.
+
+    Returns:
+        tuple: (results, seconds), mappings of task name to its return value and wall time.
+    """
+    if max_workers is None:
+        max_workers = min(len(tasks), os.cpu_count() or 1)
+    results, seconds = {}, {}
+    if max_workers <= 1:
+        for name, (func, handle, args, kwargs) in tasks.items():
+            results[name], seconds[name] = _run_shared_task(func, handle, args, kwargs)
+        return results, seconds
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_run_shared_task, func, handle, args, kwargs): name
+                   for name, (func, handle, args, kwargs) in tasks.items()}
+        for future in as_completed(futures):
+            results[futures[future]], seconds[futures[future]] = future.result()
+    return {name: results[name] for name in tasks}, {name: seconds[name] for name in tasks}
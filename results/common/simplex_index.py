@@ -0,0 +1,93 @@
+import numpy as np
+
+from common.boundary import binomial_table, graded_offset, simplex_keys
+
+
+# Function to encode simplices of any dimensions as single integers
+def encode_simplices(simplices, num_vertices):
+    """
+    Encode sorted vertex tuples of any dimensions as graded combinatorial keys.
+
+    Each dimension is encoded by `common.boundary.simplex_keys` with
+    `graded=True`: a simplex's rank among the subsets of its size plus the
+    number of all smaller subsets, so keys of different dimensions never
+    collide and sort by dimension first.
+
+    Args:
+        simplices: Per-dimension integer arrays of shape (count, k + 1) with sorted rows.
+        num_vertices: Vertex count of the complex.
+
+    Returns:
+        np.ndarray: int64 keys, dimension by dimension in the input order.
+
+    Raises:
+        OverflowError: If the keys of the top dimension do not fit in an int64.
+    """
+    keys = [simplex_keys(s, num_vertices, graded=True) for s in simplices if len(s)]
+    return np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64)
+
+# Function to recover vertex arrays from graded combinatorial keys
+def decode_simplices(keys, num_vertices):
+    """Inverse of `encode_simplices`: per-dimension int32 vertex arrays for the keys, in key order."""
+    keys = np.sort(np.asarray(keys, dtype=np.int64))
+    offsets = [0]
+    while len(keys) and offsets[-1] <= keys[-1]:
+        offsets.append(graded_offset(num_vertices, len(offsets)))
+    table = binomial_table(num_vertices, max(len(offsets) - 2, 0))
+    simplices = []
+    for size in range(1, len(offsets) - 1):
+        ranks = keys[(keys >= offsets[size]) & (keys < offsets[size + 1])] - offsets[size]
+        rows = np.empty((len(ranks), size), dtype=np.int32)
+        # Peel off the largest vertex v with C(v, j) <= rank, from the last position down
+        for j in range(size, 0, -1):
+            vertices = np.searchsorted(table[j], ranks, side='right') - 1
+            rows[:, j - 1] = vertices
+            ranks = ranks - table[j][vertices]
+        simplices.append(rows)
+    return simplices
+
+
+class SimplexIndex:
+    """
+    Set of simplices stored as one sorted array of graded combinatorial keys.
+
+    Membership of a single simplex is a binary search; membership of many,
+    intersections and unions are vectorized (`np.searchsorted`,
+    `np.intersect1d`, `np.union1d`) over the int64 keys instead of
+    comparisons of vertex lists.
+    """
+    __slots__ = ('num_vertices', 'keys')
+
+    def __init__(self, keys, num_vertices):
+        self.num_vertices = num_vertices
+        self.keys = np.unique(np.asarray(keys, dtype=np.int64))
+
+    @classmethod
+    def from_simplices(cls, simplices, num_vertices):
+        """Build the index from per-dimension vertex arrays."""
+        return cls(encode_simplices(simplices, num_vertices), num_vertices)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, simplex):
+        simplex = np.sort(np.asarray(simplex, dtype=np.int64))[None, :]
+        return bool(self.contains([simplex])[0]) if simplex.size else False
+
+    def contains(self, simplices):
+        """Boolean mask over the rows of per-dimension vertex arrays, dimension by dimension."""
+        keys = encode_simplices(simplices, self.num_vertices)
+        positions = np.minimum(np.searchsorted(self.keys, keys), max(len(self.keys) - 1, 0))
+        return (self.keys[positions] == keys) if len(self.keys) else np.zeros(len(keys), dtype=bool)
+
+    def intersection(self, other):
+        """Simplices in both indexes."""
+        return SimplexIndex(np.intersect1d(self.keys, other.keys, assume_unique=True), self.num_vertices)
+
+    def union(self, other):
+        """Simplices in either index."""
+        return SimplexIndex(np.union1d(self.keys, other.keys), self.num_vertices)
+
+    def simplices(self):
+        """The indexed simplices as per-dimension vertex arrays."""
+        return decode_simplices(self.keys, self.num_vertices)
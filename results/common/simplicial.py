@@ -0,0 +1,119 @@
+from collections import defaultdict
+
+import numpy as np
+import gudhi
+
+from common.simplex_index import encode_simplices
+
+# Region labels of the hybrid filtration, stored per simplex as uint8
+SMOOTH, NON_SMOOTH, SINGULAR, TRANSITION = range(4)
+
+# Names of the region labels, indexed by label
+REGION_NAMES = ('smooth', 'non_smooth', 'singular', 'transition')
+
+
+class CompactComplex:
+    """
+    Array-backed simplicial complex with a filtration value and a region label per simplex.
+
+    Dimension k is held in three contiguous columns: an int32 (count, k + 1)
+    array of sorted vertices, a float64 array of filtration values and a uint8
+    array of region labels. Stages of the hybrid filtration derive new
+    complexes by replacing or masking whole columns, so there is no per-simplex
+    Python object; the vertex arrays are shared between complexes derived
+    from one another and must not be written to.
+    """
+    __slots__ = ('num_vertices', 'simplices', 'values', 'regions')
+
+    def __init__(self, simplices, values=None, regions=SMOOTH, num_vertices=None):
+        self.simplices = [np.ascontiguousarray(s, dtype=np.int32).reshape(len(s), k + 1) for k, s in enumerate(simplices)]
+        counts = [len(s) for s in self.simplices]
+        if values is None:
+            values = [np.zeros(count) for count in counts]
+        self.values = [np.ascontiguousarray(v, dtype=np.float64).reshape(count) for v, count in zip(values, counts)]
+        if np.isscalar(regions):
+            regions = [np.full(count, regions, dtype=np.uint8) for count in counts]
+        self.regions = [np.ascontiguousarray(r, dtype=np.uint8).reshape(count) for r, count in zip(regions, counts)]
+        if num_vertices is None:
+            num_vertices = max((int(s.max()) + 1 for s in self.simplices if s.size), default=0)
+        self.num_vertices = num_vertices
+
+    @classmethod
+    def from_simplex_list(cls, simplicial_complex, region=SMOOTH):
+        """Build a complex from a list of vertex lists or of (vertex list, value) pairs."""
+        by_dimension = defaultdict(list)
+        values = defaultdict(list)
+        for item in simplicial_complex:
+            simplex, value = item if isinstance(item, tuple) and len(item) == 2 and not np.isscalar(item[0]) else (item, 0.0)
+            by_dimension[len(simplex) - 1].append(sorted(simplex))
+            values[len(simplex) - 1].append(value)
+        top = max(by_dimension, default=-1)
+        return cls([np.array(by_dimension[k], dtype=np.int32).reshape(-1, k + 1) for k in range(top + 1)],
+                   [np.array(values[k], dtype=np.float64) for k in range(top + 1)], region)
+
+    @classmethod
+    def concatenate(cls, complexes):
+        """Stack complexes dimension by dimension (simplices in several of them appear once per complex)."""
+        complexes = [c for c in complexes if c.simplices]
+        top = max((len(c.simplices) for c in complexes), default=0)
+
+        def stack(column, k, width):
+            parts = [getattr(c, column)[k] for c in complexes if k < len(c.simplices)]
+            return np.concatenate(parts) if parts else np.zeros((0, width) if width else 0)
+
+        return cls([stack('simplices', k, k + 1) for k in range(top)], [stack('values', k, None) for k in range(top)],
+                   [stack('regions', k, None) for k in range(top)],
+                   max((c.num_vertices for c in complexes), default=0))
+
+    def __len__(self):
+        return sum(len(s) for s in self.simplices)
+
+    @property
+    def dimension(self):
+        """Top dimension (-1 for an empty complex)."""
+        return len(self.simplices) - 1
+
+    @property
+    def nbytes(self):
+        """Bytes held by the vertex, value and region columns."""
+        return sum(s.nbytes + v.nbytes + r.nbytes for s, v, r in zip(self.simplices, self.values, self.regions))
+
+    def num_simplices_by_dimension(self):
+        """Simplex count of every dimension."""
+        return [len(s) for s in self.simplices]
+
+    def skeleton(self, max_dimension):
+        """The simplices of dimension at most `max_dimension`, sharing this complex's columns."""
+        k = max_dimension + 1
+        return CompactComplex(self.simplices[:k], self.values[:k], self.regions[:k], self.num_vertices)
+
+    def with_values(self, values, region=None):
+        """A complex sharing these vertex arrays with new filtration values (and optionally one region label)."""
+        regions = self.regions if region is None else region
+        return CompactComplex(self.simplices, values, regions, self.num_vertices)
+
+    def select(self, masks):
+        """The simplices selected by one boolean mask per dimension, with their values and regions."""
+        return CompactComplex([s[m] for s, m in zip(self.simplices, masks)], [v[m] for v, m in zip(self.values, masks)],
+                              [r[m] for r, m in zip(self.regions, masks)], self.num_vertices)
+
+    def keys(self):
+        """Graded integer keys of all simplices (see `common.simplex_index.encode_simplices`), dimension by dimension."""
+        return encode_simplices(self.simplices, self.num_vertices)
+
+    def to_simplex_list(self):
+        """The simplices as (vertex list, value) pairs, lowest dimension first."""
+        return [(simplex, value) for s, v in zip(self.simplices, self.values) for simplex, value in zip(s.tolist(), v.tolist())]
+
+    def to_simplex_tree(self):
+        """
+        Convert to a gudhi SimplexTree, one batch insertion per dimension.
+
+        A simplex listed more than once keeps its lowest value, and gudhi lowers
+        faces to the value of their lowest coface, so the result is a filtration.
+        """
+        simplex_tree = gudhi.SimplexTree()
+        for s, v in zip(self.simplices, self.values):
+            if len(s):
+                simplex_tree.insert_batch(s.T.astype(np.int64), v)
+        return simplex_tree
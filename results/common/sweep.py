@@ -0,0 +1,164 @@
+import itertools
+import json
+import os
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from common.profiling import RunProfile, json_default
+
+# Name of the file recording the grid and the root seed of a checkpointed sweep
+MANIFEST_NAME = 'manifest.json'
+
+
+# Function to expand named axes into the cells of a full factorial grid
+def expand_grid(**axes):
+    """
+    Return every combination of the axis values as a list of dicts, in axis order.
+
+    Example: expand_grid(framework=['singular', 'control'], complexity=[1, 2])
+    gives four cells, the last axis varying fastest.
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+# Stable, filename-safe identifier of a grid cell
+def cell_key(cell):
+    return '__'.join(f"{name}-{value}" for name, value in cell.items())
+
+# Seed of one cell, derived from the root entropy and the cell identity only
+def cell_seed(entropy, cell):
+    """Keyed by the cell itself rather than its position, so growing the grid never reseeds finished cells."""
+    return np.random.SeedSequence(entropy, spawn_key=(zlib.crc32(cell_key(cell).encode()),))
+
+# Round-trip a value through JSON so fresh and resumed results look the same
+def _normalize(value):
+    return json.loads(json.dumps(value, default=json_default))
+
+# Write a JSON file atomically next to its final location
+def _write_json(path, value):
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(value, f, default=json_default)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+# Load a finished cell's checkpoint, or None if it has not completed
+def _load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+# Read or create the manifest that fixes the root seed of a checkpointed sweep
+def _root_entropy(checkpoint_dir, seed):
+    """
+    Root entropy of the sweep. A fresh sweep records it (OS entropy when `seed` is
+    None) so a restart reuses the same cell seeds; resuming with a different
+    explicit seed would mix two experiments and is refused.
+    """
+    requested = np.random.SeedSequence(seed).entropy
+    if checkpoint_dir is None:
+        return requested
+    path = os.path.join(checkpoint_dir, MANIFEST_NAME)
+    manifest = _load_checkpoint(path)
+    if manifest is None:
+        _write_json(path, {'seed': seed, 'entropy': requested})
+        return requested
+    if seed is not None and manifest['entropy'] != requested:
+        raise ValueError(f"Checkpoint directory {checkpoint_dir} belongs to a sweep with seed {manifest['seed']}, not {seed}.")
+    return manifest['entropy']
+
+# Run one cell, timing it and (inside a worker process) profiling it on its own
+def _run_cell(cell_function, cell, seed, isolated):
+    start = time.perf_counter()
+    if isolated:
+        with RunProfile(f"sweep {cell_key(cell)}", **cell) as profile:
+            result = cell_function(**cell, seed=seed)
+        profile_record = profile.to_record()
+    else:
+        result = cell_function(**cell, seed=seed)
+        profile_record = None
+    return {'cell': cell, 'result': _normalize(result), 'wall_time': time.perf_counter() - start, 'profile': profile_record}
+
+# Execute a grid of independent cells in a process pool with per-cell checkpoints
+def run_sweep(cell_function, cells, checkpoint_dir=None, seed=None, max_workers=None):
+    """
+    Run `cell_function(**cell, seed=...)` for every cell of a grid.
+
+    Every finished cell is written to `<checkpoint_dir>/<cell key>.json` as soon as
+    it completes, and cells whose checkpoint already exists are skipped, so an
+    interrupted sweep resumes where it stopped. Each cell draws from its own
+    seed derived from the root seed and the cell's values, so results do not
+    depend on the number of workers or on which cells were resumed.
+
+    Args:
+        cell_function: Module-level (picklable) function returning a JSON-serializable result.
+        cells: List of cell dicts, e.g. from `expand_grid`.
+        checkpoint_dir: Directory of the checkpoints; None keeps results in memory only.
+        seed: Root seed; None draws fresh entropy (recorded in the manifest for restarts).
+        max_workers: Process pool size (defaults to the CPU count); 1 runs the cells in this process.
+
+    Returns:
+        list: One record per cell, in cell order, with the cell, its result (None
+        if it failed), wall time, stage profile, and whether it was resumed or its error.
+    """
+    if checkpoint_dir is not None:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+    entropy = _root_entropy(checkpoint_dir, seed)
+
+    records = {}
+    pending = []
+    for cell in cells:
+        key = cell_key(cell)
+        checkpoint = _load_checkpoint(os.path.join(checkpoint_dir, f"{key}.json")) if checkpoint_dir else None
+        if checkpoint is not None:
+            records[key] = {**checkpoint, 'resumed': True, 'error': None}
+        else:
+            pending.append(cell)
+    if records:
+        print(f"[sweep] Resuming: {len(records)} of {len(cells)} cells already finished")
+
+    def finish(cell, record):
+        key = cell_key(cell)
+        if record['error'] is None and checkpoint_dir is not None:
+            _write_json(os.path.join(checkpoint_dir, f"{key}.json"), {k: record[k] for k in ('cell', 'result', 'wall_time', 'profile')})
+        records[key] = record
+        status = f"failed: {record['error']}" if record['error'] else "done"
+        print(f"[sweep] {key} {status} in {record['wall_time']:.2f} seconds ({len(records)}/{len(cells)})")
+
+    start = time.perf_counter()
+    if max_workers is None:
+        max_workers = min(len(pending), os.cpu_count() or 1)
+    if max_workers <= 1:
+        for cell in pending:
+            cell_start = time.perf_counter()
+            try:
+                record = {**_run_cell(cell_function, cell, cell_seed(entropy, cell), False), 'resumed': False, 'error': None}
+            except Exception as e:
+                record = {'cell': cell, 'result': None, 'wall_time': time.perf_counter() - cell_start, 'profile': None,
+                          'resumed': False, 'error': repr(e)}
+            finish(cell, record)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(_run_cell, cell_function, cell, cell_seed(entropy, cell), True): cell for cell in pending}
+            for future in as_completed(futures):
+                try:
+                    record = {**future.result(), 'resumed': False, 'error': None}
+                except Exception as e:
+                    # A failed cell is not checkpointed, so the next run retries it
+                    record = {'cell': futures[future], 'result': None, 'wall_time': time.perf_counter() - start,
+                              'profile': None, 'resumed': False, 'error': repr(e)}
+                finish(futures[future], record)
+
+    print(f"[sweep] {len(pending)} cells computed, {len(cells) - len(pending)} resumed, "
+          f"in {time.perf_counter() - start:.2f} seconds")
+    return [records[cell_key(cell)] for cell in cells]
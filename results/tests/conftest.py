@@ -0,0 +1,15 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Make the shared helpers in results/common importable, as the suites do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+# Points on the unit circle: one long-lived H1 class
+@pytest.fixture
+def circle():
+    angles = np.random.default_rng(1).uniform(0, 2 * np.pi, 60)
+    return np.column_stack([np.cos(angles), np.sin(angles)])
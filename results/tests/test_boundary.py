@@ -0,0 +1,49 @@
+import numpy as np
+import gudhi
+import pytest
+from scipy.spatial.distance import pdist, squareform
+
+from common.boundary import betti_numbers, boundary_matrix, persistence_pairs
+from common.complexes import rips_cliques
+
+
+# Rips filtration values of per-dimension simplices: the longest edge of each
+def _rips_values(points, simplices):
+    distances = squareform(pdist(points))
+    values = [np.zeros(len(simplices[0]))]
+    for s in simplices[1:]:
+        rows, cols = np.triu_indices(s.shape[1], k=1)
+        values.append(distances[s[:, rows], s[:, cols]].max(axis=1))
+    return values
+
+
+@pytest.mark.parametrize('cohomology', [False, True])
+def test_persistence_pairs_match_gudhi(cohomology):
+    points = np.random.default_rng(3).uniform(size=(40, 2))
+    simplices = rips_cliques(points, 0.4, max_dimension=2)
+    diagrams = persistence_pairs(boundary_matrix(simplices, _rips_values(points, simplices)), cohomology)
+
+    simplex_tree = gudhi.RipsComplex(points=points, max_edge_length=0.4).create_simplex_tree(max_dimension=2)
+    simplex_tree.compute_persistence()
+    for dim in (0, 1):
+        expected = np.sort(simplex_tree.persistence_intervals_in_dimension(dim).reshape(-1, 2), axis=0)
+        np.testing.assert_allclose(np.sort(diagrams[dim], axis=0), expected)
+
+
+@pytest.mark.parametrize('cohomology', [False, True])
+def test_betti_numbers_leave_out_the_truncated_top_dimension(cohomology):
+    # At radius 1.1 only neighbouring vertices of the unit hexagon are joined, so the graph is one cycle
+    angles = np.linspace(0, 2 * np.pi, 6, endpoint=False)
+    points = np.column_stack([np.cos(angles), np.sin(angles)])
+    matrix = boundary_matrix(rips_cliques(points, 1.1, max_dimension=1))
+    # By default the top dimension of the matrix is treated as a truncated skeleton and left out
+    assert betti_numbers(matrix, cohomology) == [1]
+    assert betti_numbers(matrix, cohomology, max_dimension=1) == [1, 1]
+    assert betti_numbers(matrix, cohomology, max_dimension=2) == [1, 1, 0]
+
+
+def test_betti_numbers_of_a_hollow_tetrahedron():
+    triangles = np.array([[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3]])
+    edges = np.array([[0, 1], [0, 2], [0, 3], [1, 2], [1, 3], [2, 3]])
+    matrix = boundary_matrix([np.arange(4)[:, None], edges, triangles])
+    assert betti_numbers(matrix, max_dimension=2) == [1, 0, 1]
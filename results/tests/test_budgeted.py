@@ -0,0 +1,48 @@
+import time
+
+import numpy as np
+import pytest
+
+from common.budgeted import budgeted_ripser
+from common.landmarks import GreedyPermutation, maxmin_landmarks
+
+
+@pytest.mark.parametrize('max_points', [None, 150])
+def test_rounds_use_prefixes_of_one_greedy_permutation(max_points):
+    points = np.random.default_rng(4).normal(size=(200, 3))
+    result, report = budgeted_ripser(points, maxdim=1, initial_points=20, max_points=max_points, seed=0)
+    size = report['num_landmarks']
+    assert [r['num_landmarks'] for r in report['rounds']][-1] == size == (max_points or 200)
+    _, _, covering_radius = maxmin_landmarks(points, size, seed=0)
+    np.testing.assert_allclose(report['covering_radius'], covering_radius)
+    assert len(result['dgms']) == 2
+
+
+def test_prefix_covering_radii_match_separate_selections():
+    points = np.random.default_rng(5).uniform(size=(120, 2))
+    _, report = budgeted_ripser(points, maxdim=0, initial_points=10, memory_budget=200 * 40 * 39 // 2, seed=1)
+    size = report['num_landmarks']
+    assert size < 120 and report['stopped'] == 'memory'
+    np.testing.assert_allclose(report['covering_radius'], maxmin_landmarks(points, size, seed=1)[2])
+
+
+def test_large_cloud_stays_within_the_time_budget():
+    # A full greedy permutation of this cloud alone takes several seconds
+    points = np.random.default_rng(6).normal(size=(40000, 5))
+    start = time.perf_counter()
+    _, report = budgeted_ripser(points, maxdim=1, time_budget=1.0, seed=0)
+    elapsed = time.perf_counter() - start
+    assert report['stopped'] == 'time' and report['num_landmarks'] < len(points)
+    assert elapsed < 3.0
+    assert all('selection_seconds' in r for r in report['rounds'])
+
+
+def test_greedy_permutation_grows_by_prefixes():
+    points = np.random.default_rng(7).normal(size=(300, 3))
+    permutation = GreedyPermutation(points, seed=3)
+    for size in (10, 40, 160):
+        permutation.extend(size)
+    indices, radii, covering_radius = maxmin_landmarks(points, 160, seed=3)
+    np.testing.assert_array_equal(permutation.indices, indices)
+    np.testing.assert_allclose(permutation.prefix_covering_radius(40), maxmin_landmarks(points, 40, seed=3)[2])
+    np.testing.assert_allclose(permutation.covering_radius, covering_radius)
@@ -0,0 +1,37 @@
+import numpy as np
+
+import common.cache as cache_module
+from common.cache import PersistenceCache, rips_persistence
+
+
+# Cache keys written by rips_persistence into `cache`, in call order
+def _keys(monkeypatch, cache):
+    keys = []
+    original = cache.key
+
+    def spy(points, **params):
+        keys.append(original(points, **params))
+        return keys[-1]
+
+    monkeypatch.setattr(cache, 'key', spy)
+    return keys
+
+
+def test_rips_keys_resolve_construction_defaults(monkeypatch, tmp_path):
+    cache = PersistenceCache(str(tmp_path))
+    keys = _keys(monkeypatch, cache)
+    points = np.random.default_rng(0).uniform(size=(30, 2))
+    first, _ = rips_persistence(points, 0.5, 2, cache=cache)
+    second, _ = rips_persistence(points, 0.5, 2, cache=cache, collapse=True, method='rips')
+    rips_persistence(points, 0.5, 2, cache=cache, collapse=False)
+    # Spelling out a default is the same computation; changing it is not
+    assert keys[0] == keys[1] != keys[2]
+    np.testing.assert_array_equal(first.pairs(), second.pairs())
+
+
+def test_keys_change_with_the_cache_version(monkeypatch, tmp_path):
+    cache = PersistenceCache(str(tmp_path))
+    points = np.zeros((3, 2))
+    before = cache.key(points, complex='rips')
+    monkeypatch.setattr(cache_module, 'CACHE_VERSION', cache_module.CACHE_VERSION + 1)
+    assert cache.key(points, complex='rips') != before
@@ -0,0 +1,45 @@
+import numpy as np
+import gudhi
+import pytest
+
+from common.cache import rips_persistence
+from common.complexes import flag_cliques, rips_cliques
+
+
+# gudhi's uncollapsed Rips diagram of homology dimensions 0..max_dimension-1, sorted
+def _reference(points, max_edge_length, max_dimension):
+    simplex_tree = gudhi.RipsComplex(points=points, max_edge_length=max_edge_length).create_simplex_tree(max_dimension=max_dimension)
+    simplex_tree.compute_persistence()
+    return [np.sort(simplex_tree.persistence_intervals_in_dimension(dim).reshape(-1, 2), axis=0) for dim in range(max_dimension)]
+
+
+@pytest.mark.parametrize('max_dimension', [2, 3])
+def test_collapsed_rips_matches_gudhi_on_circle(circle, max_dimension):
+    diagram, _ = rips_persistence(circle, 0.5, max_dimension)
+    reference = _reference(circle, 0.5, max_dimension)
+    assert len(diagram.intervals) == max_dimension
+    for dim in range(max_dimension):
+        np.testing.assert_allclose(np.sort(diagram.pairs(dim), axis=0), reference[dim])
+    assert len(diagram[1]) == 1 and np.isinf(diagram[1]['death'][0])
+
+
+@pytest.mark.parametrize('collapse', [True, False])
+def test_rips_persistence_matches_gudhi_on_random_cloud(collapse):
+    points = np.random.default_rng(0).random((80, 3))
+    diagram, _ = rips_persistence(points, 0.4, 3, collapse=collapse)
+    for dim, reference in enumerate(_reference(points, 0.4, 3)):
+        np.testing.assert_allclose(np.sort(diagram.pairs(dim), axis=0), reference)
+
+
+def test_rips_cliques_match_gudhi_simplices():
+    points = np.random.default_rng(2).random((120, 3))
+    simplices = rips_cliques(points, 0.3, 3)
+    simplex_tree = gudhi.RipsComplex(points=points, max_edge_length=0.3).create_simplex_tree(max_dimension=3)
+    for dim in range(4):
+        expected = sorted(tuple(s) for s, _ in simplex_tree.get_skeleton(dim) if len(s) == dim + 1)
+        assert [tuple(row) for row in simplices[dim].tolist()] == expected
+
+
+def test_flag_cliques_without_edges():
+    simplices = flag_cliques(4, np.zeros((0, 2), dtype=np.int64), 2)
+    assert [len(s) for s in simplices] == [4, 0, 0]
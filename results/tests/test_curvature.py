@@ -0,0 +1,21 @@
+import numpy as np
+import gudhi
+import pytest
+
+from common.curvature import curvature_persistence
+
+
+@pytest.mark.parametrize('max_dimension', [2, 3])
+def test_constant_curvature_circle_keeps_its_loop(circle, max_dimension):
+    diagram = curvature_persistence(circle, np.zeros(len(circle)), 0.5, max_dimension)
+    assert len(diagram.intervals) == max_dimension
+    assert diagram.betti_numbers(0.0)[:2] == [1, 1]
+
+
+def test_max_mode_with_constant_curvature_is_the_rips_filtration(circle):
+    diagram = curvature_persistence(circle, np.zeros(len(circle)), 0.5, 2, mode='max', scale=1.0)
+    simplex_tree = gudhi.RipsComplex(points=circle, max_edge_length=0.5).create_simplex_tree(max_dimension=2)
+    simplex_tree.compute_persistence()
+    for dim in range(2):
+        reference = np.sort(simplex_tree.persistence_intervals_in_dimension(dim).reshape(-1, 2), axis=0)
+        np.testing.assert_allclose(np.sort(diagram.pairs(dim), axis=0), reference)
@@ -0,0 +1,21 @@
+import numpy as np
+import gudhi
+
+from common.diagrams import PersistenceDiagram
+
+
+def test_from_simplex_tree_returns_every_requested_dimension():
+    simplex_tree = gudhi.SimplexTree()
+    simplex_tree.insert([0, 1], 1.0)
+    diagram = PersistenceDiagram.from_simplex_tree(simplex_tree, max_dimension=2)
+    assert len(diagram.intervals) == 3
+    assert len(diagram[0]) == 1 and len(diagram[1]) == 0 and len(diagram[2]) == 0
+
+
+def test_from_simplex_tree_keeps_top_dimension_classes():
+    # A hollow triangle is a 1-dimensional tree whose H1 class is in its top dimension
+    simplex_tree = gudhi.SimplexTree()
+    for edge, value in (([0, 1], 1.0), ([1, 2], 2.0), ([0, 2], 3.0)):
+        simplex_tree.insert(edge, value)
+    diagram = PersistenceDiagram.from_simplex_tree(simplex_tree, max_dimension=1)
+    np.testing.assert_array_equal(diagram.pairs(1), [[3.0, np.inf]])
@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+import gudhi
+import gudhi.wasserstein as wasserstein
+
+from common.diagrams import PersistenceDiagram
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DistanceHomology'))
+from DistancePersistentHomology import compute_distance_matrices, compute_distances, compute_nearest_diagrams
+
+
+# Two diagrams whose H0 and H1 points would be matched to each other if the dimensions were flattened
+def _diagrams():
+    first = PersistenceDiagram([[[0.0, 1.0], [0.0, np.inf]], [[0.2, 0.3]]])
+    second = PersistenceDiagram([[[0.0, 0.3], [0.0, np.inf]], [[0.1, 1.0], [0.4, 0.5]]])
+    return [first, second]
+
+
+def test_distance_matrices_compare_dimensions_separately():
+    diagrams = _diagrams()
+    matrices = compute_distance_matrices(diagrams, ['first', 'second'], max_workers=1)
+    for metric, distance in (('bottleneck', gudhi.bottleneck_distance), ('wasserstein', wasserstein.wasserstein_distance)):
+        expected = [distance(diagrams[0].pairs(dim, finite=True), diagrams[1].pairs(dim, finite=True)) for dim in (0, 1)]
+        assert set(matrices[metric]) == {'H0', 'H1', 'combined'}
+        for dim in (0, 1):
+            np.testing.assert_allclose(matrices[metric][f"H{dim}"][0, 1], expected[dim])
+        combined = max(expected) if metric == 'bottleneck' else sum(expected)
+        np.testing.assert_allclose(matrices[metric]['combined'], [[0.0, combined], [combined, 0.0]])
+
+
+def test_compute_distances_matches_the_combined_matrices():
+    diagrams = _diagrams()
+    matrices = compute_distance_matrices(diagrams, ['first', 'second'], max_workers=1)
+    bottleneck_dist, wasserstein_dist = compute_distances(*diagrams)
+    np.testing.assert_allclose(bottleneck_dist, matrices['bottleneck']['combined'][0, 1])
+    np.testing.assert_allclose(wasserstein_dist, matrices['wasserstein']['combined'][0, 1])
+
+
+def test_nearest_diagrams_match_points_within_a_dimension():
+    # The H1 point of `shifted` equals the H0 point of `query`, so a flattened index would call them identical
+    query = PersistenceDiagram([[[0.0, 1.0]]])
+    shifted = PersistenceDiagram([np.zeros((0, 2)), [[0.0, 1.0]]])
+    close = PersistenceDiagram([[[0.0, 0.8]]])
+    names = ['query', 'shifted', 'close']
+    for metric in ('bottleneck', 'wasserstein'):
+        nearest = compute_nearest_diagrams([query, shifted, close], names, metric=metric)
+        assert nearest['query'][0][0] == 'close'
+        np.testing.assert_allclose(nearest['query'][0][1], 0.2)
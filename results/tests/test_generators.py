@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from common.generators import (gasket_vertex_count, iter_synthetic_cloud, sample_sierpinski_gasket,
+                               sierpinski_gasket, synthetic_cloud)
+
+
+# Rows of an array as a set of tuples
+def _rows(points):
+    return {tuple(row) for row in np.round(points, 12).tolist()}
+
+
+@pytest.mark.parametrize('depth', [1, 3, 5])
+def test_gasket_samples_are_distinct_vertices(depth):
+    vertices = sierpinski_gasket(depth)
+    assert len(vertices) == gasket_vertex_count(3, depth)
+    # Asking for every vertex returns each exactly once
+    sample = sample_sierpinski_gasket(len(vertices), depth, seed=0)
+    assert len(_rows(sample)) == len(sample) and _rows(sample) == _rows(vertices)
+    with pytest.raises(ValueError):
+        sample_sierpinski_gasket(len(vertices) + 1, depth, seed=0)
+
+
+def test_fractal_cloud_is_distinct_and_independent_of_chunk_size():
+    # 500 points exceed the 15 vertices of depth 2, so a deeper gasket is sampled instead of repeating vertices
+    cloud = synthetic_cloud('fractal', 500, 4, 2, seed=3)
+    assert cloud.shape == (500, 4) and len(np.unique(cloud, axis=0)) == 500
+    chunked = np.vstack(list(iter_synthetic_cloud('fractal', 500, 4, 2, chunk_size=37, seed=3)))
+    np.testing.assert_array_equal(chunked, cloud)
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from common.prices import DEFAULT_FIELD, VERSION_PREFIX, PriceStore, synthetic_price_frames
+
+
+def test_reingest_merges_history_and_widens_coverage(tmp_path):
+    directory = str(tmp_path / 'store')
+    early = synthetic_price_frames(['AAA', 'BBB'], '2020-01-01', '2020-03-01', seed=0)
+    late = synthetic_price_frames(['AAA'], '2020-02-01', '2020-04-01', seed=1)
+    PriceStore.ingest(directory, early, start='2020-01-01', end='2020-03-01')
+    store = PriceStore.ingest(directory, late, start='2020-02-01', end='2020-04-01')
+
+    assert store.coverage['AAA'] == ['2020-01-01', '2020-04-01']
+    assert store.coverage['BBB'] == ['2020-01-01', '2020-03-01']
+    assert store.missing(['AAA'], '2020-01-01', '2020-04-01') == []
+    assert store.missing(['BBB'], '2020-01-01', '2020-04-01') == ['BBB']
+
+    # Stored quotes before the new range survive, and the new quotes win where the ranges overlap
+    expected = pd.concat([early['AAA'][DEFAULT_FIELD][:'2020-01-31'], late['AAA'][DEFAULT_FIELD]])
+    np.testing.assert_allclose(store.series('AAA'), expected.to_numpy())
+    np.testing.assert_allclose(store.series('BBB'), early['BBB'][DEFAULT_FIELD].to_numpy())
+
+
+def test_disjoint_reingest_keeps_data_but_only_claims_the_new_range(tmp_path):
+    directory = str(tmp_path / 'store')
+    PriceStore.ingest(directory, synthetic_price_frames(['AAA'], '2020-01-01', '2020-02-01', seed=0),
+                      start='2020-01-01', end='2020-02-01')
+    store = PriceStore.ingest(directory, synthetic_price_frames(['AAA'], '2020-03-01', '2020-04-01', seed=1),
+                              start='2020-03-01', end='2020-04-01')
+    assert store.coverage['AAA'] == ['2020-03-01', '2020-04-01']
+    assert len(store.series('AAA', end='2020-02-01')) > 0
+
+
+def test_ingest_swaps_versions_through_the_manifest(tmp_path):
+    directory = str(tmp_path / 'store')
+    versions, stores = [], []
+    for seed in range(3):
+        stores.append(PriceStore.ingest(directory, synthetic_price_frames(['AAA'], '2020-01-01', '2020-02-01', seed=seed)))
+        versions.append(stores[-1].version)
+    assert len(set(versions)) == 3
+    # Only the current version and the one it replaced stay on disk, and no staging directory is left behind
+    assert sorted(name for name in os.listdir(directory) if name != 'manifest.json') == versions[1:]
+    assert all(version.startswith(VERSION_PREFIX) for version in versions)
+    # A store opened before the last ingest still reads its own version, new readers get the latest one
+    assert len(stores[1].series('AAA')) > 0 and stores[1].data_directory == os.path.join(directory, versions[1])
+    assert PriceStore(directory).version == versions[-1]
+
+
+def test_ingest_never_writes_into_a_version_directory_it_did_not_create(tmp_path, monkeypatch):
+    directory = str(tmp_path / 'store')
+    first = PriceStore.ingest(directory, synthetic_price_frames(['AAA'], '2020-01-01', '2020-02-01', seed=0))
+    # A concurrent ingest claims the next number between this one's listing and its mkdir
+    claimed = os.path.join(directory, f"{VERSION_PREFIX}{int(first.version[len(VERSION_PREFIX):]) + 1:06d}")
+    listdir = os.listdir
+
+    def racing_listdir(path):
+        names = listdir(path)
+        if not os.path.exists(claimed):
+            os.mkdir(claimed)
+        return names
+
+    monkeypatch.setattr(os, 'listdir', racing_listdir)
+    store = PriceStore.ingest(directory, synthetic_price_frames(['AAA'], '2020-01-01', '2020-02-01', seed=1))
+    monkeypatch.undo()
+
+    assert store.version not in (first.version, os.path.basename(claimed))
+    assert os.listdir(claimed) == [] and len(store.series('AAA')) > 0
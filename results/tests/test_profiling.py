@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+import common.profiling as profiling
+from common.profiling import RunProfile, stage
+
+
+def test_profiling_imports_without_the_resource_module():
+    # Simulate a platform without `resource` (e.g. Windows) in a fresh interpreter
+    code = ("import sys; sys.modules['resource'] = None; import common.profiling as p; "
+            "assert p.resource is None and p._peak_rss() is None")
+    results = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    subprocess.run([sys.executable, '-c', code], cwd=results, check=True)
+
+
+def test_memory_readings_are_none_when_unavailable(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, 'resource', None)
+    monkeypatch.setattr(profiling, '_current_rss', lambda: None)
+    path = tmp_path / 'profile.jsonl'
+    with RunProfile('no_rss', path=str(path)):
+        with stage('work'):
+            sum(range(1000))
+    record = json.loads(path.read_text())
+    assert record['peak_rss_bytes'] is None
+    assert record['stages']['work']['calls'] == 1 and record['stages']['work']['peak_rss_bytes'] is None
+
+
+def test_memory_readings_are_reported_when_available(tmp_path):
+    path = tmp_path / 'profile.jsonl'
+    with RunProfile('rss', path=str(path)):
+        with stage('work'):
+            sum(range(1000))
+    record = json.loads(path.read_text())
+    assert record['peak_rss_bytes'] > 0 and record['stages']['work']['peak_rss_bytes'] > 0
@@ -0,0 +1,43 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from common.resampling import bootstrap_ci, bootstrap_difference_ci, paired_permutation_test, permutation_test
+
+
+@pytest.mark.parametrize('first, second', [([], []), ([np.nan, 1.0], [2.0, np.nan]), ([np.inf], [np.inf])])
+def test_paired_permutation_test_without_pairs_is_nan(first, second):
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        result = paired_permutation_test(first, second, seed=0)
+    assert np.isnan(result['statistic']) and np.isnan(result['p_value'])
+    assert result['num_permutations'] == 0
+
+
+def test_paired_permutation_test_is_exact_on_small_samples():
+    result = paired_permutation_test([1.0, 2.0, 3.0], [0.0, 0.0, 0.0], alternative='greater')
+    # Only the all-positive sign pattern reaches the observed mean of 2
+    assert result['exact'] and result['p_value'] == pytest.approx(1 / 8)
+
+
+@pytest.mark.parametrize('statistic', ['welch_t', 'cohens_d'])
+def test_standardized_statistics_stay_silent_on_zero_variance(statistic):
+    # Most resamples of these samples repeat a single value, so their pooled variance is zero
+    first, second = np.array([1.0, 1.0, 1.0, 2.0]), np.array([0.0, 0.0, 0.0, 0.0])
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        interval = bootstrap_difference_ci(first, second, statistic=statistic, num_resamples=500, seed=0, max_workers=1)
+        constant = permutation_test([1.0, 1.0], [1.0, 1.0], statistic=statistic, num_permutations=50, seed=0, max_workers=1)
+        single = bootstrap_difference_ci([1.0], [2.0], statistic=statistic, num_resamples=50, seed=0, max_workers=1)
+    assert np.isfinite([interval['statistic'], interval['low'], interval['high']]).all()
+    assert np.isnan(constant['statistic']) and np.isnan(constant['p_value'])
+    assert np.isnan(single['statistic']) and np.isnan(single['low'])
+
+
+def test_empty_samples_give_nan_intervals_and_p_values():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert np.isnan(bootstrap_ci([], seed=0)['low'])
+        assert np.isnan(bootstrap_difference_ci([], [1.0, 2.0], seed=0)['statistic'])
+        assert np.isnan(permutation_test([1.0, 2.0], [], seed=0)['p_value'])
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from common.boundary import simplex_keys
+from common.complexes import rips_cliques
+from common.simplex_index import SimplexIndex, decode_simplices, encode_simplices
+
+
+# Simplices of a small random Rips complex, as per-dimension arrays
+def _simplices(num_points=30, seed=2):
+    points = np.random.default_rng(seed).uniform(size=(num_points, 2))
+    return rips_cliques(points, 0.35, max_dimension=3)
+
+
+def test_encode_decode_round_trip():
+    simplices = _simplices()
+    keys = encode_simplices(simplices, 30)
+    assert len(np.unique(keys)) == len(keys)
+    # Graded keys sort by dimension first
+    dimensions = np.repeat(np.arange(len(simplices)), [len(s) for s in simplices])
+    assert (np.diff(dimensions[np.argsort(keys)]) >= 0).all()
+    decoded = decode_simplices(keys, 30)
+    assert len(decoded) == len(simplices)
+    for original, recovered in zip(simplices, decoded):
+        assert {tuple(row) for row in original.tolist()} == {tuple(row) for row in recovered.tolist()}
+
+
+def test_graded_keys_extend_the_per_dimension_keys():
+    simplices = _simplices()
+    for s in simplices[1:]:
+        offset = simplex_keys(s, 30, graded=True) - simplex_keys(s, 30)
+        assert len(np.unique(offset)) == 1
+
+
+def test_index_membership_and_set_operations():
+    simplices = _simplices()
+    index = SimplexIndex.from_simplices(simplices, 30)
+    assert len(index) == sum(len(s) for s in simplices)
+    edges = {tuple(row) for row in simplices[1].tolist()}
+    absent = next((u, v) for u in range(30) for v in range(u + 1, 30) if (u, v) not in edges)
+    assert next(iter(edges))[::-1] in index
+    assert absent not in index
+    half = SimplexIndex.from_simplices([s[::2] for s in simplices], 30)
+    assert len(index.intersection(half)) == len(half)
+    assert len(index.union(half)) == len(index)
+    assert half.contains(simplices).sum() == len(half)
+
+
+def test_keys_that_do_not_fit_raise():
+    with pytest.raises(OverflowError):
+        encode_simplices([np.zeros((0, 1)), np.zeros((0, 2)), np.array([[0, 1, 2]])], 10 ** 7)